@@ -11,8 +11,8 @@ from enum import Enum
 import uuid
 import models
 
-from python.helpers import extract_tools, files, errors, history, tokens
-from python.helpers import dirty_json
+from python.helpers import extract_tools, files, errors, history, tokens, settings
+from python.helpers import dirty_json, push
 from python.helpers.print_style import PrintStyle
 
 from langchain_core.prompts import (
@@ -21,8 +21,8 @@ from langchain_core.prompts import (
 from langchain_core.messages import SystemMessage, BaseMessage
 
 import python.helpers.log as Log
-from python.helpers.dirty_json import DirtyJson
-from python.helpers.defer import DeferredTask
+from python.helpers.dirty_json import DirtyJson, DirtyJsonStream
+from python.helpers.defer import DeferredTask, EventLoopPool, EventLoopThread
 from typing import Callable
 from python.helpers.localization import Localization
 from python.helpers.extension import call_extensions
@@ -40,6 +40,7 @@ class AgentContext:
     _contexts: dict[str, "AgentContext"] = {}
     _counter: int = 0
     _notification_manager = None
+    _loops = EventLoopPool("AgentContext")
 
     def __init__(
         self,
@@ -74,6 +75,7 @@ class AgentContext:
         if existing:
             AgentContext.remove(self.id)
         self._contexts[self.id] = self
+        push.publish(push.CONTEXTS)
 
     @staticmethod
     def get(id: str):
@@ -110,8 +112,29 @@ class AgentContext:
         context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        if context:
+            AgentContext._loops.release(id)
+            push.publish(push.CONTEXTS)
         return context
 
+    @staticmethod
+    def get_loops_stats():
+        return AgentContext._loops.get_stats()
+
+    @staticmethod
+    def get_loop_name(id: str, shared_name: str | None = None) -> str:
+        """Name of the event loop thread the context is pinned to, assigned on first use.
+        In shared mode, shared_name overrides the default shared loop."""
+        set = settings.get_settings()
+        mode = set["agent_loop_mode"]
+        return AgentContext._loops.assign(
+            id,
+            mode="per_key" if mode == "per_context" else mode,
+            size=set["agent_loop_pool_size"],
+            strategy=set["agent_loop_pool_strategy"],
+            shared_name=shared_name,
+        )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -123,7 +146,7 @@ class AgentContext:
             ),
             "no": self.no,
             "log_guid": self.log.guid,
-            "log_version": len(self.log.updates),
+            "log_version": self.log.version,
             "log_length": len(self.log.logs),
             "paused": self.paused,
             "last_message": (
@@ -132,6 +155,15 @@ class AgentContext:
                 else Localization.get().serialize_datetime(datetime.fromtimestamp(0))
             ),
             "type": self.type.value,
+            **self._serialize_loop(),
+        }
+
+    def _serialize_loop(self):
+        loop_name = AgentContext._loops.get_assignment(self.id)
+        loop = EventLoopThread.get(loop_name) if loop_name else None
+        return {
+            "loop": loop_name or "",
+            "loop_lag": loop.get_stats()["lag"] if loop else 0,
         }
 
     @staticmethod
@@ -198,7 +230,7 @@ class AgentContext:
     ):
         if not self.task:
             self.task = DeferredTask(
-                thread_name=self.__class__.__name__,
+                thread_name=AgentContext.get_loop_name(self.id),
             )
         self.task.start_task(func, *args, **kwargs)
         return self.task
@@ -283,6 +315,7 @@ class Agent:
     DATA_NAME_SUPERIOR = "_superior"
     DATA_NAME_SUBORDINATE = "_subordinate"
     DATA_NAME_CTX_WINDOW = "ctx_window"
+    DATA_NAME_CTX_WINDOW_PROMPT = "_ctx_window_prompt"
 
     def __init__(
         self, number: int, config: AgentConfig, context: AgentContext | None = None
@@ -471,19 +504,26 @@ class Agent:
             SystemMessage(content=system_text),
             *history_langchain,
         ]
-        full_text = ChatPromptTemplate.from_messages(full_prompt).format()
-
-        # store as last context window content
-        self.set_data(
-            Agent.DATA_NAME_CTX_WINDOW,
-            {
-                "text": full_text,
-                "tokens": tokens.approximate_tokens(full_text),
-            },
-        )
+
+        # store as last context window content, text and tokens are computed when requested
+        self.set_data(Agent.DATA_NAME_CTX_WINDOW_PROMPT, list(full_prompt))
+        self.data.pop(Agent.DATA_NAME_CTX_WINDOW, None)
 
         return full_prompt
 
+    def get_ctx_window(self) -> dict[str, Any] | None:
+        prompt = self.data.pop(Agent.DATA_NAME_CTX_WINDOW_PROMPT, None)
+        if prompt is not None:
+            full_text = ChatPromptTemplate.from_messages(prompt).format()
+            self.set_data(
+                Agent.DATA_NAME_CTX_WINDOW,
+                {
+                    "text": full_text,
+                    "tokens": tokens.approximate_tokens(full_text),
+                },
+            )
+        return self.get_data(Agent.DATA_NAME_CTX_WINDOW)
+
     def handle_critical_exception(self, exception: Exception):
         if isinstance(exception, HandledException):
             raise exception  # Re-raise the exception to kill the loop
@@ -818,7 +858,12 @@ class Agent:
         try:
             if len(stream) < 25:
                 return  # no reason to try
-            response = DirtyJson.parse_string(stream)
+            # parser keeps its state between chunks, only the new part of the stream is parsed
+            parser = self.loop_data.params_temporary.get("response_stream_parser")
+            if not parser:
+                parser = DirtyJsonStream()
+                self.loop_data.params_temporary["response_stream_parser"] = parser
+            response = parser.update(stream)
             if isinstance(response, dict):
                 await self.call_extensions(
                     "response_stream",
@@ -834,28 +879,10 @@ class Agent:
         self, name: str, method: str | None, args: dict, message: str, loop_data: LoopData | None, **kwargs
     ):
         from python.tools.unknown import Unknown
-        from python.helpers.tool import Tool
-
-        classes = []
+        from python.helpers import tool_registry
 
-        # try agent tools first
-        if self.config.profile:
-            try:
-                classes = extract_tools.load_classes_from_file(
-                    "agents/" + self.config.profile + "/tools/" + name + ".py", Tool  # type: ignore[arg-type]
-                )
-            except Exception:
-                pass
-
-        # try default tools
-        if not classes:
-            try:
-                classes = extract_tools.load_classes_from_file(
-                    "python/tools/" + name + ".py", Tool  # type: ignore[arg-type]
-                )
-            except Exception as e:
-                pass
-        tool_class = classes[0] if classes else Unknown
+        # agent profile tools first, then default tools, resolved from the cached registry
+        tool_class = tool_registry.get_tool_class(name, self.config.profile) or Unknown
         return tool_class(
             agent=self, name=name, method=method, args=args, message=message, loop_data=loop_data, **kwargs
         )
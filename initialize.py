@@ -136,6 +136,9 @@ def initialize_job_loop():
 
 def initialize_preload():
     import preload
+    from python.helpers import tool_registry
+    # index tool folders so the first tool call does not have to
+    tool_registry.preload(settings.get_settings()["agent_profile"])
     return defer.DeferredTask().start_task(preload.preload)
 
 
@@ -1,7 +1,10 @@
 from dataclasses import dataclass, field
 from enum import Enum
+import json
 import logging
 import os
+import threading
+import weakref
 from typing import (
     Any,
     Awaitable,
@@ -20,6 +23,8 @@ import litellm
 from python.helpers import dotenv
 from python.helpers import settings
 from python.helpers.dotenv import load_dotenv
+from python.helpers import embedding_service
+from python.helpers.embedding_service import EmbeddingService
 from python.helpers.providers import get_provider_config
 from python.helpers.rate_limiter import RateLimiter
 from python.helpers.tokens import approximate_tokens
@@ -535,10 +540,73 @@ class BrowserCompatibleChatWrapper(LiteLLMChatWrapper):
             yield chunk
 
 
-class LiteLLMEmbeddingWrapper(Embeddings):
+class BatchedEmbeddings(Embeddings):
+    """
+    Embeddings computed by a shared EmbeddingService on worker threads.
+    Wrappers created with the same settings share one backend (loaded model, batching service),
+    concurrent calls from all contexts are coalesced into batches, async callers never block the event loop.
+    """
+
     model_name: str
-    kwargs: dict = {}
     a0_model_conf: Optional[ModelConfig] = None
+    # worker threads calling the model at the same time
+    embedding_workers: int = 1
+    backend: embedding_service.EmbeddingBackend
+
+    def _acquire_backend(self, options: dict, load: Callable[[], tuple[Any, embedding_service.Embed]]):
+        conf = self.a0_model_conf
+        key = json.dumps(
+            [type(self).__name__, self.model_name, options, conf.limit_requests if conf else 0, conf.limit_input if conf else 0],
+            sort_keys=True,
+            default=str,
+        )
+
+        def load_backend():
+            model, embed = load()
+            return model, _rate_limited(conf, embed)
+
+        self.backend = embedding_service.acquire(key, self.model_name, load_backend, self.embedding_workers)
+        # the backend must not reference the wrapper, it is released once the wrapper is gone
+        weakref.finalize(self, embedding_service.release, self.backend)
+
+    @property
+    def service(self) -> EmbeddingService:
+        return self.backend.service
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.service.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.service.embed([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.service.aembed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.service.aembed([text]))[0]
+
+
+# the rate limiters use asyncio locks, worker threads with loops of their own take turns applying them
+_embedding_limiter_lock = threading.Lock()
+
+
+def _rate_limited(model_config: Optional[ModelConfig], embed: embedding_service.Embed) -> embedding_service.Embed:
+    def embed_batch(texts: List[str]) -> List[List[float]]:
+        # runs on a service worker thread, there is no event loop to nest into
+        if model_config:
+            import asyncio
+
+            with _embedding_limiter_lock:
+                asyncio.run(apply_rate_limiter(model_config, " ".join(texts)))
+        return embed(texts)
+
+    return embed_batch
+
+
+class LiteLLMEmbeddingWrapper(BatchedEmbeddings):
+    kwargs: dict = {}
+    # remote api, batches of different contexts can be in flight at once
+    embedding_workers = 4
 
     def __init__(
         self,
@@ -550,27 +618,19 @@ class LiteLLMEmbeddingWrapper(Embeddings):
         self.model_name = f"{provider}/{model}" if provider != "openai" else model
         self.kwargs = kwargs
         self.a0_model_conf = model_config
+        model_name = self.model_name
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, " ".join(texts))
-
-        resp = embedding(model=self.model_name, input=texts, **self.kwargs)
-        return [
-            item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
-            for item in resp.data  # type: ignore
-        ]
-
-    def embed_query(self, text: str) -> List[float]:
-        # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, text)
+        def embed(texts: List[str]) -> List[List[float]]:
+            resp = embedding(model=model_name, input=texts, **kwargs)
+            return [
+                item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
+                for item in resp.data  # type: ignore
+            ]
 
-        resp = embedding(model=self.model_name, input=[text], **self.kwargs)
-        item = resp.data[0]  # type: ignore
-        return item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
+        self._acquire_backend(kwargs, lambda: (None, embed))
 
 
-class LocalSentenceTransformerWrapper(Embeddings):
+class LocalSentenceTransformerWrapper(BatchedEmbeddings):
     """Local wrapper for sentence-transformers models to avoid HuggingFace API calls"""
 
     def __init__(
@@ -598,26 +658,21 @@ class LocalSentenceTransformerWrapper(Embeddings):
         }
         st_kwargs = {k: v for k, v in (kwargs or {}).items() if k in st_allowed_keys}
 
-        self.model = SentenceTransformer(model, **st_kwargs)
         self.model_name = model
         self.a0_model_conf = model_config
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, " ".join(texts))
+        def load():
+            # the weights are loaded once per process, one worker computes a whole batch at once
+            st_model = SentenceTransformer(model, **st_kwargs)
 
-        embeddings = self.model.encode(texts, convert_to_tensor=False)  # type: ignore
-        return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings  # type: ignore
+            def embed(texts: List[str]) -> List[List[float]]:
+                embeddings = st_model.encode(texts, convert_to_tensor=False)  # type: ignore
+                return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings  # type: ignore
 
-    def embed_query(self, text: str) -> List[float]:
-        # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, text)
+            return st_model, embed
 
-        embedding = self.model.encode([text], convert_to_tensor=False)  # type: ignore
-        result = (
-            embedding[0].tolist() if hasattr(embedding[0], "tolist") else embedding[0]
-        )
-        return result  # type: ignore
+        self._acquire_backend(st_kwargs, load)
+        self.model = self.backend.model
 
 
 def _get_litellm_chat(
@@ -787,7 +842,12 @@ def get_browser_model(
 
 def get_embedding_model(
     provider: str, name: str, model_config: Optional[ModelConfig] = None, **kwargs: Any
-) -> LiteLLMEmbeddingWrapper | LocalSentenceTransformerWrapper:
+) -> BatchedEmbeddings:
     orig = provider.lower()
     provider_name, kwargs = _merge_provider_defaults("embedding", orig, kwargs)
     return _get_litellm_embedding(name, provider_name, model_config, **kwargs)
+
+
+def unload_embedding_models():
+    # the settings switched the embedding model, loaded weights are freed once no wrapper uses them
+    embedding_service.unload()
@@ -1,6 +1,7 @@
 from python.helpers.api import ApiHandler, Request, Response, send_file
 from python.helpers.backup import BackupService
 from python.helpers.persist_chat import save_tmp_chats
+from python.helpers.persistence import PersistenceService
 
 
 class BackupCreate(ApiHandler):
@@ -31,8 +32,9 @@ class BackupCreate(ApiHandler):
                     else:
                         include_patterns.append(line)
 
-            # Save all chats to the chats folder
+            # Save all chats to the chats folder and wait for pending writes
             save_tmp_chats()
+            PersistenceService.get().flush()
 
             # Create backup service and generate backup
             backup_service = BackupService()
@@ -0,0 +1,14 @@
+from python.helpers.api import ApiHandler, Request, Response
+from python.helpers import embedding_cache, embedding_service
+from python.helpers.embedding_service import EmbeddingService
+
+
+class EmbeddingStats(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        # queue length, batch size histogram and timings of every embedding model in use,
+        # loaded backends with the number of wrappers using them, hit ratios of the embedding caches
+        return {
+            "models": EmbeddingService.get_all_stats(),
+            "backends": embedding_service.get_backends(),
+            "caches": embedding_cache.get_all_stats(),
+        }
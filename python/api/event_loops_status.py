@@ -0,0 +1,14 @@
+from python.helpers.api import ApiHandler, Request, Response
+
+from agent import AgentContext
+
+
+class EventLoopsStatus(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        # loops with the number of contexts pinned to them and their current lag
+        loops = AgentContext.get_loops_stats()
+        contexts = {
+            ctx.id: AgentContext._loops.get_assignment(ctx.id)
+            for ctx in AgentContext.all()
+        }
+        return {"loops": loops, "contexts": contexts}
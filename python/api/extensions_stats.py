@@ -0,0 +1,10 @@
+from python.helpers.api import ApiHandler, Request, Response
+from python.helpers import extension
+
+
+class ExtensionsStats(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        # call counts and cumulative time per extension point, slowest first
+        if input.get("reset"):
+            extension.reset_stats()
+        return {"extension_points": extension.get_stats()}
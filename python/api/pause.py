@@ -1,4 +1,5 @@
 from python.helpers.api import ApiHandler, Request, Response
+from python.helpers import push
 
 
 class Pause(ApiHandler):
@@ -11,6 +12,8 @@ class Pause(ApiHandler):
             context = self.get_context(ctxid)
 
             context.paused = paused
+            push.publish(context.log)
+            push.publish(push.CONTEXTS)
 
             return {
                 "message": "Agent paused." if paused else "Agent unpaused.",
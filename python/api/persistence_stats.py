@@ -0,0 +1,11 @@
+from python.helpers.api import ApiHandler, Request, Response
+from python.helpers.persistence import PersistenceService
+
+
+class PersistenceStats(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        # queue depth, coalesced marks, bytes written and write latency of the persistence thread
+        service = PersistenceService.get()
+        if input.get("flush"):
+            service.flush()
+        return service.get_stats()
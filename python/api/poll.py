@@ -2,7 +2,8 @@ from python.helpers.api import ApiHandler, Request, Response
 
 from agent import AgentContext, AgentContextType
 
-from python.helpers.task_scheduler import TaskScheduler
+from python.helpers.task_scheduler import TaskScheduler, serialize_task
+from python.helpers import push
 from python.helpers.localization import Localization
 from python.helpers.dotenv import get_dotenv_value
 
@@ -13,6 +14,7 @@ class Poll(ApiHandler):
         ctxid = input.get("context", "")
         from_no = input.get("log_from", 0)
         notifications_from = input.get("notifications_from", 0)
+        lists_version = input.get("lists_version", 0)
 
         # Get timezone from input (default to dotenv default or UTC if not provided)
         timezone = input.get("timezone", get_dotenv_value("DEFAULT_USER_TIMEZONE", "UTC"))
@@ -21,16 +23,60 @@ class Poll(ApiHandler):
         # context instance - get or create
         context = self.get_context(ctxid)
 
-        logs = context.log.output(start=from_no)
+        return self.get_updates(context, from_no, notifications_from, lists_version=lists_version)
+
+    @classmethod
+    def get_updates(
+        cls, context: AgentContext, log_from: int, notifications_from: int, lists: bool = True, lists_version: int = 0
+    ) -> dict:
+        # items updated after this version are sent next time
+        log_version = context.log.version
+        logs = context.log.output(start=log_from, end=log_version)
 
         # Get notifications from global notification manager
         notification_manager = AgentContext.get_notification_manager()
         notifications = notification_manager.output(start=notifications_from)
 
+        # data from this server
+        updates = {
+            "context": context.id,
+            "logs": logs,
+            "log_guid": context.log.guid,
+            "log_version": log_version,
+            "log_progress": context.log.progress,
+            "log_progress_active": context.log.progress_active,
+            "paused": context.paused,
+            "notifications": notifications,
+            "notifications_guid": notification_manager.guid,
+            "notifications_version": len(notification_manager.updates),
+        }
+        if lists:
+            # the client already has the current lists, contexts and tasks are left out
+            version = push.get_version(push.CONTEXTS, push.TASKS)
+            updates["lists_version"] = version
+            if version == lists_version:
+                updates["lists_unchanged"] = True
+            else:
+                updates["contexts"], updates["tasks"] = cls.get_lists()
+        return updates
+
+    @staticmethod
+    def get_lists() -> tuple[list[dict], list[dict]]:
+        global _lists, _summaries
+
+        # rebuilt only after a change was published, summaries of unchanged contexts are reused
+        version = push.get_version(push.CONTEXTS, push.TASKS)
+        timezone = Localization.get().get_timezone()
+        if _lists and _lists[0] == (version, timezone):
+            return _lists[1], _lists[2]
+
         # loop AgentContext._contexts
 
         # Get a task scheduler instance
         scheduler = TaskScheduler.get()
+        scheduled = {task.uuid: task for task in scheduler.get_tasks()}
+        tasks_version = push.get_version(push.TASKS)
+        summaries: dict[str, tuple[tuple, dict]] = {}
 
         # Always reload the scheduler on each poll to ensure we have the latest task state
         # await scheduler.reload() # does not seem to be needed
@@ -53,20 +99,30 @@ class Poll(ApiHandler):
                 processed_contexts.add(ctx.id)
                 continue
 
-            # Create the base context data that will be returned
-            context_data = ctx.serialize()
-
-            context_task = scheduler.get_task_by_uuid(ctx.id)
+            context_task = scheduled.get(ctx.id)
             # Determine if this is a task-dedicated context by checking if a task with this UUID exists
             is_task_context = (
                 context_task is not None and context_task.context_id == ctx.id
             )
 
+            # reuse the summary while nothing it shows has changed
+            stamp = (_get_summary_stamp(ctx), timezone, tasks_version if is_task_context else None)
+            cached = _summaries.get(ctx.id)
+            if cached and cached[0] == stamp:
+                summaries[ctx.id] = cached
+                (tasks if is_task_context else ctxs).append(cached[1])
+                processed_contexts.add(ctx.id)
+                continue
+
+            # Create the base context data that will be returned
+            context_data = ctx.serialize()
+            summaries[ctx.id] = (stamp, context_data)
+
             if not is_task_context:
                 ctxs.append(context_data)
             else:
                 # If this is a task, get task details from the scheduler
-                task_details = scheduler.serialize_task(ctx.id)
+                task_details = serialize_task(context_task) if context_task else None
                 if task_details:
                     # Add task details to context_data with the same field names
                     # as used in scheduler endpoints to maintain UI compatibility
@@ -100,18 +156,27 @@ class Poll(ApiHandler):
         ctxs.sort(key=lambda x: x["created_at"], reverse=True)
         tasks.sort(key=lambda x: x["created_at"], reverse=True)
 
-        # data from this server
-        return {
-            "context": context.id,
-            "contexts": ctxs,
-            "tasks": tasks,
-            "logs": logs,
-            "log_guid": context.log.guid,
-            "log_version": len(context.log.updates),
-            "log_progress": context.log.progress,
-            "log_progress_active": context.log.progress_active,
-            "paused": context.paused,
-            "notifications": notifications,
-            "notifications_guid": notification_manager.guid,
-            "notifications_version": len(notification_manager.updates),
-        }
+        _summaries = summaries
+        _lists = ((version, timezone), ctxs, tasks)
+        return ctxs, tasks
+
+
+def _get_summary_stamp(ctx: AgentContext) -> tuple:
+    # everything AgentContext.serialize shows
+    log = ctx.log
+    return (
+        ctx.name,
+        ctx.last_message,
+        ctx.paused,
+        ctx.type,
+        log.guid,
+        log.version,
+        len(log.logs),
+        AgentContext._loops.get_assignment(ctx.id),
+    )
+
+
+# last built lists ((version, timezone), contexts, tasks) and context summaries by id
+_lists: tuple[tuple[int, str], list[dict], list[dict]] | None = None
+_summaries: dict[str, tuple[tuple, dict]] = {}
+
@@ -0,0 +1,83 @@
+import json
+import time
+
+from python.helpers.api import Request, Response
+from python.helpers import push
+from python.helpers.localization import Localization
+from python.helpers.dotenv import get_dotenv_value
+from python.api.poll import Poll
+from agent import AgentContext
+
+# pause between two pushes, updates arriving meanwhile go out together
+PUSH_INTERVAL = 0.05
+# the chat and task lists are rebuilt at most this often
+LISTS_INTERVAL = 1.0
+# comment sent on an idle stream, detects clients that went away
+KEEPALIVE_INTERVAL = 15.0
+# every stream holds a server thread, clients over the limit keep polling
+MAX_STREAMS = 50
+
+
+class PollStream(Poll):
+    """
+    Server-sent events with the payload of /poll, pushed only when the log, notifications or the chat list change.
+    A slow client does not queue anything, changes are coalesced and the next push carries the current state.
+    """
+
+    @classmethod
+    def get_methods(cls) -> list[str]:
+        return ["GET"]
+
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        if push.get_subscription_count() >= MAX_STREAMS:
+            return Response("Too many streams, use /poll", 503)
+
+        args = request.args
+        ctxid = args.get("context", "")
+        log_from = args.get("log_from", 0, type=int)
+        log_guid = args.get("log_guid", "")
+        notifications_from = args.get("notifications_from", 0, type=int)
+
+        timezone = args.get("timezone", get_dotenv_value("DEFAULT_USER_TIMEZONE", "UTC"))
+        Localization.get().set_timezone(timezone)
+
+        context = self.get_context(ctxid)
+        return Response(
+            self._stream(context, log_guid, log_from, notifications_from),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def _stream(self, context: AgentContext, log_guid: str, log_from: int, notifications_from: int):
+        notification_manager = AgentContext.get_notification_manager()
+        subscription = push.subscribe(context.log, notification_manager, push.CONTEXTS)
+        try:
+            pending = {context.log, notification_manager, push.CONTEXTS}
+            lists_sent = 0.0
+            while True:
+                lists = push.CONTEXTS in pending and time.monotonic() - lists_sent >= LISTS_INTERVAL
+                if lists or pending - {push.CONTEXTS}:
+                    # the log was reset or the client has none yet, send it from the start
+                    reset = context.log.guid != log_guid
+                    updates = self.get_updates(context, 0 if reset else log_from, notifications_from, lists=lists)
+                    updates["log_reset"] = reset
+                    yield f"data: {json.dumps(updates)}\n\n"
+
+                    log_guid, log_from = updates["log_guid"], updates["log_version"]
+                    notifications_from = updates["notifications_version"]
+                    if lists:
+                        lists_sent = time.monotonic()
+                    # lists held back by the interval stay pending
+                    pending = pending & {push.CONTEXTS} if not lists else set()
+                    time.sleep(PUSH_INTERVAL)
+
+                if push.CONTEXTS in pending:
+                    timeout = max(0.0, lists_sent + LISTS_INTERVAL - time.monotonic())
+                else:
+                    timeout = KEEPALIVE_INTERVAL
+                new = subscription.wait(timeout)
+                if not new and not pending:
+                    yield ": keepalive\n\n"
+                pending |= new
+        finally:
+            push.unsubscribe(subscription)
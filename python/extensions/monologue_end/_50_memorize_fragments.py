@@ -92,6 +92,7 @@ class MemorizeMemories(Extension):
         total_processed = 0
         total_consolidated = 0
         rem = []
+        texts: list[str] = []
 
         for memory in memories:
             # Convert memory to plain text
@@ -162,29 +163,30 @@ class MemorizeMemories(Extension):
                 )
 
             else:
-
-                # remove previous fragments too similiar to this one
-                if set["memory_memorize_replace_threshold"] > 0:
-                    rem += await db.delete_documents_by_query(
-                        query=txt,
-                        threshold=set["memory_memorize_replace_threshold"],
-                        filter=f"area=='{Memory.Area.FRAGMENTS.value}'",
-                    )
-                    if rem:
-                        rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
-                        log_item.update(replaced=rem_txt)
-
-                # insert new memory
-                await db.insert_text(text=txt, metadata={"area": Memory.Area.FRAGMENTS.value})
-
-                log_item.update(
-                    result=f"{len(memories)} entries memorized.",
-                    heading=f"{len(memories)} entries memorized.",
+                # collected, inserted together below
+                texts.append(txt)
+
+        if texts:
+            # remove previous fragments too similiar to the new ones
+            if set["memory_memorize_replace_threshold"] > 0:
+                rem = await db.delete_documents_by_queries(
+                    queries=texts,
+                    threshold=set["memory_memorize_replace_threshold"],
+                    filter=f"area=='{Memory.Area.FRAGMENTS.value}'",
                 )
                 if rem:
-                    log_item.stream(result=f"\nReplaced {len(rem)} previous memories.")
-            
-
+                    rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
+                    log_item.update(replaced=rem_txt)
+
+            # insert new memories, embedded in one batch and saved once
+            await db.insert_texts(texts, metadata={"area": Memory.Area.FRAGMENTS.value})
+
+            log_item.update(
+                result=f"{len(memories)} entries memorized.",
+                heading=f"{len(memories)} entries memorized.",
+            )
+            if rem:
+                log_item.stream(result=f"\nReplaced {len(rem)} previous memories.")
 
 
     # except Exception as e:
@@ -94,6 +94,7 @@ class MemorizeSolutions(Extension):
         total_processed = 0
         total_consolidated = 0
         rem = []
+        texts: list[str] = []
 
         for solution in solutions:
             # Convert solution to structured text
@@ -168,26 +169,30 @@ class MemorizeSolutions(Extension):
                     update_progress="none"
                 )
             else:
-                # remove previous solutions too similiar to this one
-                if set["memory_memorize_replace_threshold"] > 0:
-                    rem += await db.delete_documents_by_query(
-                        query=txt,
-                        threshold=set["memory_memorize_replace_threshold"],
-                        filter=f"area=='{Memory.Area.SOLUTIONS.value}'",
-                    )
-                    if rem:
-                        rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
-                        log_item.update(replaced=rem_txt)
-
-                # insert new solution
-                await db.insert_text(text=txt, metadata={"area": Memory.Area.SOLUTIONS.value})
-
-                log_item.update(
-                    result=f"{len(solutions)} solutions memorized.",
-                    heading=f"{len(solutions)} solutions memorized.",
+                # collected, inserted together below
+                texts.append(txt)
+
+        if texts:
+            # remove previous solutions too similiar to the new ones
+            if set["memory_memorize_replace_threshold"] > 0:
+                rem = await db.delete_documents_by_queries(
+                    queries=texts,
+                    threshold=set["memory_memorize_replace_threshold"],
+                    filter=f"area=='{Memory.Area.SOLUTIONS.value}'",
                 )
                 if rem:
-                    log_item.stream(result=f"\nReplaced {len(rem)} previous solutions.")
+                    rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
+                    log_item.update(replaced=rem_txt)
+
+            # insert new solutions, embedded in one batch and saved once
+            await db.insert_texts(texts, metadata={"area": Memory.Area.SOLUTIONS.value})
+
+            log_item.update(
+                result=f"{len(solutions)} solutions memorized.",
+                heading=f"{len(solutions)} solutions memorized.",
+            )
+            if rem:
+                log_item.stream(result=f"\nReplaced {len(rem)} previous solutions.")
 
 
     # except Exception as e:
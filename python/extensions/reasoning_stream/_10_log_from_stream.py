@@ -8,6 +8,7 @@ import math
 from python.extensions.before_main_llm_call._10_log_for_stream import build_heading, build_default_heading
 
 class LogFromStream(Extension):
+    singleton = True
 
     async def execute(self, loop_data: LoopData = LoopData(), text: str = "", **kwargs):
 
@@ -26,4 +27,4 @@ class LogFromStream(Extension):
 
         # update log message
         log_item = loop_data.params_temporary["log_item_generating"]
-        log_item.update(heading=heading, reasoning=text)
+        log_item.update_stream(heading=heading, reasoning=text)
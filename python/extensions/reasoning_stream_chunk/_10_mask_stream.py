@@ -2,6 +2,8 @@ from python.helpers.extension import Extension
 
 
 class MaskReasoningStreamChunk(Extension):
+    singleton = True
+
     async def execute(self, **kwargs):
         # Get stream data and agent from kwargs
         stream_data = kwargs.get("stream_data")
@@ -16,8 +18,11 @@ class MaskReasoningStreamChunk(Extension):
             # Initialize filter if not exists
             filter_key = "_reason_stream_filter"
             filter_instance = agent.get_data(filter_key)
-            if not filter_instance:
+            previous = len(stream_data["full"]) - len(stream_data["chunk"])
+            if not filter_instance or filter_instance.raw_length != previous:
+                # new stream, or a filter left over from an interrupted one
                 filter_instance = secrets_mgr.create_streaming_filter()
+                filter_instance.process_chunk(stream_data["full"][:previous])
                 agent.set_data(filter_key, filter_instance)
 
             # Process the chunk through the streaming filter
@@ -26,8 +31,8 @@ class MaskReasoningStreamChunk(Extension):
             # Update the stream data with processed chunk
             stream_data["chunk"] = processed_chunk
 
-            # Also mask the full text for consistency
-            stream_data["full"] = secrets_mgr.mask_values(stream_data["full"])
+            # Also mask the full text for consistency, reusing what the filter already masked
+            stream_data["full"] = filter_instance.masked_text()
 
             # Print the processed chunk (this is where printing should happen)
             if processed_chunk:
@@ -9,6 +9,7 @@ from python.extensions.before_main_llm_call._10_log_for_stream import build_head
 
 
 class LogFromStream(Extension):
+    singleton = True
 
     async def execute(
         self,
@@ -18,6 +19,7 @@ class LogFromStream(Extension):
         **kwargs,
     ):
 
+        # parsed is the partial snapshot of the response streamed so far
         heading = build_default_heading(self.agent)
         if "headline" in parsed:
             heading = build_heading(self.agent, parsed['headline'])
@@ -48,4 +50,4 @@ class LogFromStream(Extension):
         kvps.update(parsed)
 
         # update the log item
-        log_item.update(heading=heading, content=text, kvps=kvps)
\ No newline at end of file
+        log_item.update_stream(heading=heading, content=text, kvps=kvps)
\ No newline at end of file
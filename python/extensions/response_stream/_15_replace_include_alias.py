@@ -4,6 +4,8 @@ from python.helpers.strings import replace_file_includes
 
 
 class ReplaceIncludeAlias(Extension):
+    singleton = True
+
     async def execute(
         self,
         loop_data=None,
@@ -14,6 +16,10 @@ class ReplaceIncludeAlias(Extension):
         if not parsed or not isinstance(parsed, dict):
             return
 
+        # parsed is a fresh partial snapshot for every chunk, skip the walk when there is nothing to replace
+        if "§§include(" not in text:
+            return
+
         def replace_placeholders(value: Any) -> Any:
             if isinstance(value, str):
                 new_val = value
@@ -1,25 +1,75 @@
+import os
 from typing import Any
+from python.helpers import files
 from python.helpers.extension import Extension
 from python.helpers.mcp_handler import MCPConfig
 from agent import Agent, LoopData
-from python.helpers.settings import get_settings
+from python.helpers.settings import get_settings, get_settings_version
 
 
 class SystemPrompt(Extension):
 
     async def execute(self, system_prompt: list[str] = [], loop_data: LoopData = LoopData(), **kwargs: Any):
-        # append main system prompt and tools
-        main = get_main_prompt(self.agent)
-        tools = get_tools_prompt(self.agent)
-        mcp_tools = get_mcp_tools_prompt(self.agent)
-        secrets_prompt = get_secrets_prompt(self.agent)
-
-        system_prompt.append(main)
-        system_prompt.append(tools)
+        # the static prompt parts are rebuilt only when their inputs change,
+        # this keeps the prompt prefix byte-identical between iterations for provider prefix caching
+        fingerprint = get_fingerprint(self.agent)
+        cached = self.agent.get_data(DATA_NAME_CACHE)
+        if cached and cached[0] == fingerprint and not files.prompt_files_changed(cached[1]):
+            system_prompt.extend(cached[2])
+            return
+
+        # the prompt files read are tracked with their mtimes, an in-place edit of any of them rebuilds the parts
+        with files.track_prompt_files() as prompt_files:
+            # append main system prompt and tools
+            main = get_main_prompt(self.agent)
+            tools = get_tools_prompt(self.agent)
+            mcp_tools = get_mcp_tools_prompt(self.agent)
+            secrets_prompt = get_secrets_prompt(self.agent)
+
+        parts = [main, tools]
         if mcp_tools:
-            system_prompt.append(mcp_tools)
+            parts.append(mcp_tools)
         if secrets_prompt:
-            system_prompt.append(secrets_prompt)
+            parts.append(secrets_prompt)
+
+        self.agent.set_data(DATA_NAME_CACHE, (fingerprint, prompt_files, parts))
+        system_prompt.extend(parts)
+
+
+DATA_NAME_CACHE = "_system_prompt_cache"
+
+
+def get_fingerprint(agent: Agent) -> tuple:
+    from python.helpers.secrets import SecretsManager
+
+    mcp_config = MCPConfig.get_instance()
+    if mcp_config.servers:
+        MCPConfig.wait_for_lock()  # MCP might be initializing, wait for it like get_tools_prompt does
+    try:
+        secrets_version = SecretsManager.get_instance().get_version()
+    except Exception:
+        secrets_version = -1
+    return (
+        agent.config.profile,
+        agent.config.chat_model.vision,
+        get_prompts_stamp(agent),
+        MCPConfig.get_tools_version(),
+        secrets_version,
+        get_settings_version(),
+    )
+
+
+def get_prompts_stamp(agent: Agent) -> tuple[int, ...]:
+    # prompt files and their folders are tracked when read,
+    # the agents folder is not read by a prompt, subordinate profiles come and go with it
+    return (get_mtime(files.get_abs_path("agents")),)
+
+
+def get_mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
 
 
 def get_main_prompt(agent: Agent):
@@ -2,14 +2,27 @@ from datetime import datetime
 from python.helpers.extension import Extension
 from agent import Agent, LoopData
 from python.helpers import files, memory
+from python.extensions.system_prompt._10_system_prompt import get_prompts_stamp, get_mtime
 
 
 class BehaviourPrompt(Extension):
 
     async def execute(self, system_prompt: list[str]=[], loop_data: LoopData = LoopData(), **kwargs):
-        prompt = read_rules(self.agent)
+        # rules are only re-read when the rules file or the prompt files read for them change
+        rules_file = get_custom_rules_file(self.agent)
+        fingerprint = (self.agent.config.profile, rules_file, get_mtime(rules_file), get_prompts_stamp(self.agent))
+        cached = self.agent.get_data(DATA_NAME_CACHE)
+        if cached and cached[0] == fingerprint and not files.prompt_files_changed(cached[1]):
+            prompt = cached[2]
+        else:
+            with files.track_prompt_files() as prompt_files:
+                prompt = read_rules(self.agent)
+            self.agent.set_data(DATA_NAME_CACHE, (fingerprint, prompt_files, prompt))
         system_prompt.insert(0, prompt) #.append(prompt)
 
+
+DATA_NAME_CACHE = "_behaviour_prompt_cache"
+
 def get_custom_rules_file(agent: Agent):
     return memory.get_memory_subdir_abs(agent) + f"/behaviour.md"
 
@@ -21,4 +34,3 @@ def read_rules(agent: Agent):
     else:
         rules = agent.read_prompt("agent.system.behaviour_default.md")
         return agent.read_prompt("agent.system.behaviour.md", rules=rules)
-  
\ No newline at end of file
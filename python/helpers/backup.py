@@ -76,6 +76,7 @@ class BackupService:
 {agent_root}/.env
 {agent_root}/tmp/settings.json
 {agent_root}/tmp/chats/**
+{agent_root}/tmp/blobs/**
 {agent_root}/tmp/scheduler/**
 {agent_root}/tmp/uploads/**"""
 
@@ -0,0 +1,185 @@
+import base64
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Iterable
+
+from python.helpers import files
+
+# content addressed store for images and other large payloads, history keeps only references
+BLOBS_FOLDER = "tmp/blobs"
+# reference format mirrors data urls: blob:<mime>;sha256,<key>
+REF_PREFIX = "blob:"
+# recently inlined blobs kept as base64 so every llm call does not re-read them
+INLINE_CACHE_SIZE = 32 * 1024 * 1024
+
+_DATA_URL = re.compile(r"data:([\w/+.-]+);base64,([A-Za-z0-9+/=\s]+)", re.S)
+_REF = re.compile(r"blob:([\w/+.-]+);sha256,([0-9a-f]{64})")
+
+
+def put(data: bytes, owner: str | None = None) -> str:
+    """Store data and return its sha256 key, identical data is stored once."""
+    key = hashlib.sha256(data).hexdigest()
+    path = get_path(key)
+    # under the lock, an unreferenced blob must not be collected between the check and the new reference
+    with _lock:
+        if not os.path.exists(path):
+            files.write_file_atomic(path, data)
+        if owner:
+            add_refs(owner, [key])
+    return key
+
+
+def get(key: str) -> bytes:
+    with open(get_path(key), "rb") as f:
+        return f.read()
+
+
+def get_base64(key: str) -> str:
+    with _lock:
+        cached = _inline_cache.get(key)
+        if cached is not None:
+            _inline_cache.move_to_end(key)
+            return cached
+    encoded = base64.b64encode(get(key)).decode("utf-8")
+    with _lock:
+        global _inline_cache_size
+        _inline_cache[key] = encoded
+        _inline_cache_size += len(encoded)
+        while _inline_cache_size > INLINE_CACHE_SIZE and len(_inline_cache) > 1:
+            _, dropped = _inline_cache.popitem(last=False)
+            _inline_cache_size -= len(dropped)
+    return encoded
+
+
+def exists(key: str) -> bool:
+    return os.path.exists(get_path(key))
+
+
+def get_path(key: str) -> str:
+    return files.get_abs_path(BLOBS_FOLDER, key[:2], key)
+
+
+def to_ref(key: str, mime: str) -> str:
+    return f"{REF_PREFIX}{mime};sha256,{key}"
+
+
+def parse_ref(ref: str) -> tuple[str, str] | None:
+    """Return (mime, key) of a blob reference or None."""
+    match = _REF.fullmatch(ref)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def find_refs(text: str) -> set[str]:
+    """Keys of all blob references in a (serialized) text."""
+    if REF_PREFIX not in text:
+        return set()
+    return {match.group(2) for match in _REF.finditer(text)}
+
+
+def store_data_urls(content: Any, owner: str | None = None) -> Any:
+    """Copy of message content with base64 data urls moved to the store and replaced by references."""
+    if isinstance(content, str):
+        match = _DATA_URL.fullmatch(content) if content.startswith("data:") else None
+        if not match:
+            return content
+        key = put(base64.b64decode(match.group(2)), owner)
+        return to_ref(key, match.group(1))
+    if isinstance(content, list):
+        return [store_data_urls(item, owner) for item in content]
+    if isinstance(content, Mapping):
+        return {k: store_data_urls(v, owner) for k, v in content.items()}
+    return content
+
+
+def inline_refs(content: Any) -> Any:
+    """Copy of message content with blob references replaced by data urls, for the llm request."""
+    if isinstance(content, str):
+        parsed = parse_ref(content) if content.startswith(REF_PREFIX) else None
+        if not parsed or not exists(parsed[1]):
+            return content
+        return f"data:{parsed[0]};base64,{get_base64(parsed[1])}"
+    if isinstance(content, list):
+        return [inline_refs(item) for item in content]
+    if isinstance(content, Mapping):
+        image = content.get("image_url")
+        url = image.get("url") if isinstance(image, Mapping) else None
+        if isinstance(url, str) and (parsed := parse_ref(url)) and not exists(parsed[1]):
+            # the blob was collected or the chat was imported from elsewhere
+            return {"type": "text", "text": "Image no longer available"}
+        return {k: inline_refs(v) for k, v in content.items()}
+    return content
+
+
+def add_refs(owner: str, keys: Iterable[str]):
+    with _lock:
+        for key in keys:
+            _refs.setdefault(key, set()).add(owner)
+
+
+def release(owner: str) -> int:
+    """Drop all references of an owner (a removed chat), deletes blobs nobody references anymore."""
+    with _lock:
+        orphans = []
+        for key, owners in list(_refs.items()):
+            owners.discard(owner)
+            if not owners:
+                del _refs[key]
+                orphans.append(key)
+    return _delete(orphans)
+
+
+def collect_garbage() -> int:
+    """Delete stored blobs without references, references are rebuilt from the chats when they are loaded."""
+    folder = files.get_abs_path(BLOBS_FOLDER)
+    if not os.path.isdir(folder):
+        return 0
+    with _lock:
+        orphans = [
+            name
+            for sub in os.listdir(folder)
+            if os.path.isdir(os.path.join(folder, sub))
+            for name in os.listdir(os.path.join(folder, sub))
+            if name not in _refs
+        ]
+    return _delete(orphans)
+
+
+def get_stats() -> dict[str, int]:
+    with _lock:
+        return {
+            "referenced": len(_refs),
+            "inline_cache_entries": len(_inline_cache),
+            "inline_cache_size": _inline_cache_size,
+        }
+
+
+def _delete(keys: list[str]) -> int:
+    deleted = 0
+    for key in keys:
+        with _lock:
+            if key in _refs:
+                continue  # referenced again in the meantime
+            _drop_inline(key)
+            try:
+                os.remove(get_path(key))
+                deleted += 1
+            except FileNotFoundError:
+                pass
+    return deleted
+
+
+def _drop_inline(key: str):
+    global _inline_cache_size
+    dropped = _inline_cache.pop(key, None)
+    if dropped is not None:
+        _inline_cache_size -= len(dropped)
+
+
+_refs: dict[str, set[str]] = {}
+_inline_cache: "OrderedDict[str, str]" = OrderedDict()
+_inline_cache_size = 0
+_lock = threading.RLock()
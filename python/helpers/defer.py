@@ -1,6 +1,9 @@
 import asyncio
+from collections import Counter
 from dataclasses import dataclass
 import threading
+import time
+import zlib
 from concurrent.futures import Future
 from typing import Any, Callable, Optional, Coroutine, TypeVar, Awaitable
 
@@ -10,6 +13,8 @@ class EventLoopThread:
     _instances = {}
     _lock = threading.Lock()
 
+    LAG_INTERVAL = 0.5  # seconds between event loop lag measurements
+
     def __init__(self, thread_name: str = "Background") -> None:
         """Initialize the event loop thread."""
         self.thread_name = thread_name
@@ -25,23 +30,48 @@ class EventLoopThread:
     def _start(self):
         if not hasattr(self, "loop") or not self.loop:
             self.loop = asyncio.new_event_loop()
+            self.lag = 0.0
+            self.max_lag = 0.0
         if not hasattr(self, "thread") or not self.thread:
             self.thread = threading.Thread(
-                target=self._run_event_loop, daemon=True, name=self.thread_name
+                target=self._run_event_loop, args=(self.loop,), daemon=True, name=self.thread_name
             )
             self.thread.start()
-
-    def _run_event_loop(self):
-        if not self.loop:
-            raise RuntimeError("Event loop is not initialized")
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_forever()
+            asyncio.run_coroutine_threadsafe(self._monitor_lag(), self.loop)
+
+    async def _monitor_lag(self):
+        # a blocked loop wakes up late, the delay is the lag every task on this loop suffers
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.LAG_INTERVAL)
+            self.lag = max(0.0, time.monotonic() - start - self.LAG_INTERVAL)
+            self.max_lag = max(self.max_lag, self.lag)
+
+    def _run_event_loop(self, loop: asyncio.AbstractEventLoop):
+        # the loop is passed in, self.loop may already be cleared by terminate or remove
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            # stopped, cancel what is left on it (the lag monitor at least) and close it
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
 
     def terminate(self):
-        if self.loop and self.loop.is_running():
-            self.loop.stop()
+        self._stop()
+
+    def _stop(self):
+        loop = self.loop
         self.loop = None
         self.thread = None
+        if loop and not loop.is_closed():
+            # threadsafe, also stops a loop whose thread has not started running it yet
+            loop.call_soon_threadsafe(loop.stop)
 
     def run_coroutine(self, coro):
         self._start()
@@ -49,6 +79,88 @@ class EventLoopThread:
             raise RuntimeError("Event loop is not initialized")
         return asyncio.run_coroutine_threadsafe(coro, self.loop)
 
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "name": self.thread_name,
+            "running": bool(self.loop and self.loop.is_running()),
+            "lag": round(getattr(self, "lag", 0.0), 4),
+            "max_lag": round(getattr(self, "max_lag", 0.0), 4),
+        }
+
+    @classmethod
+    def get(cls, thread_name: str) -> "EventLoopThread | None":
+        return cls._instances.get(thread_name)
+
+    @classmethod
+    def remove(cls, thread_name: str) -> None:
+        """Stop the loop thread and forget it, a new one is created when the name is used again."""
+        with cls._lock:
+            instance = cls._instances.pop(thread_name, None)
+        if instance:
+            instance._stop()
+
+
+class EventLoopPool:
+    """Pins keys (e.g. agent context ids) to named event loop threads.
+
+    Modes:
+    - "shared": all keys run on a single loop named after the pool (or the given shared_name)
+    - "pool": keys are spread over a fixed number of loops, by "hash" of the key or "least_load"
+    - "per_key": every key gets its own loop, stopped when the key is released
+
+    A key keeps its loop until released, so state owned by the key stays single-threaded.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._assigned: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def assign(
+        self,
+        key: str,
+        mode: str = "shared",
+        size: int = 1,
+        strategy: str = "least_load",
+        shared_name: str | None = None,
+    ) -> str:
+        with self._lock:
+            if key in self._assigned:
+                return self._assigned[key]
+            if mode == "per_key":
+                thread_name = f"{self.name}-{key}"
+            elif mode == "pool":
+                names = [f"{self.name}-{i}" for i in range(max(1, size))]
+                if strategy == "hash":
+                    thread_name = names[zlib.crc32(key.encode()) % len(names)]
+                else:
+                    load = Counter(self._assigned.values())
+                    thread_name = min(names, key=lambda name: load[name])
+            else:
+                thread_name = shared_name or self.name
+            self._assigned[key] = thread_name
+            return thread_name
+
+    def get_assignment(self, key: str) -> str | None:
+        return self._assigned.get(key)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            thread_name = self._assigned.pop(key, None)
+            dedicated = thread_name == f"{self.name}-{key}"
+        if thread_name and dedicated:
+            EventLoopThread.remove(thread_name)
+
+    def get_stats(self) -> list[dict[str, Any]]:
+        load = Counter(self._assigned.values())
+        stats = []
+        for thread_name in sorted(load):
+            loop = EventLoopThread.get(thread_name)
+            data = loop.get_stats() if loop else {"name": thread_name, "running": False}
+            data["keys"] = load[thread_name]
+            stats.append(data)
+        return stats
+
 
 @dataclass
 class ChildTask:
@@ -1,4 +1,6 @@
 import json
+import re
+from typing import Any
 
 def try_parse(json_string: str):
     try:
@@ -52,10 +54,11 @@ class DirtyJson:
         return self.result
 
     def feed(self, chunk):
+        # streamed input is handled by the resumable parser, see DirtyJsonStream
+        if not hasattr(self, "_stream"):
+            self._stream = DirtyJsonStream()
         self.json_string += chunk
-        if not self.current_char and self.json_string:
-            self.current_char = self.json_string[0]
-        self._parse()
+        self.result = self._stream.feed(chunk)
         return self.result
 
     def _advance(self, count=1):
@@ -333,3 +336,382 @@ class DirtyJson:
         chars = ["{", "[", '"']
         indices = [input_str.find(char) for char in chars if input_str.find(char) != -1]
         return min(indices) if indices else 0
+
+
+_WHITESPACE = re.compile(r"\s*")
+_STRING_STOP = {q: re.compile("[\\\\" + q + "]") for q in ('"', "'", "`")}
+_NUMBER = re.compile(r"[0-9eE.+-]*")
+_BARE = re.compile(r"[^:,}\]]*")
+_UNQUOTED_KEY = re.compile(r"[^\s:,}\]]*")
+_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_MISSING = object()
+
+
+class _Frame:
+    # open object or array; state is "key", "colon", "value" or "comma"
+    __slots__ = ("value", "state", "key", "double")
+
+    def __init__(self, value, state: str, double: bool = False):
+        self.value = value
+        self.state = state
+        self.key = None
+        self.double = double
+
+
+class _Token:
+    # scalar or comment being read; kind is "string", "key", "ukey", "number", "bare", "line_comment" or "block_comment"
+    __slots__ = ("kind", "quote", "triple", "parts")
+
+    def __init__(self, kind: str, quote: str = "", triple: bool = False):
+        self.kind = kind
+        self.quote = quote
+        self.triple = triple
+        self.parts: list[str] = []
+
+    def text(self) -> str:
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
+
+
+class DirtyJsonStream:
+    """Resumable DirtyJson parser for text that arrives in chunks.
+
+    Parser state is kept between chunks so every feed() only processes the new
+    text. snapshot() returns a copy of the value parsed so far, including the
+    string, number or literal currently being read.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.text = ""
+        self._buf = ""  # input not consumed yet (partial escapes, lookaheads)
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._root = _MISSING
+        self._stack: list[_Frame] = []
+        self._token: _Token | None = None
+
+    def feed(self, chunk: str):
+        self.text += chunk
+        self._feed(chunk)
+        return self.snapshot()
+
+    def update(self, text: str):
+        """Parse the full text streamed so far, feeding only what was appended since the last call.
+        Text that no longer extends the previous input (e.g. rewritten by masking) is parsed from scratch."""
+        if text.startswith(self.text):
+            chunk = text[len(self.text) :]
+        else:
+            self._reset()
+            chunk = text
+        self.text = text
+        self._feed(chunk)
+        return self.snapshot()
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def snapshot(self):
+        copies: dict[int, Any] = {}
+        root = self._copy(self._root, copies) if self._root is not _MISSING else None
+
+        partial = self._partial_value()
+        if partial is _MISSING:
+            return root
+        if not self._stack:
+            return partial
+
+        frame = self._stack[-1]
+        target = copies.get(id(frame.value))
+        if isinstance(target, dict) and frame.state == "value" and frame.key is not None:
+            target[frame.key] = partial
+        elif isinstance(target, list):
+            target.append(partial)
+        return root
+
+    def _copy(self, value, copies: dict[int, Any]):
+        # containers are copied so consumers can modify the snapshot, strings are shared
+        if isinstance(value, dict):
+            result = {k: self._copy(v, copies) for k, v in value.items()}
+        elif isinstance(value, list):
+            result = [self._copy(v, copies) for v in value]
+        else:
+            return value
+        copies[id(value)] = result
+        return result
+
+    def _partial_value(self):
+        token = self._token
+        if not token or token.kind in ("key", "ukey", "line_comment", "block_comment"):
+            return _MISSING
+        if token.kind == "string":
+            return token.text().strip() if token.triple else token.text()
+        return self._scalar(token)
+
+    def _feed(self, chunk: str):
+        if self._done or not chunk:
+            return
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+
+        if not self._started:
+            starts = [i for i in (self._buf.find(c) for c in "{[\"") if i != -1]
+            if not starts:
+                self._buf = ""
+                return
+            self._pos = min(starts)
+            self._started = True
+
+        while not self._done:
+            if self._token:
+                if not self._continue_token():
+                    break
+                continue
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()  # type: ignore
+            if self._pos >= len(self._buf) or not self._structural():
+                break
+
+        self._buf = self._buf[self._pos :]
+        self._pos = 0
+
+    def _structural(self) -> bool:
+        buf, pos = self._buf, self._pos
+        char = buf[pos]
+
+        if char == "/":
+            if pos + 1 >= len(buf):
+                return False
+            if buf[pos + 1] in "/*":
+                self._token = _Token("line_comment" if buf[pos + 1] == "/" else "block_comment")
+                self._pos += 2
+                return True
+
+        if not self._stack:
+            return self._start_value(char)
+
+        frame = self._stack[-1]
+        if isinstance(frame.value, dict):
+            if char == "}":
+                return self._close_object(frame)
+            if frame.state == "key":
+                if char in ":,]":
+                    self._pos += 1  # stray separator
+                    return True
+                if char in ('"', "'"):
+                    self._token = _Token("key", quote=char)
+                    self._pos += 1
+                else:
+                    self._token = _Token("ukey")
+                return True
+            if frame.state == "colon":
+                if char == ":":
+                    self._pos += 1
+                frame.state = "value"  # a missing colon is tolerated
+                return True
+            if frame.state == "value":
+                if char == ",":
+                    frame.state = "comma"  # key without a value
+                    return True
+                if char in ":]":
+                    self._pos += 1
+                    return True
+                return self._start_value(char)
+            if char == ",":
+                self._pos += 1
+            frame.state = "key"  # a missing comma is tolerated
+            return True
+
+        if char == "]":
+            self._pos += 1
+            self._stack.pop()
+            self._done = not self._stack
+            return True
+        if frame.state == "comma":
+            if char == ",":
+                self._pos += 1
+            frame.state = "value"
+            return True
+        if char in ",:}":
+            self._pos += 1
+            return True
+        return self._start_value(char)
+
+    def _start_value(self, char: str) -> bool:
+        buf, pos = self._buf, self._pos
+        if char == "{":
+            if pos + 1 >= len(buf):
+                return False  # need to see whether this is {{
+            double = buf[pos + 1] == "{"
+            self._pos += 2 if double else 1
+            obj: dict = {}
+            self._set_value(obj)
+            self._stack.append(_Frame(obj, "key", double))
+        elif char == "[":
+            self._pos += 1
+            arr: list = []
+            self._set_value(arr)
+            self._stack.append(_Frame(arr, "value"))
+        elif char in ('"', "'", "`"):
+            if pos + 2 >= len(buf):
+                return False  # need to see whether this is a triple quote
+            triple = buf[pos + 1] == char and buf[pos + 2] == char
+            self._token = _Token("string", quote=char, triple=triple)
+            self._pos += 3 if triple else 1
+        elif char.isdigit() or char in "-+":
+            self._token = _Token("number")
+        else:
+            self._token = _Token("bare")
+        return True
+
+    def _close_object(self, frame: _Frame) -> bool:
+        buf, pos = self._buf, self._pos
+        if frame.double:
+            if pos + 1 >= len(buf):
+                return False  # need to see whether this is }}
+            self._pos += 2 if buf[pos + 1] == "}" else 1
+        else:
+            self._pos += 1
+        self._stack.pop()
+        self._done = not self._stack
+        return True
+
+    def _set_value(self, value):
+        if not self._stack:
+            self._root = value
+            return
+        frame = self._stack[-1]
+        if isinstance(frame.value, dict):
+            frame.value[frame.key if frame.key is not None else ""] = value
+        else:
+            frame.value.append(value)
+        frame.state = "comma"
+
+    def _finish_token(self, value):
+        token = self._token
+        self._token = None
+        if token.kind in ("key", "ukey"):  # type: ignore
+            frame = self._stack[-1]
+            frame.key = value
+            frame.state = "colon"
+        elif token.kind in ("line_comment", "block_comment"):  # type: ignore
+            pass
+        else:
+            self._set_value(value)
+            if not self._stack:
+                self._done = True
+
+    def _continue_token(self) -> bool:
+        token, buf, pos = self._token, self._buf, self._pos
+        kind = token.kind  # type: ignore
+
+        if kind in ("string", "key"):
+            return self._continue_string(token)  # type: ignore
+
+        if kind == "line_comment":
+            end = buf.find("\n", pos)
+            if end == -1:
+                self._pos = len(buf)
+                return False
+            self._pos = end + 1
+            self._finish_token(None)
+            return True
+
+        if kind == "block_comment":
+            end = buf.find("*/", pos)
+            if end == -1:
+                self._pos = max(pos, len(buf) - 1)
+                return False
+            self._pos = end + 2
+            self._finish_token(None)
+            return True
+
+        pattern = {"number": _NUMBER, "bare": _BARE, "ukey": _UNQUOTED_KEY}[kind]
+        end = pattern.match(buf, pos).end()  # type: ignore
+        if end > pos:
+            token.parts.append(buf[pos:end])  # type: ignore
+        self._pos = end
+        if end >= len(buf):
+            return False  # token may continue in the next chunk
+        if kind == "ukey":
+            self._finish_token(token.text())  # type: ignore
+        else:
+            self._finish_token(self._scalar(token))  # type: ignore
+        return True
+
+    def _continue_string(self, token: _Token) -> bool:
+        buf, pos = self._buf, self._pos
+        quote = token.quote
+
+        if token.triple:
+            end = buf.find(quote * 3, pos)
+            if end == -1:
+                keep = max(pos, len(buf) - 2)  # closing quotes may be split across chunks
+                if keep > pos:
+                    token.parts.append(buf[pos:keep])
+                self._pos = keep
+                return False
+            token.parts.append(buf[pos:end])
+            self._pos = end + 3
+            self._finish_token(token.text().strip())
+            return True
+
+        stop = _STRING_STOP[quote]
+        while True:
+            match = stop.search(buf, pos)
+            if not match:
+                if pos < len(buf):
+                    token.parts.append(buf[pos:])
+                self._pos = len(buf)
+                return False
+            end = match.start()
+            if end > pos:
+                token.parts.append(buf[pos:end])
+            if buf[end] == quote:
+                self._pos = end + 1
+                self._finish_token(token.text())
+                return True
+
+            # escape sequence, wait until it is complete
+            if end + 1 >= len(buf):
+                self._pos = end
+                return False
+            char = buf[end + 1]
+            if char == "u":
+                digits = buf[end + 2 : end + 6]
+                valid = len(digits) - len(digits.lstrip("0123456789abcdefABCDEF"))
+                if len(digits) < 4 and valid == len(digits):
+                    self._pos = end
+                    return False
+                if valid == 4:
+                    token.parts.append(chr(int(digits, 16)))
+                    pos = end + 6
+                else:
+                    token.parts.append("\\u" + digits[:valid])
+                    pos = end + 2 + valid
+            else:
+                token.parts.append(_ESCAPES.get(char, char))
+                pos = end + 2
+
+    def _scalar(self, token: _Token):
+        text = token.text()
+        if token.kind == "number":
+            try:
+                return int(text)
+            except ValueError:
+                try:
+                    return float(text)
+                except ValueError:
+                    return text
+        text = text.strip()
+        lower = text.lower()
+        if lower == "true":
+            return True
+        if lower == "false":
+            return False
+        if lower in ("null", "undefined"):
+            return None
+        return text
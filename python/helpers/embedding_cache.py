@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# entries kept per cache file, the least recently used ones are evicted beyond that
+MAX_ENTRIES = 200000
+# caches that live only as long as the process (document queries)
+MAX_MEMORY_ENTRIES = 20000
+# eviction goes this far below the limit, so it does not run on every insert
+EVICT_RATIO = 0.9
+# recency updates of cache hits are written in batches
+TOUCH_BATCH = 1000
+# float16 holds embedding values with ~3 significant digits, larger values fall back to float32
+FLOAT16_MAX = 65504.0
+
+
+class EmbeddingCache:
+    """
+    Embeddings by text hash in a single SQLite file (or in memory), vectors stored as float16.
+    Documents and queries are cached separately, hit ratios of both are counted.
+    """
+
+    def __init__(self, path: str = ":memory:", max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL, half INTEGER NOT NULL, used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        # recency clock, every hit or insert takes the next tick
+        self._clock = self._conn.execute("SELECT COALESCE(MAX(used), 0) FROM embeddings").fetchone()[0]
+        self._touched: dict[bytes, int] = {}
+        self._stats = {
+            "document_hits": 0,
+            "document_misses": 0,
+            "query_hits": 0,
+            "query_misses": 0,
+            "evictions": 0,
+        }
+
+    def get_many(self, texts: list[str], query: bool = False) -> dict[str, list[float]]:
+        keys = {_key(text, query): text for text in texts}
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            items = list(keys)
+            for start in range(0, len(items), 500):
+                chunk = items[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector, half FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, vector, half in rows:
+                    found[keys[key]] = _decode(vector, half)
+                    self._clock += 1
+                    self._touched[key] = self._clock
+            kind = "query" if query else "document"
+            self._stats[f"{kind}_hits"] += len(found)
+            self._stats[f"{kind}_misses"] += len(keys) - len(found)
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+        return found
+
+    def put_many(self, texts: list[str], vectors: list[list[float]], query: bool = False) -> list[list[float]]:
+        """Store the vectors, returns them as they will be read back (rounded to float16)."""
+        rows = []
+        result = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                blob, half = _encode(vector)
+                self._clock += 1
+                rows.append((_key(text, query), blob, half, self._clock))
+                result.append(_decode(blob, half))
+            self._flush_touched()
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, half, used) VALUES (?, ?, ?, ?)", rows
+            )
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+        return result
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            count = self._count
+        documents = stats["document_hits"] + stats["document_misses"]
+        queries = stats["query_hits"] + stats["query_misses"]
+        return {
+            "path": self.path,
+            "entries": count,
+            "max_entries": self.max_entries,
+            "size": os.path.getsize(self.path) if self.path != ":memory:" and os.path.exists(self.path) else 0,
+            **stats,
+            "document_hit_ratio": stats["document_hits"] / documents if documents else 0.0,
+            "query_hit_ratio": stats["query_hits"] / queries if queries else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        remove = self._count - int(self.max_entries * EVICT_RATIO)
+        before = self._conn.total_changes
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY used LIMIT ?)", (remove,)
+        )
+        removed = self._conn.total_changes - before
+        self._count -= removed
+        self._stats["evictions"] += removed
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings read from an EmbeddingCache when available, only missing texts reach the model."""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        self.underlying_embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        found = self.cache.get_many(texts)
+        missing = _missing(texts, found)
+        if missing:
+            vectors = self.underlying_embeddings.embed_documents(missing)
+            found.update(zip(missing, self.cache.put_many(missing, vectors)))
+        return [found[text] for text in texts]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        # sqlite calls go to a thread as well, a large lookup must not stall the event loop
+        found = await asyncio.to_thread(self.cache.get_many, texts)
+        missing = _missing(texts, found)
+        if missing:
+            vectors = await self.underlying_embeddings.aembed_documents(missing)
+            found.update(zip(missing, await asyncio.to_thread(self.cache.put_many, missing, vectors)))
+        return [found[text] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        found = self.cache.get_many([text], query=True)
+        if text not in found:
+            vector = self.underlying_embeddings.embed_query(text)
+            found[text] = self.cache.put_many([text], [vector], query=True)[0]
+        return found[text]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        found = await asyncio.to_thread(self.cache.get_many, [text], True)
+        if text not in found:
+            vector = await self.underlying_embeddings.aembed_query(text)
+            found[text] = (await asyncio.to_thread(self.cache.put_many, [text], [vector], True))[0]
+        return found[text]
+
+
+# one cache per file, memory dbs of all subdirs using the same model share it
+_caches: dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(folder: str, namespace: str, max_entries: int = MAX_ENTRIES) -> EmbeddingCache:
+    path = os.path.join(folder, f"{namespace}.sqlite")
+    with _caches_lock:
+        if path not in _caches:
+            os.makedirs(folder, exist_ok=True)
+            _caches[path] = EmbeddingCache(path, max_entries)
+        return _caches[path]
+
+
+# in-memory caches, gone with their owner
+_memory_caches: "weakref.WeakSet[EmbeddingCache]" = weakref.WeakSet()
+
+
+def get_memory_cache(max_entries: int = MAX_MEMORY_ENTRIES) -> EmbeddingCache:
+    cache = EmbeddingCache(":memory:", max_entries)
+    with _caches_lock:
+        _memory_caches.add(cache)
+    return cache
+
+
+def get_all_stats() -> list[dict[str, Any]]:
+    with _caches_lock:
+        caches = list(_caches.values()) + list(_memory_caches)
+    return [cache.get_stats() for cache in caches]
+
+
+def _key(text: str, query: bool) -> bytes:
+    # queries may be embedded differently from documents by some models
+    return hashlib.sha1(("q:" if query else "d:").encode() + text.encode("utf-8")).digest()
+
+
+def _missing(texts: list[str], found: dict[str, list[float]]) -> list[str]:
+    return [text for text in dict.fromkeys(texts) if text not in found]
+
+
+def _encode(vector: list[float]) -> tuple[bytes, int]:
+    array = np.asarray(vector, dtype=np.float32)
+    if np.all(np.abs(array) <= FLOAT16_MAX):
+        return array.astype(np.float16).tobytes(), 1
+    return array.tobytes(), 0
+
+
+def _decode(blob: bytes, half: int) -> list[float]:
+    return np.frombuffer(blob, dtype=np.float16 if half else np.float32).astype(np.float32).tolist()
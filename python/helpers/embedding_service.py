@@ -0,0 +1,240 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+# a batch is embedded once it has this many texts or its first request waited this long
+MAX_BATCH = 64
+MAX_WAIT = 0.005
+# a worker without requests for this long exits, the next request starts a new one
+IDLE_TIMEOUT = 30.0
+
+# embeds a batch of texts, runs on a worker thread
+Embed = Callable[[list[str]], list[list[float]]]
+
+
+@dataclass
+class _Request:
+    texts: list[str]
+    future: Future
+    queued: float = field(default_factory=time.monotonic)
+
+
+class EmbeddingService:
+    """
+    Runs the embedding calls of one model on worker threads, never on the event loop of the caller.
+    Requests arriving together (from any context) are embedded in one batch, duplicate texts only once.
+    """
+
+    _services: "weakref.WeakSet[EmbeddingService]" = weakref.WeakSet()
+
+    def __init__(
+        self,
+        name: str,
+        embed: Embed,
+        workers: int = 1,
+        max_batch: int = MAX_BATCH,
+        max_wait: float = MAX_WAIT,
+    ):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._embed = embed
+        self._queue: list[_Request] = []
+        self._queued_texts = 0
+        self._cond = threading.Condition()
+        self._running = 0
+        self._busy = 0
+        self._stats = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "duplicates": 0,
+            "errors": 0,
+            "wait_time": 0.0,
+            "embed_time": 0.0,
+        }
+        # batches by size, power of two buckets: 1, 2-3, 4-7...
+        self._histogram: dict[int, int] = {}
+        EmbeddingService._services.add(self)
+
+    def submit(self, texts: list[str]) -> Future:
+        future: Future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+        with self._cond:
+            self._queue.append(_Request(list(texts), future))
+            self._queued_texts += len(texts)
+            self._stats["requests"] += 1
+            # start a worker when all running ones are busy, they exit again when idle
+            if self._running - self._busy <= 0 and self._running < self.workers:
+                self._running += 1
+                threading.Thread(target=self._run, daemon=True, name=f"Embedding {self.name}").start()
+            self._cond.notify()
+        return future
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            histogram = dict(sorted(self._histogram.items()))
+            queued, queued_texts = len(self._queue), self._queued_texts
+            running, busy = self._running, self._busy
+        batches, texts = stats["batches"], stats["texts"]
+        return {
+            "model": self.name,
+            "queue_length": queued,
+            "queued_texts": queued_texts,
+            "workers": running,
+            "busy_workers": busy,
+            "requests": stats["requests"],
+            "texts": texts,
+            "batches": batches,
+            "duplicates": stats["duplicates"],
+            "errors": stats["errors"],
+            "avg_batch_size": texts / batches if batches else 0.0,
+            "batch_sizes": {_bucket_label(b): n for b, n in histogram.items()},
+            "avg_wait_time": stats["wait_time"] / stats["requests"] if stats["requests"] else 0.0,
+            "avg_embed_time": stats["embed_time"] / batches if batches else 0.0,
+        }
+
+    @staticmethod
+    def get_all_stats() -> list[dict[str, Any]]:
+        return [service.get_stats() for service in list(EmbeddingService._services)]
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            # also when the worker dies, the next request starts a new one
+            with self._cond:
+                self._running -= 1
+
+    def _serve(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    if not self._cond.wait(IDLE_TIMEOUT) and not self._queue:
+                        return
+                # give requests from other contexts a moment to join the batch
+                deadline = self._queue[0].queued + self.max_wait
+                while self._queue and self._queued_texts < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take()
+                if not batch:
+                    continue  # taken by another worker meanwhile
+                self._busy += 1
+            try:
+                self._process(batch)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+
+    def _take(self) -> list[_Request]:
+        batch: list[_Request] = []
+        size = 0
+        while self._queue:
+            request = self._queue[0]
+            # whole requests only, a large one goes alone as it did before batching
+            if batch and size + len(request.texts) > self.max_batch:
+                break
+            self._queue.pop(0)
+            self._queued_texts -= len(request.texts)
+            if request.future.set_running_or_notify_cancel():
+                batch.append(request)
+                size += len(request.texts)
+        return batch
+
+    def _process(self, batch: list[_Request]):
+        start = time.monotonic()
+        texts = [text for request in batch for text in request.texts]
+        unique = list(dict.fromkeys(texts))
+        try:
+            embeddings = self._embed(unique)
+            if len(embeddings) != len(unique):
+                raise ValueError(f"Embedding model {self.name} returned {len(embeddings)} vectors for {len(unique)} texts")
+            vectors = dict(zip(unique, embeddings))
+        except Exception as e:
+            with self._cond:
+                self._stats["errors"] += 1
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        end = time.monotonic()
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["texts"] += len(texts)
+            self._stats["duplicates"] += len(texts) - len(unique)
+            self._stats["embed_time"] += end - start
+            self._stats["wait_time"] += sum(start - request.queued for request in batch)
+            bucket = 1 << (len(unique).bit_length() - 1)
+            self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+        for request in batch:
+            request.future.set_result([vectors[text] for text in request.texts])
+
+
+def _bucket_label(bucket: int) -> str:
+    return str(bucket) if bucket == 1 else f"{bucket}-{bucket * 2 - 1}"
+
+
+class EmbeddingBackend:
+    """A loaded embedding model and its service, shared by every wrapper created with the same settings."""
+
+    def __init__(self, key: str, name: str, model: Any, embed: Embed, workers: int = 1):
+        self.key = key
+        self.name = name
+        # read-only after loading, used by all contexts at once
+        self.model = model
+        self.service = EmbeddingService(name, embed, workers=workers)
+        # live wrappers using the backend
+        self.refs = 0
+
+
+# backends by key, kept while unused so the next wrapper does not load the model again
+_backends: dict[str, EmbeddingBackend] = {}
+_backends_lock = threading.RLock()
+
+
+def acquire(key: str, name: str, load: Callable[[], tuple[Any, Embed]], workers: int = 1) -> EmbeddingBackend:
+    """Backend of the key, loaded on first use, release it when done with it."""
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            model, embed = load()
+            backend = _backends[key] = EmbeddingBackend(key, name, model, embed, workers)
+        backend.refs += 1
+        return backend
+
+
+def release(backend: EmbeddingBackend):
+    with _backends_lock:
+        backend.refs -= 1
+
+
+def unload(keep: Callable[[EmbeddingBackend], bool] | None = None):
+    """
+    Drop cached backends, e.g. when the settings switch the embedding model.
+    Backends still in use stay loaded until their last wrapper is gone, new wrappers load again.
+    """
+    with _backends_lock:
+        for key, backend in list(_backends.items()):
+            if not keep or not keep(backend):
+                del _backends[key]
+
+
+def get_backends() -> list[dict[str, Any]]:
+    with _backends_lock:
+        return [{"model": b.name, "refs": b.refs, "loaded": b.model is not None} for b in _backends.values()]
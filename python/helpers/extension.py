@@ -1,12 +1,18 @@
 from abc import abstractmethod
+import os
+import time
 from typing import Any
-from python.helpers import extract_tools, files 
+from python.helpers import extract_tools, files
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from agent import Agent
 
 class Extension:
 
+    # stateless extensions can opt in to be instantiated once per agent and reused for every call,
+    # they must not keep per-call state on self (use loop_data or agent data instead)
+    singleton: bool = False
+
     def __init__(self, agent: "Agent|None", **kwargs):
         self.agent: "Agent" = agent # type: ignore < here we ignore the type check as there are currently no extensions without an agent
         self.kwargs = kwargs
@@ -18,13 +24,52 @@ class Extension:
 
 async def call_extensions(extension_point: str, agent: "Agent|None" = None, **kwargs) -> Any:
 
+    # dispatch table for this extension point and agent profile
+    profile = agent.config.profile if agent else ""
+    classes = get_extension_classes(extension_point, profile)
+    if not classes:
+        return
+
+    # call extensions
+    point_stats = _get_stats(extension_point)
+    point_start = time.perf_counter()
+    try:
+        for cls in classes:
+            instance = _get_instance(cls, agent)
+            start = time.perf_counter()
+            try:
+                await instance.execute(**kwargs)
+            finally:
+                ext_stats = point_stats["extensions"].setdefault(_get_file_from_module(cls.__module__), [0, 0.0])
+                ext_stats[0] += 1
+                ext_stats[1] += time.perf_counter() - start
+    finally:
+        point_stats["calls"] += 1
+        point_stats["time"] += time.perf_counter() - point_start
+
+
+def get_extension_classes(extension_point: str, profile: str = "") -> list[type[Extension]]:
+    key = (extension_point, profile)
+    folders = _folders.get(key)
+    if folders is None:
+        folders = [files.get_abs_path("python/extensions", extension_point)]
+        if profile:
+            folders.append(files.get_abs_path("agents", profile, "extensions", extension_point))
+        _folders[key] = folders
+
+    # the table is rebuilt only when one of the folders changes
+    mtimes = tuple(_get_mtime(folder) for folder in folders)
+    cached = _tables.get(key)
+    if cached and cached[0] == mtimes:
+        return cached[1]
+
     # get default extensions
-    defaults = await _get_extensions("python/extensions/" + extension_point)
+    defaults = _get_extensions(folders[0], mtimes[0])
     classes = defaults
 
     # get agent extensions
-    if agent and agent.config.profile:
-        agentics = await _get_extensions("agents/" + agent.config.profile + "/extensions/" + extension_point)
+    if len(folders) > 1:
+        agentics = _get_extensions(folders[1], mtimes[1])
         if agentics:
             # merge them, agentics overwrite defaults
             unique = {}
@@ -34,27 +79,92 @@ async def call_extensions(extension_point: str, agent: "Agent|None" = None, **kw
             # sort by name
             classes = sorted(unique.values(), key=lambda cls: _get_file_from_module(cls.__module__))
 
-    # call extensions
-    for cls in classes:
-        await cls(agent=agent).execute(**kwargs)
+    _tables[key] = (mtimes, classes)
+    return classes
+
+
+def get_stats() -> dict[str, Any]:
+    # call counts and cumulative time (seconds) per extension point and per extension file
+    return {
+        point: {
+            "calls": stats["calls"],
+            "time": stats["time"],
+            "extensions": {
+                name: {"calls": calls, "time": spent}
+                for name, (calls, spent) in stats["extensions"].items()
+            },
+        }
+        for point, stats in sorted(_stats.items(), key=lambda item: -item[1]["time"])
+    }
+
+
+def reset_stats():
+    _stats.clear()
+
+
+def clear_cache():
+    global _generation
+    _cache.clear()
+    _tables.clear()
+    _generation += 1
+    _shared_instances.clear()
 
 
 def _get_file_from_module(module_name: str) -> str:
     return module_name.split(".")[-1]
 
-_cache: dict[str, list[type[Extension]]] = {}
-async def _get_extensions(folder:str):
-    global _cache
-    folder = files.get_abs_path(folder)
-    if folder in _cache:
-        classes = _cache[folder]
-    else:
-        if not files.exists(folder):
-            return []
-        classes = extract_tools.load_classes_from_folder(
-            folder, "*", Extension
-        )
-        _cache[folder] = classes
 
-    return classes
+def _get_mtime(folder: str) -> int:
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _get_stats(extension_point: str) -> dict[str, Any]:
+    stats = _stats.get(extension_point)
+    if stats is None:
+        stats = _stats[extension_point] = {"calls": 0, "time": 0.0, "extensions": {}}
+    return stats
+
+
+def _get_instance(cls: type[Extension], agent: "Agent|None") -> Extension:
+    if not cls.singleton:
+        return cls(agent=agent)
+    instances = _get_agent_instances(agent) if agent else _shared_instances
+    instance = instances.get(cls)
+    if instance is None:
+        instance = instances[cls] = cls(agent=agent)
+    return instance
 
+
+def _get_agent_instances(agent: "Agent") -> dict[type[Extension], Extension]:
+    # kept in agent data (not serialized, "_" prefix), the instances reference the agent and go away with it
+    cached = agent.get_data(INSTANCES_DATA_NAME)
+    if not cached or cached[0] != _generation:
+        cached = (_generation, {})
+        agent.set_data(INSTANCES_DATA_NAME, cached)
+    return cached[1]
+
+
+INSTANCES_DATA_NAME = "_extension_instances"
+_folders: dict[tuple[str, str], list[str]] = {}
+_tables: dict[tuple[str, str], tuple[tuple[int, ...], list[type[Extension]]]] = {}
+# bumped by clear_cache, instances cached on agents by an older generation are rebuilt
+_generation = 0
+_shared_instances: dict[type[Extension], Extension] = {}
+_stats: dict[str, dict[str, Any]] = {}
+
+_cache: dict[str, tuple[int, list[type[Extension]]]] = {}
+def _get_extensions(folder: str, mtime: int) -> list[type[Extension]]:
+    global _cache
+    if mtime < 0:
+        return []
+    cached = _cache.get(folder)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    classes = extract_tools.load_classes_from_folder(
+        folder, "*", Extension
+    )
+    _cache[folder] = (mtime, classes)
+    return classes
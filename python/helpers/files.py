@@ -8,8 +8,11 @@ import re
 import base64
 import shutil
 import tempfile
+import threading
 from typing import Any
 import zipfile
+from contextlib import contextmanager
+from contextvars import ContextVar
 import importlib
 import importlib.util
 import inspect
@@ -39,9 +42,7 @@ def load_plugin_variables(file: str, backup_dirs: list[str] | None = None) -> di
 
     if plugin_file and exists(plugin_file):
         
-        from python.helpers import extract_tools
-        classes = extract_tools.load_classes_from_file(plugin_file, VariablesPlugin, one_per_file=False)
-        for cls in classes:
+        for cls in _load_plugin_classes(plugin_file):
             return cls().get_variables(file, backup_dirs) # type: ignore < abstract class here is ok, it is always a subclass
 
         # load python code and extract variables variables from it
@@ -77,31 +78,19 @@ def parse_file(_filename: str, _directories: list[str] | None = None, _encoding=
     if _directories is None:
         _directories = []
 
-    # Find the file in the directories
-    absolute_path = find_file_in_dirs(_filename, _directories)
+    # Find the file in the directories, read and parse it (cached until the file changes)
+    template = _get_prompt_template(_filename, _directories, _encoding, parse=True)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
-    
-    is_json = is_full_json_template(content)
-    content = remove_code_fences(content)
-    variables = load_plugin_variables(absolute_path, _directories) or {}  # type: ignore
+    variables = template.get_variables(template.path, _directories)
     variables.update(kwargs)
-    if is_json:
-        content = replace_placeholders_json(content, **variables)
+    if template.is_json:
+        content = template.render(variables, json_values=True)
         obj = json.loads(content)
         # obj = replace_placeholders_dict(obj, **variables)
         return obj
     else:
-        content = replace_placeholders_text(content, **variables)
-        # Process include statements
-        content = process_includes(
-            # here we use kwargs, the plugin variables are not inherited
-            content, _directories, **kwargs
-        )
-        return content
+        # here we use kwargs for includes, the plugin variables are not inherited
+        return template.render(variables, _directories, kwargs)
 
 
 def read_prompt_file(_file: str, _directories: list[str] | None = None, _encoding="utf-8", **kwargs):
@@ -114,27 +103,175 @@ def read_prompt_file(_file: str, _directories: list[str] | None = None, _encodin
         _file = os.path.basename(_file)
         _directories = [folder_path] + _directories
 
-    # Find the file in the directories
-    absolute_path = find_file_in_dirs(_file, _directories)
-
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Find the file in the directories, read and parse it (cached until the file changes)
+    template = _get_prompt_template(_file, _directories, _encoding, parse=False)
 
-    variables = load_plugin_variables(_file, _directories) or {}  # type: ignore
+    variables = template.get_variables(_file, _directories)
     variables.update(kwargs)
 
-    # Replace placeholders with values from kwargs
-    content = replace_placeholders_text(content, **variables)
+    # Replace placeholders and process includes in one pass
+    # here we use kwargs for includes, the plugin variables are not inherited
+    return template.render(variables, _directories, kwargs)
+
+
+class _PromptTemplate:
+    # a prompt file split into literal text, {{placeholder}} and {{ include "file" }} segments
+    __slots__ = ("path", "stamp", "is_json", "segments", "plugin", "watched")
+
+    def __init__(self, path: str, content: str, plugin: str | None, watched: list[str], stamp: tuple):
+        self.path = path
+        self.plugin = plugin
+        self.watched = watched
+        self.stamp = stamp
+        self.is_json = False
+        self.segments: list[str | tuple[str, str, str]] = []
+        position = 0
+        for match in _TEMPLATE_PATTERN.finditer(content):
+            if match.start() > position:
+                self.segments.append(content[position:match.start()])
+            include, name = match.group(1), match.group(2)
+            if include is not None:
+                self.segments.append(("include", include, match.group(0)))
+            else:
+                self.segments.append(("var", name, match.group(0)))
+            position = match.end()
+        if position < len(content):
+            self.segments.append(content[position:])
+
+    def get_variables(self, file: str, directories: list[str]) -> dict[str, Any]:
+        if self.plugin:
+            for cls in _load_plugin_classes(self.plugin):
+                return cls().get_variables(file, directories) or {}  # type: ignore < abstract class here is ok, it is always a subclass
+        return {}
 
-    # Process include statements
-    content = process_includes(
-        # here we use kwargs, the plugin variables are not inherited
-        content, _directories, **kwargs
-    )
+    def render(
+        self,
+        variables: dict[str, Any],
+        directories: list[str] | None = None,
+        include_kwargs: dict[str, Any] | None = None,
+        json_values: bool = False,
+    ) -> str:
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+            elif segment[0] == "var":
+                if segment[1] in variables:
+                    value = variables[segment[1]]
+                    parts.append(json.dumps(value) if json_values else str(value))
+                else:
+                    parts.append(segment[2])
+            elif directories is None or os.path.isabs(segment[1]):
+                # includes are not processed in json templates, absolute paths are left as they are
+                parts.append(segment[2])
+            else:
+                try:
+                    parts.append(read_prompt_file(segment[1], directories, **(include_kwargs or {})))
+                except FileNotFoundError:
+                    parts.append(segment[2])  # Keep original if file not found
+        return "".join(parts)
+
+
+# {{ include "file" }} | {{placeholder}}
+_TEMPLATE_PATTERN = re.compile(r"{{\s*include\s*['\"](.*?)['\"]\s*}}|{{([^{}]+)}}")
+_prompt_cache: dict[tuple, _PromptTemplate] = {}
+_prompt_cache_stats = {"hits": 0, "misses": 0}
+# files and folders of the prompts read inside track_prompt_files, with their mtimes at reading
+_tracked_prompt_files: ContextVar[dict[str, int] | None] = ContextVar("_tracked_prompt_files", default=None)
+
+
+def get_prompt_cache_stats() -> dict[str, int]:
+    return {**_prompt_cache_stats, "entries": len(_prompt_cache)}
+
+
+def clear_prompt_cache():
+    _prompt_cache.clear()
+    _plugin_cache.clear()
+
+
+@contextmanager
+def track_prompt_files():
+    """Collects the files (and searched folders) of all prompts read in the block, see prompt_files_changed."""
+    tracked: dict[str, int] = {}
+    outer = _tracked_prompt_files.get()
+    token = _tracked_prompt_files.set(tracked)
+    try:
+        yield tracked
+    finally:
+        _tracked_prompt_files.reset(token)
+        if outer is not None:
+            outer.update(tracked)
 
-    return content
+
+def prompt_files_changed(tracked: dict[str, int]) -> bool:
+    return any(_get_mtime(path) != mtime for path, mtime in tracked.items())
+
+
+def _get_mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _get_prompt_template(_filename: str, _directories: list[str], _encoding: str, parse: bool) -> _PromptTemplate:
+    key = (_filename, tuple(_directories), _encoding, parse)
+    template = _prompt_cache.get(key)
+    # the template stays valid while the file, its plugin and the searched folders are unchanged
+    if template and template.stamp == tuple(_get_mtime(path) for path in template.watched):
+        _prompt_cache_stats["hits"] += 1
+        _track_prompt_template(template)
+        return template
+    _prompt_cache_stats["misses"] += 1
+
+    absolute_path = find_file_in_dirs(_filename, _directories)
+    with open(absolute_path, "r", encoding=_encoding) as f:
+        content = f.read()
+
+    # plugins are searched next to the file and in the same directories
+    plugin_source = absolute_path if parse else _filename
+    plugin = None
+    if plugin_source.endswith(".md"):
+        plugin_dirs = [dirname(plugin_source)] + _directories
+        try:
+            plugin = find_file_in_dirs(basename(plugin_source, ".md") + ".py", plugin_dirs)
+        except FileNotFoundError:
+            pass
+    else:
+        plugin_dirs = []
+
+    watched = [absolute_path] + ([plugin] if plugin else [])
+    watched += list(dict.fromkeys(get_abs_path(directory) for directory in _directories + plugin_dirs))
+    stamp = tuple(_get_mtime(path) for path in watched)
+
+    is_json = False
+    if parse:
+        is_json = is_full_json_template(content)
+        content = remove_code_fences(content)
+    template = _PromptTemplate(absolute_path, content, plugin, watched, stamp)
+    template.is_json = is_json
+    _prompt_cache[key] = template
+    _track_prompt_template(template)
+    return template
+
+
+def _track_prompt_template(template: _PromptTemplate):
+    tracked = _tracked_prompt_files.get()
+    if tracked is not None:
+        tracked.update(zip(template.watched, template.stamp))
+
+
+_plugin_cache: dict[str, tuple[int, list[type]]] = {}
+def _load_plugin_classes(plugin_file: str) -> list[type]:
+    # variables plugins are only re-imported when the file changes
+    mtime = _get_mtime(plugin_file)
+    cached = _plugin_cache.get(plugin_file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    from python.helpers import extract_tools
+    classes = extract_tools.load_classes_from_file(plugin_file, VariablesPlugin, one_per_file=False)
+    _plugin_cache[plugin_file] = (mtime, classes)
+    return classes
 
 
 def read_file(relative_path:str, encoding="utf-8"):
@@ -293,6 +430,23 @@ def write_file(relative_path: str, content: str, encoding: str = "utf-8"):
         f.write(content)
 
 
+def write_file_atomic(relative_path: str, content: str | bytes, encoding: str = "utf-8") -> int:
+    # write a temp file next to the target and rename it over, readers never see a partial file
+    abs_path = get_abs_path(relative_path)
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+    if isinstance(content, str):
+        content = content.encode(encoding, errors="replace")
+    tmp_path = f"{abs_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, abs_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(content)
+
+
 def write_file_bin(relative_path: str, content: bytes):
     abs_path = get_abs_path(relative_path)
     os.makedirs(os.path.dirname(abs_path), exist_ok=True)
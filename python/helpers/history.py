@@ -5,7 +5,7 @@ from collections.abc import Mapping
 import json
 import math
 from typing import Coroutine, Literal, TypedDict, cast, Union, Dict, List, Any
-from python.helpers import messages, tokens, settings, call_llm
+from python.helpers import blobs, messages, tokens, settings, call_llm
 from enum import Enum
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
 
@@ -80,7 +80,8 @@ class Message(Record):
         self.ai = ai
         self.content = content
         self.summary: str = ""
-        self.tokens: int = tokens or self.calculate_tokens()
+        # counted on first get_tokens, deserialized messages keep their stored count
+        self.tokens: int = tokens
 
     def get_tokens(self) -> int:
         if not self.tokens:
@@ -130,20 +131,44 @@ class Topic(Record):
         self.history = history
         self.summary: str = ""
         self.messages: list[Message] = []
+        # running total of message tokens, kept up to date by every method changing messages
+        self._messages_tokens = 0
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, value: str):
+        # summary tokens are counted once per summary, not on every get_tokens
+        self._summary = value
+        self._summary_tokens: int | None = None
 
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return _get_summary_tokens(self)
         else:
-            return sum(msg.get_tokens() for msg in self.messages)
+            return self._messages_tokens
 
     def add_message(
         self, ai: bool, content: MessageContent, tokens: int = 0
     ) -> Message:
         msg = Message(ai=ai, content=content, tokens=tokens)
         self.messages.append(msg)
+        self._add_tokens(msg.get_tokens())
         return msg
 
+    def _add_tokens(self, delta: int):
+        # compression runs in the background, the topic may have moved from current to topics meanwhile
+        self._messages_tokens += delta
+        if not self.summary:
+            self.history._topic_changed(self, delta)
+
+    def count_tokens(self) -> int:
+        # recalculate the running total from the messages
+        self._messages_tokens = sum(msg.get_tokens() for msg in self.messages)
+        return self._messages_tokens
+
     def output(self) -> list[OutputMessage]:
         if self.summary:
             return [OutputMessage(ai=False, content=self.summary)]
@@ -180,6 +205,8 @@ class Topic(Record):
                 msg.set_summary(
                     "Message content replaced to save space in context window"
                 )
+                self._add_tokens(msg.get_tokens() - tok)
+                self.history.revision += 1
 
             # regular messages will be truncated
             else:
@@ -190,6 +217,8 @@ class Topic(Record):
                     trim_to_chars * 0.85,
                 )
                 msg.set_summary(_json_dumps(trunc))
+                self._add_tokens(msg.get_tokens() - tok)
+                self.history.revision += 1
 
             return True
         return False
@@ -210,7 +239,11 @@ class Topic(Record):
                 "fw.msg_summary.md", summary=summary
             )
             sum_msg = Message(False, sum_msg_content)
+            # the messages may have changed while summarizing, count what is actually replaced
+            replaced = self.messages[1 : cnt_to_sum + 1]
             self.messages[1 : cnt_to_sum + 1] = [sum_msg]
+            self._add_tokens(sum_msg.get_tokens() - sum(m.get_tokens() for m in replaced))
+            self.history.revision += 1
             return True
         return False
 
@@ -229,6 +262,7 @@ class Topic(Record):
         return {
             "_cls": "Topic",
             "summary": self.summary,
+            "summary_tokens": _get_summary_tokens(self) if self.summary else 0,
             "messages": [m.to_dict() for m in self.messages],
         }
 
@@ -236,9 +270,11 @@ class Topic(Record):
     def from_dict(data: dict, history: "History"):
         topic = Topic(history=history)
         topic.summary = data.get("summary", "")
+        topic._summary_tokens = data.get("summary_tokens") or None
         topic.messages = [
             Message.from_dict(m, history=history) for m in data.get("messages", [])
         ]
+        topic.count_tokens()
         return topic
 
 
@@ -248,10 +284,20 @@ class Bulk(Record):
         self.summary: str = ""
         self.records: list[Record] = []
 
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, value: str):
+        self._summary = value
+        self._summary_tokens: int | None = None
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return _get_summary_tokens(self)
         else:
+            # only bulks waiting for their summary get here
             return sum([r.get_tokens() for r in self.records])
 
     def output(
@@ -279,6 +325,7 @@ class Bulk(Record):
         return {
             "_cls": "Bulk",
             "summary": self.summary,
+            "summary_tokens": _get_summary_tokens(self) if self.summary else 0,
             "records": [r.to_dict() for r in self.records],
         }
 
@@ -286,6 +333,7 @@ class Bulk(Record):
     def from_dict(data: dict, history: "History"):
         bulk = Bulk(history=history)
         bulk.summary = data["summary"]
+        bulk._summary_tokens = data.get("summary_tokens") or None
         cls = data["_cls"]
         bulk.records = [Record.from_dict(r, history=history) for r in data["records"]]
         return bulk
@@ -300,6 +348,11 @@ class History(Record):
         self.topics: list[Topic] = []
         self.current = Topic(history=self)
         self.agent: Agent = agent
+        # running totals of bulks and topics tokens, the current topic keeps its own
+        self._bulks_tokens = 0
+        self._topics_tokens = 0
+        # incremented on every change other than adding a message to the current topic
+        self.revision = 0
 
     def get_tokens(self) -> int:
         return (
@@ -314,10 +367,10 @@ class History(Record):
         return total > limit
 
     def get_bulks_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.bulks)
+        return self._bulks_tokens
 
     def get_topics_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.topics)
+        return self._topics_tokens
 
     def get_current_topic_tokens(self) -> int:
         return self.current.get_tokens()
@@ -326,12 +379,50 @@ class History(Record):
         self, ai: bool, content: MessageContent, tokens: int = 0
     ) -> Message:
         self.counter += 1
+        if _is_raw_message(content):
+            # images and other inline data go to the blob store, history keeps references
+            content = blobs.store_data_urls(content, owner=_get_blob_owner(self.agent))
         return self.current.add_message(ai, content=content, tokens=tokens)
 
     def new_topic(self):
         if self.current.messages:
             self.topics.append(self.current)
+            self._topics_tokens += self.current.get_tokens()
             self.current = Topic(history=self)
+            self.revision += 1
+
+    def _topic_changed(self, topic: Topic, delta: int):
+        # the current topic counts its own tokens, moved topics are part of the history total
+        if topic is not self.current and any(t is topic for t in self.topics):
+            self._topics_tokens += delta
+
+    def count_tokens(self) -> int:
+        # recalculate the running totals from all records
+        for topic in [*self.topics, self.current]:
+            topic.count_tokens()
+        self._bulks_tokens = sum(record.get_tokens() for record in self.bulks)
+        self._topics_tokens = sum(record.get_tokens() for record in self.topics)
+        return self.get_tokens()
+
+    def check_tokens(self):
+        """Debug check that the running token totals match a full recount, raises AssertionError on mismatch."""
+        errors = []
+        for name, topic in [*((f"topic {i}", t) for i, t in enumerate(self.topics)), ("current topic", self.current)]:
+            expected = sum(msg.get_tokens() for msg in topic.messages)
+            if topic._messages_tokens != expected:
+                errors.append(f"{name}: {topic._messages_tokens} != {expected}")
+        for name, records, total in [
+            ("bulks", self.bulks, self._bulks_tokens),
+            ("topics", self.topics, self._topics_tokens),
+        ]:
+            expected = sum(
+                tokens.approximate_tokens(r.summary) if r.summary else r.get_tokens()
+                for r in records
+            )
+            if total != expected:
+                errors.append(f"{name}: {total} != {expected}")
+        if errors:
+            raise AssertionError("History token totals out of sync: " + "; ".join(errors))
 
     def output(self) -> list[OutputMessage]:
         result: list[OutputMessage] = []
@@ -346,6 +437,7 @@ class History(Record):
         history.bulks = [Bulk.from_dict(b, history=history) for b in data["bulks"]]
         history.topics = [Topic.from_dict(t, history=history) for t in data["topics"]]
         history.current = Topic.from_dict(data["current"], history=history)
+        history.count_tokens()
         return history
 
     def to_dict(self):
@@ -399,7 +491,10 @@ class History(Record):
         # summarize topics one by one
         for topic in self.topics:
             if not topic.summary:
+                before = topic.get_tokens()
                 await topic.summarize()
+                self._topics_tokens += topic.get_tokens() - before
+                self.revision += 1
                 return True
 
         # move oldest topic to bulks and summarize
@@ -411,7 +506,10 @@ class History(Record):
             else:
                 await bulk.summarize()
             self.bulks.append(bulk)
+            self._bulks_tokens += bulk.get_tokens()
             self.topics.remove(topic)
+            self._topics_tokens -= topic.get_tokens()
+            self.revision += 1
             return True
         return False
 
@@ -420,7 +518,8 @@ class History(Record):
         compressed = await self.merge_bulks_by(BULK_MERGE_COUNT)
         # remove oldest bulk if necessary
         if not compressed:
-            self.bulks.pop(0)
+            self._bulks_tokens -= self.bulks.pop(0).get_tokens()
+            self.revision += 1
             return True
         return compressed
 
@@ -436,6 +535,8 @@ class History(Record):
             ]
         )
         self.bulks = bulks
+        self._bulks_tokens = sum(bulk.get_tokens() for bulk in bulks)
+        self.revision += 1
         return True
 
     async def merge_bulks(self, bulks: list[Bulk]) -> Bulk:
@@ -448,11 +549,26 @@ class History(Record):
 def deserialize_history(json_data: str, agent) -> History:
     history = History(agent=agent)
     if json_data:
+        owner = _get_blob_owner(agent)
+        if owner:
+            blobs.add_refs(owner, blobs.find_refs(json_data))
         data = _json_loads(json_data)
         history = History.from_dict(data, history=history)
     return history
 
 
+def _get_blob_owner(agent) -> str | None:
+    # blobs are referenced by the chat the history belongs to
+    context = getattr(agent, "context", None)
+    return context.id if context else None
+
+
+def _get_summary_tokens(record: "Topic | Bulk") -> int:
+    if record._summary_tokens is None:
+        record._summary_tokens = tokens.approximate_tokens(record._summary)
+    return record._summary_tokens
+
+
 def _get_ctx_size_for_history() -> int:
     set = settings.get_settings()
     return int(set["chat_model_ctx_length"] * set["chat_model_ctx_history"])
@@ -485,7 +601,7 @@ def _output_content_langchain(content: MessageContent):
     if isinstance(content, str):
         return content
     if _is_raw_message(content):
-        return content["raw_content"]  # type: ignore
+        return blobs.inline_refs(content["raw_content"])  # type: ignore
     try:
         return _json_dumps(content)
     except Exception as e:
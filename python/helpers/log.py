@@ -3,9 +3,11 @@ import json
 from typing import Any, Literal, Optional, Dict, TypeVar
 
 T = TypeVar("T")
+import threading
 import uuid
 from collections import OrderedDict  # Import OrderedDict
 from python.helpers.strings import truncate_text_by_ratio
+from python.helpers import push
 import copy
 from typing import TypeVar
 
@@ -92,19 +94,25 @@ def _truncate_content(text: str | None) -> str:
     if text is None:
         return ""
     raw = str(text)
-    if len(raw) <= CONTENT_MAX_LEN:
-        return raw
+    return _join_window(raw, raw, len(raw))
 
-    # Same dynamic replacement logic as value truncation
-    removed = len(raw) - CONTENT_MAX_LEN
+
+def _join_window(head: str, tail: str, length: int, max_len: int = CONTENT_MAX_LEN, settle: bool = True) -> str:
+    # truncated text of given length from its first and last max_len chars,
+    # settle makes the hidden count exact (content), values count only what is over the limit
+    if length <= max_len:
+        return head
+
+    removed = length - max_len
     while True:
         replacement = f"\n\n<< {removed} Characters hidden >>\n\n"
-        truncated = truncate_text_by_ratio(raw, CONTENT_MAX_LEN, replacement, ratio=0.3)
-        new_removed = len(raw) - (len(truncated) - len(replacement))
-        if new_removed == removed:
+        available = max_len - len(replacement)
+        new_removed = length - available
+        if not settle or new_removed == removed:
             break
         removed = new_removed
-    return truncated
+    start_len = int(available * 0.3)
+    return head[:start_len] + replacement + tail[-(available - start_len):]
 
 
 def _mask_recursive(obj: T) -> T:
@@ -127,6 +135,113 @@ def _mask_recursive(obj: T) -> T:
         return obj
 
 
+def _create_stream_filter():
+    try:
+        from python.helpers.secrets import SecretsManager, StreamingSecretsFilter
+
+        # same secrets as mask_values
+        matcher = SecretsManager.get_instance().get_matcher(4)
+        return None if matcher.empty else StreamingSecretsFilter({}, matcher=matcher)
+    except Exception as _e:
+        return None
+
+
+class _StreamBuffer:
+    """
+    Masked and truncated view of a text that only grows.
+    Every appended delta is masked once, only the first and last max_len chars are kept.
+    """
+
+    def __init__(self, max_len: int | None, settle: bool = True):
+        self.max_len = max_len
+        self.settle = settle
+        self.head = ""  # first max_len masked chars, everything without a limit
+        self.tail = ""  # between max_len and 2 * max_len last masked chars
+        self.length = 0
+        self.filter = _create_stream_filter()
+        # full text of the last update_stream call, the next one appends what follows it
+        self.source: str | None = None
+
+    def append(self, delta: str) -> str:
+        pending = ""
+        if self.filter:
+            try:
+                from python.helpers.secrets import alias_for_key
+
+                delta = self.filter.process_chunk(delta)
+                # the end that may still become a secret, shown as it is now like mask_values would
+                pending = self.filter.matcher.mask(self.filter.pending, alias_for_key)
+            except Exception as _e:
+                self.filter = None
+        self._add(delta)
+        return self.text(pending)
+
+    def text(self, pending: str = "") -> str:
+        if self.max_len is None:
+            return self.head + pending
+        head = self.head
+        if pending and len(head) < self.max_len:
+            head = (head + pending)[: self.max_len]
+        return _join_window(head, self.tail + pending, self.length + len(pending), self.max_len, self.settle)
+
+    def _add(self, text: str):
+        self.length += len(text)
+        if self.max_len is None:
+            self.head += text
+            return
+        if len(self.head) < self.max_len:
+            self.head += text[: self.max_len - len(self.head)]
+        self.tail += text
+        if len(self.tail) > 2 * self.max_len:
+            self.tail = self.tail[-self.max_len :]
+
+
+class _KvpCache:
+    """Processed (masked, truncated) kvp value or a nested part of it, with what it was made from."""
+
+    __slots__ = ("source", "value", "stream", "children")
+
+    def __init__(self, source: Any, value: Any, stream: _StreamBuffer | None = None, children: dict | None = None):
+        self.source = source
+        self.value = value
+        self.stream = stream
+        self.children = children
+
+
+def _process_kvp(value: Any, cache: _KvpCache | None) -> _KvpCache:
+    # streamed responses pass all kvps on every chunk, only what changed since the last call is processed
+    if isinstance(value, str):
+        stream = cache.stream if cache else None
+        previous = stream.source if stream else None
+        if stream is None or previous is None or not value.startswith(previous):
+            stream, previous = _StreamBuffer(VALUE_MAX_LEN, settle=False), ""
+        elif len(value) == len(previous):
+            return cache  # type: ignore
+        delta = value[len(previous) :]
+        stream.source = value
+        return _KvpCache(value, stream.append(delta), stream=stream)
+
+    if isinstance(value, (dict, list)):
+        previous = cache.children if cache and type(cache.source) is type(value) and cache.children is not None else {}
+        items = value.items() if isinstance(value, dict) else enumerate(value)
+        children = {k: _process_kvp(v, previous.get(k)) for k, v in items}
+        if cache and len(children) == len(previous) and all(child is previous.get(k) for k, child in children.items()):
+            return cache
+        if isinstance(value, dict):
+            processed = {_truncate_key(k): child.value for k, child in children.items()}
+        else:
+            processed = [child.value for child in children.values()]
+        return _KvpCache(type(value)(), processed, children=children)
+
+    try:
+        if cache and cache.stream is None and cache.children is None and type(cache.source) is type(value) and bool(cache.source == value):
+            return cache
+    except Exception:
+        pass
+    value = copy.deepcopy(value)
+    return _KvpCache(value, _truncate_value(_mask_recursive(copy.deepcopy(value))))
+
+
 @dataclass
 class LogItem:
     log: "Log"
@@ -139,6 +254,9 @@ class LogItem:
     kvps: Optional[OrderedDict] = None  # Use OrderedDict for kvps
     id: Optional[str] = None  # Add id field
     guid: str = ""
+    # streaming state of appended fields and the kvps last passed to update_stream, not part of the output
+    _streams: dict[str, _StreamBuffer] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _kvps_cache: dict[str, _KvpCache] = field(default_factory=dict, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         self.guid = self.log.guid
@@ -165,20 +283,34 @@ class LogItem:
                 **kwargs,
             )
 
+    def append(
+        self,
+        heading: str | None = None,
+        content: str | None = None,
+        **kwargs: str,
+    ):
+        """Append streamed text to heading, content or kvps, only the new part is masked and truncated."""
+        if self.guid == self.log.guid:
+            self.log._append_item(self.no, heading=heading, content=content, **kwargs)
+
+    def update_stream(
+        self,
+        heading: str | None = None,
+        content: str | None = None,
+        kvps: dict | None = None,
+        **kwargs: str,
+    ):
+        """Like update, for content and keyword kvps that grow with every call (the text streamed so far)."""
+        if self.guid == self.log.guid:
+            self.log._update_stream_item(self.no, heading=heading, content=content, kvps=kvps, **kwargs)
+
     def stream(
         self,
         heading: str | None = None,
         content: str | None = None,
         **kwargs,
     ):
-        if heading is not None:
-            self.update(heading=self.heading + heading)
-        if content is not None:
-            self.update(content=self.content + content)
-
-        for k, v in kwargs.items():
-            prev = self.kvps.get(k, "") if self.kvps else ""
-            self.update(**{k: prev + v})
+        self.append(heading=heading, content=content, **kwargs)
 
     def output(self):
         return {
@@ -196,7 +328,11 @@ class Log:
 
     def __init__(self):
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
+        # number of updates so far, clients and the chat journal remember the version they have seen
+        self.version: int = 0
+        # item no -> version of its last update, ordered by that version (one entry per item)
+        self._updated: OrderedDict[int, int] = OrderedDict()
+        self._updated_lock = threading.Lock()
         self.logs: list[LogItem] = []
         self.set_initial_progress()
 
@@ -254,20 +390,30 @@ class Log:
             heading = _truncate_heading(heading)
             item.heading = heading
         if content is not None:
-            content = _mask_recursive(content)
-            content = _truncate_content(content)
-            item.content = content
+            if "content" in item._streams:
+                # replaced while streaming, appends continue from the new text
+                item._streams["content"] = _StreamBuffer(CONTENT_MAX_LEN)
+                item.content = item._streams["content"].append(str(content))
+            else:
+                content = _mask_recursive(content)
+                content = _truncate_content(content)
+                item.content = content
         if kvps is not None:
             kvps = OrderedDict(copy.deepcopy(kvps))
             kvps = _mask_recursive(kvps)
             kvps = _truncate_value(kvps)
             item.kvps = kvps
+            item._streams = {k: v for k, v in item._streams.items() if k == "content"}
+            item._kvps_cache = {}
         elif item.kvps is None:
             item.kvps = OrderedDict()
         if kwargs:
             kwargs = copy.deepcopy(kwargs)
             kwargs = _mask_recursive(kwargs)
             item.kvps.update(kwargs)
+            for key in kwargs:
+                item._streams.pop(key, None)
+                item._kvps_cache.pop(key, None)
 
         if type is not None:
             item.type = type
@@ -281,8 +427,89 @@ class Log:
         if id is not None:
             item.id = id
 
-        self.updates += [item.no]
+        self._item_updated(item)
+
+    def _append_item(
+        self,
+        no: int,
+        heading: str | None = None,
+        content: str | None = None,
+        **kwargs: str,
+    ):
+        item = self.logs[no]
+
+        if heading:
+            item.heading = _truncate_heading(_mask_recursive(item.heading + heading))
+        if content:
+            item.content = self._get_stream(item, "content", CONTENT_MAX_LEN, item.content).append(content)
+        if kwargs:
+            if item.kvps is None:
+                item.kvps = OrderedDict()
+            for key, delta in kwargs.items():
+                current = item.kvps.get(key, "")
+                if not isinstance(current, str):
+                    current = str(current)
+                # kvps set by keyword are not truncated by update either
+                item.kvps[key] = self._get_stream(item, key, None, current).append(str(delta))
+                item._kvps_cache.pop(key, None)
+
+        self._item_updated(item)
+
+    def _update_stream_item(
+        self,
+        no: int,
+        heading: str | None = None,
+        content: str | None = None,
+        kvps: dict | None = None,
+        **kwargs: str,
+    ):
+        item = self.logs[no]
+
+        if heading is not None:
+            item.heading = _truncate_heading(_mask_recursive(heading))
+        if kvps is not None:
+            item.kvps = self._process_kvps(item, kvps)
+            item._streams = {k: v for k, v in item._streams.items() if k == "content"}
+        elif item.kvps is None:
+            item.kvps = OrderedDict()
+        if content is not None:
+            item.content = self._stream_text(item, "content", CONTENT_MAX_LEN, str(content))
+        for key, text in kwargs.items():
+            item.kvps[key] = self._stream_text(item, key, None, str(text))
+            item._kvps_cache.pop(key, None)
+
+        self._item_updated(item)
+
+    def _stream_text(self, item: LogItem, key: str, max_len: int | None, text: str) -> str:
+        stream = item._streams.get(key)
+        if stream is not None and stream.source is not None and text.startswith(stream.source):
+            delta = text[len(stream.source) :]
+        else:
+            # first call, or the text was rewritten (masked streams replace the end once a secret completes)
+            stream = item._streams[key] = _StreamBuffer(max_len)
+            delta = text
+        stream.source = text
+        return stream.append(delta)
+
+    def _get_stream(self, item: LogItem, key: str, max_len: int | None, current: str) -> _StreamBuffer:
+        stream = item._streams.get(key)
+        if stream is None:
+            # the first append continues from the text set so far (already masked)
+            stream = item._streams[key] = _StreamBuffer(max_len)
+            stream._add(current)
+        stream.source = None
+        return stream
+
+    def _process_kvps(self, item: LogItem, kvps: dict) -> OrderedDict:
+        previous = item._kvps_cache
+        item._kvps_cache = {key: _process_kvp(value, previous.get(key)) for key, value in kvps.items()}
+        return OrderedDict((_truncate_key(key), cache.value) for key, cache in item._kvps_cache.items())
+
+    def _item_updated(self, item: LogItem):
+        self.record_update(item.no)
         self._update_progress_from_item(item)
+        push.publish(self)
+        push.publish(push.CONTEXTS)
 
     def set_progress(self, progress: str, no: int = 0, active: bool = True):
         progress = _mask_recursive(progress)
@@ -296,26 +523,37 @@ class Log:
     def set_initial_progress(self):
         self.set_progress("Waiting for input", 0, False)
 
-    def output(self, start=None, end=None):
-        if start is None:
-            start = 0
-        if end is None:
-            end = len(self.updates)
-
-        out = []
-        seen = set()
-        for update in self.updates[start:end]:
-            if update not in seen:
-                out.append(self.logs[update].output())
-                seen.add(update)
+    def record_update(self, no: int) -> int:
+        with self._updated_lock:
+            self.version += 1
+            self._updated[no] = self.version
+            self._updated.move_to_end(no)
+            return self.version
+
+    def get_updated_since(self, version: int, end: int | None = None) -> list[int]:
+        """Numbers of items updated after version (up to end), walks only the items that changed."""
+        numbers = []
+        with self._updated_lock:
+            for no, updated in reversed(self._updated.items()):
+                if updated <= version:
+                    break
+                if end is None or updated <= end:
+                    numbers.append(no)
+        # in item order, new items have to reach the client in the order they were added
+        numbers.sort()
+        return numbers
 
-        return out
+    def output(self, start=None, end=None):
+        return [self.logs[no].output() for no in self.get_updated_since(start or 0, end)]
 
     def reset(self):
         self.guid = str(uuid.uuid4())
-        self.updates = []
+        with self._updated_lock:
+            self.version = 0
+            self._updated = OrderedDict()
         self.logs = []
         self.set_initial_progress()
+        push.publish(self)
 
     def _update_progress_from_item(self, item: LogItem):
         if item.heading and item.update_progress != "none":
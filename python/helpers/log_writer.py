@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# pause between two flushes, everything printed meanwhile is written at once
+FLUSH_INTERVAL = 0.5
+# a file is continued in a new one once it gets this large or this old
+MAX_FILE_SIZE = 20 * 1024 * 1024
+MAX_FILE_AGE = 24 * 60 * 60
+# pending fragments kept in memory, more are dropped until the flusher catches up
+MAX_QUEUE = 100000
+
+
+class LogWriter:
+    """
+    Buffered writer for the print log, callers only queue text and never touch the disk.
+    A background thread appends the queue to the current file and rotates files by size and age.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        header: str = "",
+        footer: str = "",
+        name_format: str = "log_%Y%m%d_%H%M%S.html",
+        flush_interval: float = FLUSH_INTERVAL,
+        max_size: int = MAX_FILE_SIZE,
+        max_age: float = MAX_FILE_AGE,
+        max_queue: int = MAX_QUEUE,
+    ):
+        self.folder = folder
+        self.header = header
+        self.footer = footer
+        self.name_format = name_format
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_queue = max_queue
+        self.path: str | None = None
+        self.dropped = 0
+        self._queue: deque[str] = deque()
+        self._file = None
+        self._size = 0
+        self._opened = 0.0
+        self._lock = threading.Lock()
+        # serializes writes of the flusher thread and explicit flush/close calls
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._open()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="LogWriter")
+        self._thread.start()
+
+    def write(self, text: str):
+        with self._lock:
+            if self._closed:
+                return
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(text)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                texts = list(self._queue)
+                self._queue.clear()
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                texts.append(f"<br>&lt;&lt; {dropped} log messages dropped &gt;&gt;<br>\n")
+            if texts and self._file:
+                self._append("".join(texts))
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self.flush()
+        with self._write_lock:
+            self._close_file()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception:
+                pass  # the log must never take the process down, next flush tries again
+
+    def _append(self, text: str):
+        if self._size >= self.max_size or time.time() - self._opened >= self.max_age:
+            self._close_file()
+            self._open()
+        data = text.encode("utf-8")
+        self._file.write(data)  # type: ignore
+        self._file.flush()  # type: ignore
+        self._size += len(data)
+
+    def _open(self):
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, datetime.now().strftime(self.name_format))
+        root, ext = os.path.splitext(path)
+        n = 1
+        while os.path.exists(path):
+            # rotated within the same second
+            path = f"{root}_{n}{ext}"
+            n += 1
+        self.path = path
+        self._file = open(path, "wb")
+        self._size = 0
+        self._opened = time.time()
+        if self.header:
+            self._append(self.header)
+
+    def _close_file(self):
+        if self._file:
+            if self.footer:
+                self._file.write(self.footer.encode("utf-8"))
+            self._file.close()
+            self._file = None
@@ -370,6 +370,16 @@ MCPServer = Annotated[
 ]
 
 
+# incremented whenever the server list or any server's tool list changes,
+# lets prompt caches tell when the MCP tools prompt has to be rebuilt
+_tools_version = 0
+
+
+def _bump_tools_version():
+    global _tools_version
+    _tools_version += 1
+
+
 class MCPConfig(BaseModel):
     servers: list[MCPServer] = Field(default_factory=list)
     disconnected_servers: list[dict[str, Any]] = Field(default_factory=list)
@@ -389,6 +399,10 @@ class MCPConfig(BaseModel):
         with cls.__lock:
             return
 
+    @classmethod
+    def get_tools_version(cls) -> int:
+        return _tools_version
+
     @classmethod
     def update(cls, config_str: str) -> Any:
         with cls.__lock:
@@ -483,6 +497,7 @@ class MCPConfig(BaseModel):
             #         )
 
             cls.__initialized = True
+            _bump_tools_version()
             return instance
 
     @classmethod
@@ -884,6 +899,7 @@ class MCPClientBase(ABC):
                     }
                     for tool in response.tools
                 ]
+                _bump_tools_version()
             PrintStyle(font_color="green").print(
                 f"MCPClientBase ({self.server.name}): Tools updated. Found {len(self.tools)} tools."
             )
@@ -906,6 +922,7 @@ class MCPClientBase(ABC):
             )
             with self.__lock:
                 self.tools = []  # Ensure tools are cleared on failure
+                _bump_tools_version()
                 self.error = f"Failed to initialize. {error_text[:200]}{'...' if len(error_text) > 200 else ''}"  # store error from tools fetch
         return self
 
@@ -1,7 +1,5 @@
 from datetime import datetime
 from typing import Any, List, Sequence
-from langchain.storage import InMemoryByteStore, LocalFileStore
-from langchain.embeddings import CacheBackedEmbeddings
 from python.helpers import guids
 
 # from langchain_chroma import Chroma
@@ -18,11 +16,14 @@ from langchain_community.vectorstores.utils import (
 )
 from langchain_core.embeddings import Embeddings
 
-import os, json
+import os, json, operator, pickle, threading
 
 import numpy as np
 
 from python.helpers.print_style import PrintStyle
+from python.helpers.persistence import PersistenceService
+from python.helpers.memory_wal import MemoryWal
+from python.helpers import memory_index, memory_filter, embedding_cache
 from . import files
 from langchain_core.documents import Document
 from python.helpers import knowledge_import
@@ -31,14 +32,125 @@ from enum import Enum
 from agent import Agent
 import models
 import logging
-from simpleeval import simple_eval
 
 
 # Raise the log level so WARNING messages aren't shown
 logging.getLogger("langchain_core.vectorstores.base").setLevel(logging.ERROR)
 
+# mutations are in the write-ahead log right away, a full snapshot is written after this many of them
+SNAPSHOT_OPS = 1000
+# or this many seconds after the first mutation not in a snapshot
+SNAPSHOT_INTERVAL = 300.0
+
 
 class MyFaiss(FAISS):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # index changes and saves happen on different threads, the persistence thread saves the db
+        self.lock = threading.RLock()
+        # set once the db is loaded, mutations before that are covered by the snapshot
+        self.wal: MemoryWal | None = None
+        self.index_config = memory_index.IndexConfig()
+        # deletes renumber index positions, an index migration started before one has to start over
+        self.deletes = 0
+        # metadata filters preselect the index positions instead of evaluating every fetched document
+        self.metadata_index = memory_filter.MetadataIndex()
+        self.positions: dict[str, int] = {}
+        for pos, id in self.index_to_docstore_id.items():
+            self.positions[id] = pos
+            doc = self.docstore._dict.get(id)  # type: ignore
+            if doc:
+                self.metadata_index.add(id, doc.metadata)
+        # selectors per filter plan, dropped on every change
+        self._selectors: dict[Any, tuple] = {}
+
+    # every add (add_texts, aadd_texts, add_embeddings...) ends here once the embeddings are ready
+    def _FAISS__add(self, texts, embeddings, metadatas=None, ids=None):
+        texts, embeddings = list(texts), list(embeddings)
+        metadatas = list(metadatas) if metadatas is not None else None
+        with self.lock:
+            start = len(self.index_to_docstore_id)
+            ids = super()._FAISS__add(texts, embeddings, metadatas=metadatas, ids=ids)  # type: ignore
+            for i, id in enumerate(ids):
+                self.positions[id] = start + i
+                self.metadata_index.add(id, metadatas[i] if metadatas else {})
+            self._selectors.clear()
+            if self.wal:
+                self.wal.log_add(ids, texts, embeddings, metadatas)
+            return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool | None:
+        with self.lock:
+            removed = []
+            if ids and not memory_index.is_flat(self.index):
+                id_set = set(ids)
+                removed = [pos for pos, id in self.index_to_docstore_id.items() if id in id_set]
+            docs = {id: self.docstore._dict.get(id) for id in ids or []}  # type: ignore
+            result = super().delete(ids, **kwargs)
+            memory_index.compact_ids(self.index, removed)
+            for id, doc in docs.items():
+                if doc:
+                    self.metadata_index.remove(id, doc.metadata)
+            self.positions = {id: pos for pos, id in self.index_to_docstore_id.items()}
+            self._selectors.clear()
+            self.deletes += 1
+            if self.wal and ids:
+                self.wal.log_delete(ids)
+            return result
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[tuple[Document, float]]:
+        # async searches run this in an executor too, an index swap or delete must not run meanwhile
+        if not isinstance(filter, memory_filter.MemoryFilter) or not filter.plan:
+            with self.lock:
+                return super().similarity_search_with_score_by_vector(
+                    embedding, k=k, filter=filter, fetch_k=fetch_k, **kwargs
+                )
+
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        with self.lock:
+            sel, bits, selected = self._get_selector(filter.plan)
+            if not selected:
+                return []
+            # the selector matches exactly, otherwise the rest of the condition is evaluated on the candidates
+            fetch = min(selected, k if filter.exact else max(k, fetch_k))
+            params = memory_index.search_params(self.index, sel, selected)
+            scores, indices = self.index.search(vector, fetch, params=params)
+            docs = []
+            for score, i in zip(scores[0], indices[0]):
+                if i == -1:
+                    continue
+                doc = self.docstore._dict[self.index_to_docstore_id[i]]  # type: ignore
+                if filter.exact or filter(doc.metadata):
+                    docs.append((doc, score))
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            cmp = (
+                operator.ge
+                if self.distance_strategy
+                in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD)
+                else operator.le
+            )
+            docs = [(doc, score) for doc, score in docs if cmp(score, score_threshold)]
+        return docs[:k]
+
+    def _get_selector(self, plan) -> tuple:
+        if plan not in self._selectors:
+            ids = self.metadata_index.select(plan)
+            positions = np.fromiter((self.positions[id] for id in ids), dtype=np.int64, count=len(ids))
+            sel, bits = memory_index.selector(positions, self.index.ntotal)
+            self._selectors[plan] = (sel, bits, len(ids))
+        return self._selectors[plan]
+
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
@@ -60,6 +172,8 @@ class Memory:
         INSTRUMENTS = "instruments"
 
     index: dict[str, "MyFaiss"] = {}
+    # memory subdirs whose index is being migrated to ann
+    _migrating: set[str] = set()
 
     @staticmethod
     async def get(agent: Agent):
@@ -92,7 +206,9 @@ class Memory:
     @staticmethod
     async def reload(agent: Agent):
         memory_subdir = agent.config.memory_subdir or "default"
-        if Memory.index.get(memory_subdir):
+        if db := Memory.index.get(memory_subdir):
+            if db.wal:
+                db.wal.close()
             del Memory.index[memory_subdir]
         return await Memory.get(agent)
 
@@ -117,12 +233,6 @@ class Memory:
         # make sure embeddings and database directories exist
         os.makedirs(db_dir, exist_ok=True)
 
-        if in_memory:
-            store = InMemoryByteStore()
-        else:
-            os.makedirs(em_dir, exist_ok=True)
-            store = LocalFileStore(em_dir)
-
         embeddings_model = models.get_embedding_model(
             model_config.provider,
             model_config.name,
@@ -132,10 +242,14 @@ class Memory:
             model_config.provider + "_" + model_config.name
         )
 
+        # one cache file per model, shared by all memory subdirs, queries are cached too
+        if in_memory:
+            cache = embedding_cache.get_memory_cache(embedding_cache.MAX_ENTRIES)
+        else:
+            cache = embedding_cache.get_cache(em_dir, embeddings_model_id)
+
         # here we setup the embeddings model with the chosen cache storage
-        embedder = CacheBackedEmbeddings.from_bytes_store(
-            embeddings_model, store, namespace=embeddings_model_id
-        )
+        embedder = embedding_cache.CachedEmbeddings(embeddings_model, cache)
 
         # initial DB and docs variables
         db: MyFaiss | None = None
@@ -143,6 +257,10 @@ class Memory:
 
         created = False
 
+        # a pending save of this db has to reach the disk before it is loaded again
+        PersistenceService.get().flush(Memory._get_persistence_key(memory_subdir))
+        wal = MemoryWal(db_dir)
+
         # if db folder exists and is not empty:
         if os.path.exists(db_dir) and files.exists(db_dir, "index.faiss"):
             db = MyFaiss.load_local(
@@ -154,6 +272,9 @@ class Memory:
                 relevance_score_fn=Memory._cosine_normalizer,
             )  # type: ignore
 
+            # mutations since the last snapshot
+            Memory._replay_wal(db, wal)
+
             # if there is a mismatch in embeddings used, re-index the whole DB
             emb_ok = False
             emb_set_file = files.get_abs_path(db_dir, "embedding.json")
@@ -192,7 +313,8 @@ class Memory:
                     log_item.stream(progress="\nIndexing memories")
                 db.add_documents(documents=list(docs.values()), ids=list(docs.keys()))
 
-            # save DB
+            # save DB, the snapshot holds everything the log had
+            wal.clear()
             Memory._save_db_file(db, memory_subdir)
             # save meta file
             meta_file_path = files.get_abs_path(db_dir, "embedding.json")
@@ -208,6 +330,10 @@ class Memory:
 
             created = True
 
+        db.wal = wal
+        db.index_config = memory_index.load_config(db_dir)
+        memory_index.apply_params(db.index, db.index_config)
+        Memory._check_index(db, memory_subdir)
         return db, created
 
     def __init__(
@@ -342,6 +468,37 @@ class Memory:
             self._save_db()  # persist
         return removed
 
+    async def delete_documents_by_queries(
+        self, queries: list[str], threshold: float, filter: str = ""
+    ):
+        """Delete documents similar to any of the queries, embeds them in one batch and persists once."""
+        if not queries:
+            return []
+        comparator = Memory._get_comparator(filter) if filter else None
+        relevance = self.db._select_relevance_score_fn()
+        # batch embedding goes through the cache, inserting the same texts afterwards does not embed again
+        vectors = await self.db.embedding_function.aembed_documents(queries)  # type: ignore
+
+        k = 100
+        removed: dict[str, Document] = {}
+        for vector in vectors:
+            while True:
+                # in an executor, the search waits for the db lock while a save serializes the index
+                found = await self.db.asimilarity_search_with_score_by_vector(
+                    vector, k=k, filter=comparator
+                )
+                docs = [doc for doc, score in found if relevance(score) >= threshold]
+                document_ids = [doc.metadata["id"] for doc in docs]
+                if document_ids:
+                    await self.db.adelete(ids=document_ids)
+                    removed.update(zip(document_ids, docs))
+                if len(document_ids) < k:
+                    break
+
+        if removed:
+            self._save_db()  # persist
+        return list(removed.values())
+
     async def delete_documents_by_ids(self, ids: list[str]):
         # aget_by_ids is not yet implemented in faiss, need to do a workaround
         rem_docs = await self.db.aget_by_ids(
@@ -360,8 +517,17 @@ class Memory:
         ids = await self.insert_documents([doc])
         return ids[0]
 
+    async def insert_texts(self, texts: list[str], metadata: dict = {}):
+        """Insert many texts with the same metadata, embedded in one batch and persisted once."""
+        docs = [Document(text, metadata=dict(metadata)) for text in texts]
+        return await self.insert_documents(docs)
+
     async def insert_documents(self, docs: list[Document]):
-        ids = [self._generate_doc_id() for _ in range(len(docs))]
+        ids: list[str] = []
+        while len(ids) < len(docs):
+            id = self._generate_doc_id()
+            if id not in ids:
+                ids.append(id)
         timestamp = self.get_timestamp()
 
         if ids:
@@ -373,10 +539,19 @@ class Memory:
 
             await self.db.aadd_documents(documents=docs, ids=ids)
             self._save_db()  # persist
+            Memory._check_index(self.db, self.memory_subdir)
         return ids
 
     def _save_db(self):
-        Memory._save_db_file(self.db, self.memory_subdir)
+        # the mutations are already in the write-ahead log, the full snapshot waits until enough of them pile up
+        db, memory_subdir = self.db, self.memory_subdir
+        pending = db.wal.ops if db.wal else SNAPSHOT_OPS
+        PersistenceService.get().mark_dirty(
+            Memory._get_persistence_key(memory_subdir),
+            lambda: Memory._save_db_file(db, memory_subdir),
+            delay=0 if pending >= SNAPSHOT_OPS else SNAPSHOT_INTERVAL,
+            max_delay=SNAPSHOT_INTERVAL,
+        )
 
     def _generate_doc_id(self):
         while True:
@@ -386,21 +561,96 @@ class Memory:
             
 
     @staticmethod
-    def _save_db_file(db: MyFaiss, memory_subdir: str):
+    def _save_db_file(db: MyFaiss, memory_subdir: str) -> int:
         abs_dir = Memory._abs_db_dir(memory_subdir)
-        db.save_local(folder_path=abs_dir)
+        # serialized in memory (the same files save_local writes), inserts wait only for the copy, not the disk
+        with db.lock:
+            index = faiss.serialize_index(db.index).tobytes()
+            store = pickle.dumps((db.docstore, db.index_to_docstore_id))
+            if db.wal:
+                db.wal.start_snapshot()
+        # swap the new files in, a crash never leaves a half written index behind
+        size = files.write_file_atomic(os.path.join(abs_dir, "index.faiss"), index)
+        size += files.write_file_atomic(os.path.join(abs_dir, "index.pkl"), store)
+        if db.wal:
+            db.wal.finish_snapshot()
+        return size
+
+    @staticmethod
+    def _replay_wal(db: MyFaiss, wal: MemoryWal):
+        adds: list[dict] = []
+
+        def add_pending():
+            # the snapshot may already have some of them (crash before the log was dropped)
+            new = [r for r in adds if r["id"] not in db.docstore._dict]  # type: ignore
+            if new:
+                db.add_embeddings(
+                    text_embeddings=[(r["text"], r["vector"]) for r in new],
+                    metadatas=[r["metadata"] for r in new],
+                    ids=[r["id"] for r in new],
+                )
+            adds.clear()
+
+        ops = 0
+        for record in wal.read():
+            ops += 1
+            if record["op"] == "add":
+                adds.append(record)
+            elif record["op"] == "delete":
+                add_pending()
+                ids = [id for id in record["ids"] if id in db.docstore._dict]  # type: ignore
+                if ids:
+                    db.delete(ids)
+        add_pending()
+        wal.ops = ops
+        if ops:
+            PrintStyle.standard(f"Replayed {ops} memory changes since the last snapshot")
+
+    @staticmethod
+    def _check_index(db: MyFaiss, memory_subdir: str):
+        # large dbs move from the exact flat index to ivf, built in the background while the flat one serves
+        if memory_subdir in Memory._migrating or not memory_index.needs_ann(db.index, db.index_config):
+            return
+        Memory._migrating.add(memory_subdir)
+        threading.Thread(
+            target=Memory._migrate_index, args=(db, memory_subdir), daemon=True, name="MemoryIndex"
+        ).start()
+
+    @staticmethod
+    def _migrate_index(db: MyFaiss, memory_subdir: str):
+        try:
+            for _ in range(3):
+                with db.lock:
+                    if not memory_index.is_flat(db.index):
+                        return
+                    metric, start, deletes = db.index.metric_type, db.index.ntotal, db.deletes
+                    vectors = memory_index.get_vectors(db.index)
+                PrintStyle.standard(f"Building ANN index for {start} memories in '/{memory_subdir}'...")
+                index = memory_index.build_ivf(vectors, db.index_config, metric)
+                with db.lock:
+                    if db.deletes != deletes:
+                        continue  # positions changed meanwhile, vectors added since are appended
+                    index.add(memory_index.get_vectors(db.index, start))
+                    db.index = index
+                PersistenceService.get().mark_dirty(
+                    Memory._get_persistence_key(memory_subdir),
+                    lambda: Memory._save_db_file(db, memory_subdir),
+                    delay=0,
+                )
+                return
+        except Exception as e:
+            PrintStyle.error(f"Failed to build ANN index for '/{memory_subdir}', keeping the flat index: {e}")
+        finally:
+            Memory._migrating.discard(memory_subdir)
+
+    @staticmethod
+    def _get_persistence_key(memory_subdir: str) -> str:
+        return f"memory:{memory_subdir}"
 
     @staticmethod
     def _get_comparator(condition: str):
-        def comparator(data: dict[str, Any]):
-            try:
-                result = simple_eval(condition, names=data)
-                return result
-            except Exception as e:
-                PrintStyle.error(f"Error evaluating condition: {e}")
-                return False
-
-        return comparator
+        # parsed once, the db uses its plan to preselect documents by metadata
+        return memory_filter.compile(condition)
 
     @staticmethod
     def _score_normalizer(val: float) -> float:
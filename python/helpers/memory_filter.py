@@ -0,0 +1,119 @@
+import ast
+import threading
+from functools import lru_cache
+from typing import Any
+
+from simpleeval import SimpleEval
+
+from python.helpers.print_style import PrintStyle
+
+# metadata keys indexed value -> ids, conditions on them are answered before the vector search
+INDEXED_KEYS = ("area", "knowledge_source", "source_file", "file_type")
+
+# a plan is ("eq", key, values) or ("and" | "or", plans), it selects the ids that can match
+# (simpleeval has no tuple or list literals, "in" conditions are left to the evaluation)
+Plan = tuple
+
+
+class MetadataIndex:
+    """Ids of the documents per value of the indexed metadata keys."""
+
+    def __init__(self, keys: tuple[str, ...] = INDEXED_KEYS):
+        self.keys = keys
+        self._ids: dict[str, dict[Any, set[str]]] = {key: {} for key in keys}
+
+    def add(self, id: str, metadata: dict[str, Any]):
+        for key in self.keys:
+            if key in metadata:
+                try:
+                    self._ids[key].setdefault(metadata[key], set()).add(id)
+                except TypeError:
+                    pass  # unhashable, never equal to the constants of a plan
+
+    def remove(self, id: str, metadata: dict[str, Any]):
+        for key in self.keys:
+            try:
+                ids = self._ids[key].get(metadata.get(key))
+            except TypeError:
+                continue
+            if ids:
+                ids.discard(id)
+                if not ids:
+                    del self._ids[key][metadata[key]]
+
+    def select(self, plan: Plan) -> set[str]:
+        op = plan[0]
+        if op == "eq":
+            values = self._ids[plan[1]]
+            return set().union(*(values.get(value, ()) for value in plan[2]))
+        parts = [self.select(part) for part in plan[1]]
+        if op == "and":
+            return set.intersection(*parts)
+        return set().union(*parts)
+
+
+class MemoryFilter:
+    """
+    Metadata condition (simpleeval syntax) parsed once and evaluated per document.
+    Comparisons of indexed keys with constants are planned so the index can preselect the documents.
+    """
+
+    def __init__(self, condition: str):
+        self.condition = condition
+        self.error: Exception | None = None
+        self.plan: Plan | None = None
+        # the plan selects exactly the matching documents, no evaluation needed
+        self.exact = False
+        self._local = threading.local()
+        try:
+            self._parsed = SimpleEval.parse(condition)
+        except Exception as e:
+            self.error = e
+            return
+        node = self._parsed.value if isinstance(self._parsed, ast.Expr) else self._parsed
+        self.plan, self.exact = _plan(node)
+
+    def __call__(self, metadata: dict[str, Any]):
+        if self.error:
+            PrintStyle.error(f"Error evaluating condition: {self.error}")
+            return False
+        evaluator = getattr(self._local, "evaluator", None)
+        if evaluator is None:
+            evaluator = self._local.evaluator = SimpleEval()
+        evaluator.names = metadata
+        try:
+            return evaluator.eval(self.condition, previously_parsed=self._parsed)
+        except Exception as e:
+            PrintStyle.error(f"Error evaluating condition: {e}")
+            return False
+
+
+@lru_cache(maxsize=256)
+def compile(condition: str) -> MemoryFilter:
+    return MemoryFilter(condition)
+
+
+def _plan(node: ast.AST) -> tuple[Plan | None, bool]:
+    if isinstance(node, ast.BoolOp):
+        parts = [_plan(value) for value in node.values]
+        exact = all(plan and part_exact for plan, part_exact in parts)
+        plans = tuple(plan for plan, _ in parts if plan)
+        if isinstance(node.op, ast.And):
+            # any planned part narrows the candidates, the rest is evaluated on them
+            return (("and", plans) if plans else None), exact
+        if len(plans) < len(parts):
+            return None, False
+        return ("or", plans), exact
+
+    if isinstance(node, ast.Compare) and len(node.ops) == 1:
+        left, op, right = node.left, node.ops[0], node.comparators[0]
+        if isinstance(op, ast.Eq):
+            if isinstance(right, ast.Name):
+                left, right = right, left
+            if _is_key(left) and isinstance(right, ast.Constant):
+                return ("eq", left.id, (right.value,)), True  # type: ignore
+    return None, False
+
+
+def _is_key(node: ast.AST) -> bool:
+    return isinstance(node, ast.Name) and node.id in INDEXED_KEYS
@@ -0,0 +1,107 @@
+import json
+import math
+import os
+from dataclasses import dataclass, fields
+
+import faiss
+import numpy as np
+
+# optional per memory subdir, e.g. {"type": "ivf", "nprobe": 32}
+CONFIG_FILE = "index.json"
+
+
+@dataclass
+class IndexConfig:
+    # flat (exact), ivf, or auto: flat until the db has threshold vectors, then ivf
+    type: str = "auto"
+    threshold: int = 50000
+    # inverted lists of the ivf index, 0 picks 4 * sqrt(vectors)
+    nlist: int = 0
+    # lists searched per query, higher is slower with better recall
+    nprobe: int = 32
+
+
+def load_config(db_dir: str) -> IndexConfig:
+    path = os.path.join(db_dir, CONFIG_FILE)
+    if not os.path.exists(path):
+        return IndexConfig()
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    names = {f.name for f in fields(IndexConfig)}
+    return IndexConfig(**{k: v for k, v in data.items() if k in names})
+
+
+def is_flat(index: faiss.Index) -> bool:
+    return isinstance(index, faiss.IndexFlat)
+
+
+def needs_ann(index: faiss.Index, config: IndexConfig) -> bool:
+    if not is_flat(index) or config.type == "flat":
+        return False
+    return config.type == "ivf" or index.ntotal >= config.threshold
+
+
+def get_vectors(index: faiss.Index, start: int = 0, end: int | None = None) -> np.ndarray:
+    end = index.ntotal if end is None else end
+    if end <= start:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(start, end - start)
+
+
+def build_ivf(vectors: np.ndarray, config: IndexConfig, metric: int = faiss.METRIC_INNER_PRODUCT) -> faiss.Index:
+    """Train an ivf index on the vectors and add them, in the same order (positions stay the same)."""
+    count, dim = vectors.shape
+    nlist = config.nlist or max(1, int(4 * math.sqrt(count)))
+    nlist = min(nlist, max(1, count))
+    quantizer = faiss.IndexFlat(dim, metric)
+    index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+    # a sample is enough to place the centroids (faiss asks for 39 points per list)
+    sample = vectors
+    if count > nlist * 40:
+        sample = vectors[np.random.default_rng(0).choice(count, nlist * 40, replace=False)]
+    index.train(sample)
+    index.add(vectors)
+    apply_params(index, config)
+    return index
+
+
+def apply_params(index: faiss.Index, config: IndexConfig):
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = max(1, min(config.nprobe, index.nlist))
+
+
+def compact_ids(index: faiss.Index, removed: list[int]):
+    """
+    After remove_ids a flat index renumbers the positions that follow and the langchain store relies on it.
+    An ivf index keeps the ids it was given, shift them the same way.
+    """
+    if not isinstance(index, faiss.IndexIVF) or not removed:
+        return
+    removed_sorted = np.sort(np.asarray(removed, dtype=np.int64))
+    invlists = index.invlists
+    for list_no in range(index.nlist):
+        size = invlists.list_size(list_no)
+        if not size:
+            continue
+        ptr = invlists.get_ids(list_no)
+        ids = faiss.rev_swig_ptr(ptr, size)
+        ids -= np.searchsorted(removed_sorted, ids)
+        invlists.release_ids(list_no, ptr)
+
+
+def selector(positions: np.ndarray, ntotal: int) -> tuple[faiss.IDSelector, np.ndarray]:
+    """Bitmap selector of the index positions, the bits have to stay referenced while it is used."""
+    mask = np.zeros(ntotal, dtype=bool)
+    mask[positions] = True
+    bits = np.packbits(mask, bitorder="little")
+    # faiss takes the size of the bitmap in bytes
+    return faiss.IDSelectorBitmap(len(bits), faiss.swig_ptr(bits)), bits
+
+
+def search_params(index: faiss.Index, sel: faiss.IDSelector, selected: int) -> faiss.SearchParameters:
+    if isinstance(index, faiss.IndexIVF):
+        # a selective filter leaves few matches per list, probe more lists to still find k of them
+        scale = index.ntotal / max(1, selected)
+        nprobe = min(index.nlist, int(index.nprobe * math.sqrt(scale)))
+        return faiss.SearchParametersIVF(sel=sel, nprobe=max(1, nprobe))
+    return faiss.SearchParameters(sel=sel)
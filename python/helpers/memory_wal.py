@@ -0,0 +1,143 @@
+import base64
+import json
+import os
+import threading
+from array import array
+from typing import Any, Iterable, Iterator
+
+WAL_FILE = "index.wal"
+# mutations of a snapshot being written, replayed until the snapshot is on disk
+SNAPSHOT_WAL_FILE = "index.wal.snapshot"
+
+
+class MemoryWal:
+    """
+    Append-only log of the mutations of a memory db since its last snapshot.
+    Every insert or delete appends a few lines, the log is replayed when the db is loaded.
+    """
+
+    def __init__(self, folder: str):
+        self.path = os.path.join(folder, WAL_FILE)
+        self.snapshot_path = os.path.join(folder, SNAPSHOT_WAL_FILE)
+        # mutations not in a snapshot yet
+        self.ops = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def log_add(
+        self,
+        ids: list[str],
+        texts: list[str],
+        embeddings: Iterable[Iterable[float]],
+        metadatas: list[dict] | None = None,
+    ):
+        records = [
+            {
+                "op": "add",
+                "id": id,
+                "text": text,
+                "metadata": metadatas[i] if metadatas else {},
+                "vector": _encode_vector(embedding),
+            }
+            for i, (id, text, embedding) in enumerate(zip(ids, texts, embeddings))
+        ]
+        self._append(records)
+
+    def log_delete(self, ids: list[str]):
+        self._append([{"op": "delete", "ids": list(ids)}])
+
+    def read(self) -> Iterator[dict[str, Any]]:
+        """Logged mutations in order, vectors decoded to lists of floats."""
+        for path in (self.snapshot_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # the tail of a write cut off by a crash
+                    if record.get("op") == "add":
+                        record["vector"] = _decode_vector(record["vector"])
+                    yield record
+
+    def start_snapshot(self):
+        """Called while the db is locked for serialization, later mutations go to a fresh log."""
+        with self._lock:
+            self._close_file()
+            if os.path.exists(self.path):
+                if os.path.exists(self.snapshot_path):
+                    # the previous snapshot was never written, its mutations are still needed
+                    _cut_torn_tail(self.snapshot_path)
+                    with open(self.path, "rb") as src, open(self.snapshot_path, "ab") as dst:
+                        dst.write(src.read())
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self.snapshot_path)
+            self.ops = 0
+
+    def finish_snapshot(self):
+        with self._lock:
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+
+    def clear(self):
+        """Drop the log, the db was replaced by one that does not need it."""
+        with self._lock:
+            self._close_file()
+            for path in (self.path, self.snapshot_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.ops = 0
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+
+    def _append(self, records: list[dict[str, Any]]):
+        if not records:
+            return
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records).encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                # records appended after a line cut off by a crash would be lost with it on replay
+                _cut_torn_tail(self.path)
+                self._file = open(self.path, "ab")
+            self._file.write(data)
+            self._file.flush()
+            self.ops += len(records)
+
+    def _close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def _cut_torn_tail(path: str):
+    """Truncate the file after its last complete line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+
+
+def _encode_vector(vector: Iterable[float]) -> str:
+    # faiss keeps float32, the vector round-trips exactly
+    return base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+
+
+def _decode_vector(data: str) -> list[float]:
+    vector = array("f")
+    vector.frombytes(base64.b64decode(data))
+    return vector.tolist()
@@ -1,10 +1,14 @@
 from collections import OrderedDict
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 import uuid
 from agent import Agent, AgentConfig, AgentContext, AgentContextType
-from python.helpers import files, history
+from python.helpers import blobs, files, history
+from python.helpers.persistence import PersistenceService
+from python.helpers.strings import sanitize_string
 import json
+import os
+import threading
 from initialize import initialize_agent
 
 from python.helpers.log import Log, LogItem
@@ -12,6 +16,9 @@ from python.helpers.log import Log, LogItem
 CHATS_FOLDER = "tmp/chats"
 LOG_SIZE = 1000
 CHAT_FILE_NAME = "chat.json"
+JOURNAL_FILE_NAME = "chat.journal"
+# the journal is compacted into chat.json once it outgrows the snapshot (and at least this size)
+JOURNAL_COMPACT_MIN_SIZE = 512 * 1024
 
 
 def get_chat_folder_path(ctxid: str):
@@ -29,17 +36,25 @@ def get_chat_folder_path(ctxid: str):
 def get_chat_msg_files_folder(ctxid: str):
     return files.get_abs_path(get_chat_folder_path(ctxid), "messages")
 
-def save_tmp_chat(context: AgentContext):
-    """Save context to the chats folder"""
+def save_tmp_chat(context: AgentContext, compact: bool = False):
+    """Save context to the chats folder, appends changes to the chat journal unless a compaction is due"""
     # Skip saving BACKGROUND contexts as they should be ephemeral
     if context.type == AgentContextType.BACKGROUND:
         return
 
-    path = _get_chat_file_path(context.id)
-    files.make_dirs(path)
-    data = _serialize_context(context)
-    js = _safe_json_serialize(data, ensure_ascii=False)
-    files.write_file(path, js)
+    # changes are serialized here, the files are written later by the persistence thread
+    with _journals_lock:
+        journal = _journals.get(context.id)
+        if journal and not compact:
+            records = journal.collect(context)
+            if journal.size + sum(len(r) for r in records) < journal.compact_size:
+                journal.append(records)
+            else:
+                journal = None
+        if not journal:
+            # first save in this process, requested or journal too big - write a new snapshot
+            journal = _journals[context.id] = _ChatJournal.compact(context)
+    PersistenceService.get().mark_dirty(_get_persistence_key(context.id), journal.write)
 
 
 def save_tmp_chats():
@@ -60,14 +75,23 @@ def load_tmp_chats():
         json_files.append(_get_chat_file_path(folder_name))
 
     ctxids = []
+    failed = False
     for file in json_files:
         try:
             js = files.read_file(file)
             data = json.loads(js)
+            # replay changes saved after the snapshot
+            _replay_journal(data, os.path.join(os.path.dirname(file), JOURNAL_FILE_NAME))
+            data.pop("journal", None)
             ctx = _deserialize_context(data)
             ctxids.append(ctx.id)
         except Exception as e:
+            failed = True
             print(f"Error loading chat {file}: {e}")
+    # loaded chats registered their blob references, the rest is left over from removed chats
+    # (unless a chat failed to load, its blobs are kept then)
+    if not failed:
+        blobs.collect_garbage()
     return ctxids
 
 
@@ -91,6 +115,8 @@ def load_json_chats(jsons: list[str]):
         data = json.loads(js)
         if "id" in data:
             del data["id"]  # remove id to get new
+        # exported images are inline, move them to the blob store (deserializing references them)
+        _map_histories(data, blobs.store_data_urls)
         ctx = _deserialize_context(data)
         ctxids.append(ctx.id)
     return ctxids
@@ -99,12 +125,25 @@ def load_json_chats(jsons: list[str]):
 def export_json_chat(context: AgentContext):
     """Export context as JSON string"""
     data = _serialize_context(context)
+    # the export may be imported elsewhere or after the blobs are gone, images go inline
+    _map_histories(data, blobs.inline_refs)
     js = _safe_json_serialize(data, ensure_ascii=False)
     return js
 
 
+def _map_histories(data: dict[str, Any], convert: Callable[[Any], Any]):
+    for agent in data.get("agents", []):
+        history = agent.get("history")
+        if history and ("data:" in history or blobs.REF_PREFIX in history):
+            agent["history"] = json.dumps(convert(json.loads(history)), ensure_ascii=False)
+
+
 def remove_chat(ctxid):
     """Remove a chat or task context"""
+    with _journals_lock:
+        _journals.pop(ctxid, None)
+    PersistenceService.get().cancel(_get_persistence_key(ctxid))
+    blobs.release(ctxid)
     path = get_chat_folder_path(ctxid)
     files.delete_dir(path)
 
@@ -123,6 +162,14 @@ def _serialize_context(context: AgentContext):
         agents.append(_serialize_agent(agent))
         agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
 
+    return {
+        **_serialize_context_meta(context),
+        "agents": agents,
+        "log": _serialize_log(context.log),
+    }
+
+
+def _serialize_context_meta(context: AgentContext):
     return {
         "id": context.id,
         "name": context.name,
@@ -137,16 +184,14 @@ def _serialize_context(context: AgentContext):
             if context.last_message
             else datetime.fromtimestamp(0).isoformat()
         ),
-        "agents": agents,
         "streaming_agent": (
             context.streaming_agent.number if context.streaming_agent else 0
         ),
-        "log": _serialize_log(context.log),
     }
 
 
 def _serialize_agent(agent: Agent):
-    data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
+    data = _serialize_agent_data(agent)
 
     history = agent.history.serialize()
 
@@ -157,6 +202,10 @@ def _serialize_agent(agent: Agent):
     }
 
 
+def _serialize_agent_data(agent: Agent):
+    return {k: v for k, v in agent.data.items() if not k.startswith("_")}
+
+
 def _serialize_log(log: Log):
     return {
         "guid": log.guid,
@@ -265,12 +314,189 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
                 temp=item_data.get("temp", False),
             )
         )
-        log.updates.append(i)
+        log.record_update(i)
         i += 1
 
     return log
 
 
+class _ChatJournal:
+    # what was already written for one chat, so the next save only appends what changed
+
+    def __init__(self, ctxid: str, snapshot_id: str, snapshot_size: int):
+        self.ctxid = ctxid
+        self.id = snapshot_id
+        self.size = 0
+        self.compact_size = max(JOURNAL_COMPACT_MIN_SIZE, snapshot_size)
+        self.context: dict[str, Any] = {}
+        self.agents = ""
+        # agent number -> (history object, revision, current topic, messages written)
+        self.histories: dict[int, tuple[history.History, int, history.Topic, int]] = {}
+        self.log: tuple[str, int] = ("", 0)  # log guid, log version written
+        self.pending: list[tuple[str, str]] = []  # ("snapshot" | "append", text) not written yet
+
+    @staticmethod
+    def compact(context: AgentContext) -> "_ChatJournal":
+        data = _serialize_context(context)
+        data["journal"] = snapshot_id = str(uuid.uuid4())
+        js = _safe_json_serialize(data, ensure_ascii=False)
+
+        # start a new journal for this snapshot, the old one is ignored from now on even if this fails
+        journal = _ChatJournal(context.id, snapshot_id, len(js))
+        journal.collect(context)
+        journal.pending.append(("snapshot", js))
+        return journal
+
+    def collect(self, context: AgentContext) -> list[str]:
+        records = []
+
+        meta = _serialize_context_meta(context)
+        if meta != self.context:
+            records.append({"t": "context", "context": meta})
+            self.context = meta
+
+        agents = []
+        agent = context.agent0
+        while agent:
+            agents.append(agent)
+            agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        agents_js = _safe_json_serialize(
+            [{"number": a.number, "data": _serialize_agent_data(a)} for a in agents], ensure_ascii=False
+        )
+        if agents_js != self.agents:
+            records.append({"t": "agents", "agents": json.loads(agents_js)})
+            self.agents = agents_js
+            self.histories = {n: h for n, h in self.histories.items() if n < len(agents)}
+
+        for agent in agents:
+            hist = agent.history
+            written = self.histories.get(agent.number)
+            if written and written[0] is hist and written[1] == hist.revision and written[2] is hist.current:
+                # only messages were added to the current topic
+                if len(hist.current.messages) > written[3]:
+                    records.append({
+                        "t": "messages",
+                        "agent": agent.number,
+                        "counter": hist.counter,
+                        "messages": [m.to_dict() for m in hist.current.messages[written[3]:]],
+                    })
+            else:
+                records.append({"t": "history", "agent": agent.number, "history": hist.to_dict()})
+            self.histories[agent.number] = (hist, hist.revision, hist.current, len(hist.current.messages))
+
+        log = context.log
+        guid, written_version = self.log
+        version = log.version
+        if guid != log.guid or written_version > version:
+            records.append({"t": "log", **_serialize_log(log), "reset": True})
+        elif written_version < version:
+            numbers = log.get_updated_since(written_version, version)
+            records.append({
+                "t": "log",
+                "guid": log.guid,
+                "logs": [log.logs[no].output() for no in numbers],
+                "progress": log.progress,
+                "progress_no": log.progress_no,
+            })
+        self.log = (log.guid, version)
+
+        return [_json_line(record) for record in records]
+
+    def append(self, records: list[str]):
+        if not records:
+            return
+        text = "".join(records)
+        self.pending.append(("append", text))
+        self.size += len(text)
+
+    def write(self) -> int:
+        with _journals_lock:
+            pending, self.pending = self.pending, []
+        written = 0
+        try:
+            for kind, text in pending:
+                if kind == "snapshot":
+                    written += files.write_file_atomic(_get_chat_file_path(self.ctxid), text)
+                    text = _json_line({"t": "snapshot", "id": self.id})
+                    written += files.write_file_atomic(_get_journal_file_path(self.ctxid), text)
+                else:
+                    with open(_get_journal_file_path(self.ctxid), "a", encoding="utf-8") as f:
+                        f.write(text)
+                    written += len(text)
+        except Exception:
+            # records are lost, the next save writes a full snapshot instead
+            with _journals_lock:
+                if _journals.get(self.ctxid) is self:
+                    del _journals[self.ctxid]
+            raise
+        return written
+
+
+_journals: dict[str, _ChatJournal] = {}
+_journals_lock = threading.RLock()
+
+
+def _get_persistence_key(ctxid: str):
+    return f"chat:{ctxid}"
+
+
+def _get_journal_file_path(ctxid: str):
+    return files.get_abs_path(CHATS_FOLDER, ctxid, JOURNAL_FILE_NAME)
+
+
+def _json_line(record: dict) -> str:
+    return sanitize_string(json.dumps(record, ensure_ascii=False)) + "\n"
+
+
+def _replay_journal(data: dict[str, Any], path: str):
+    """Apply journal records written after the snapshot in data (chat.json format) to it."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            break  # incomplete last record after a crash
+    if not records or records[0].get("t") != "snapshot" or records[0].get("id") != data.get("journal"):
+        return  # journal of another snapshot
+
+    histories: dict[int, dict[str, Any]] = {}
+    for record in records[1:]:
+        kind = record["t"]
+        if kind == "context":
+            data.update(record["context"])
+        elif kind == "agents":
+            previous = {agent["number"]: agent for agent in data.get("agents", [])}
+            data["agents"] = [
+                {**agent, "history": previous.get(agent["number"], {}).get("history", "")}
+                for agent in record["agents"]
+            ]
+        elif kind == "history":
+            histories[record["agent"]] = record["history"]
+        elif kind == "messages":
+            number = record["agent"]
+            if number not in histories:
+                agent = next(a for a in data["agents"] if a["number"] == number)
+                histories[number] = json.loads(agent["history"])
+            histories[number]["counter"] = record["counter"]
+            histories[number]["current"]["messages"] += record["messages"]
+        elif kind == "log":
+            log = data.setdefault("log", {})
+            if record.pop("reset", False) or log.get("guid") != record["guid"]:
+                log["logs"] = []
+            items = {item["no"]: item for item in log.get("logs", [])}
+            items.update((item["no"], item) for item in record.pop("logs"))
+            log["logs"] = [items[no] for no in sorted(items)][-LOG_SIZE:]
+            log.update((k, v) for k, v in record.items() if k != "t")
+
+    for agent in data.get("agents", []):
+        if agent["number"] in histories:
+            agent["history"] = history._json_dumps(histories[agent["number"]])
+
+
 def _safe_json_serialize(obj, **kwargs):
     def serializer(o):
         if isinstance(o, dict):
@@ -0,0 +1,167 @@
+import atexit
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from python.helpers.print_style import PrintStyle
+
+# seconds a dirty object waits for more changes before it is written
+WRITE_DELAY = 1.0
+# an object that keeps changing is still written at least this often
+MAX_WRITE_DELAY = 10.0
+
+# a writer persists the current state of one object and returns the number of bytes written
+Writer = Callable[[], "int | None"]
+
+
+@dataclass
+class _Job:
+    writer: Writer
+    due: float
+    deadline: float
+    marked: float
+
+
+class PersistenceService:
+    """
+    Writes dirty objects (chats, scheduler tasks, memory indexes) on a dedicated thread.
+    Every mark of the same key within the delay window is coalesced into one write of the latest writer.
+    """
+
+    _instance: "PersistenceService | None" = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, delay: float = WRITE_DELAY, max_delay: float = MAX_WRITE_DELAY):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._jobs: dict[str, _Job] = {}
+        self._writing: set[str] = set()
+        self._cond = threading.Condition()
+        # held while writers run, so a key is never written by two threads or out of order
+        self._write_lock = threading.RLock()
+        self._running = True
+        self._stats = {
+            "marks": 0,
+            "writes": 0,
+            "errors": 0,
+            "bytes": 0,
+            "write_time": 0.0,
+            "max_write_time": 0.0,
+            "wait_time": 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, daemon=True, name="Persistence")
+        self._thread.start()
+
+    @classmethod
+    def get(cls) -> "PersistenceService":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.shutdown)
+            return cls._instance
+
+    def mark_dirty(self, key: str, writer: Writer, delay: float | None = None, max_delay: float | None = None):
+        now = time.monotonic()
+        delay = self.delay if delay is None else delay
+        max_delay = self.max_delay if max_delay is None else max_delay
+        with self._cond:
+            self._stats["marks"] += 1
+            job = self._jobs.get(key)
+            if job:
+                job.writer = writer
+                job.due = min(now + delay, job.deadline)
+            else:
+                self._jobs[key] = _Job(writer, now + delay, now + max_delay, now)
+            self._cond.notify()
+        if not self._running:
+            self.flush(key)
+
+    def is_dirty(self, key: str) -> bool:
+        # pending or being written right now, the file on disk may not have the latest state yet
+        with self._cond:
+            return key in self._jobs or key in self._writing
+
+    def flush(self, key: str | None = None):
+        """Write pending changes now, all of them or the ones of a single key, and wait for writes in progress."""
+        with self._write_lock:
+            with self._cond:
+                if key is None:
+                    jobs = list(self._jobs.items())
+                    self._jobs.clear()
+                else:
+                    job = self._jobs.pop(key, None)
+                    jobs = [(key, job)] if job else []
+                self._writing.update(key for key, _ in jobs)
+            self._write(jobs)
+
+    def cancel(self, key: str):
+        """Drop pending changes of a key (the object was deleted), waits for a write in progress."""
+        with self._write_lock:
+            with self._cond:
+                self._jobs.pop(key, None)
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self.flush()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            pending = list(self._jobs)
+        writes = stats["writes"]
+        return {
+            "queue_depth": len(pending),
+            "pending": pending,
+            "marks": stats["marks"],
+            "writes": writes,
+            "coalesced": max(0, stats["marks"] - writes - len(pending)),
+            "errors": stats["errors"],
+            "bytes_written": stats["bytes"],
+            "avg_write_time": stats["write_time"] / writes if writes else 0.0,
+            "max_write_time": stats["max_write_time"],
+            "avg_wait_time": stats["wait_time"] / writes if writes else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                if not self._jobs:
+                    self._cond.wait()
+                    continue
+                wait = min(job.due for job in self._jobs.values()) - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            with self._write_lock:
+                with self._cond:
+                    now = time.monotonic()
+                    jobs = [(key, job) for key, job in self._jobs.items() if job.due <= now]
+                    for key, _ in jobs:
+                        del self._jobs[key]
+                    self._writing.update(key for key, _ in jobs)
+                self._write(jobs)
+
+    def _write(self, jobs: list[tuple[str, _Job]]):
+        for key, job in jobs:
+            start = time.monotonic()
+            try:
+                size = job.writer() or 0
+            except Exception as e:
+                with self._cond:
+                    self._writing.discard(key)
+                    self._stats["errors"] += 1
+                PrintStyle.error(f"Failed to persist {key}: {e}")
+                continue
+            spent = time.monotonic() - start
+            with self._cond:
+                self._writing.discard(key)
+                self._stats["writes"] += 1
+                self._stats["bytes"] += size
+                self._stats["write_time"] += spent
+                self._stats["max_write_time"] = max(self._stats["max_write_time"], spent)
+                self._stats["wait_time"] += start - job.marked
@@ -1,11 +1,32 @@
-import os, webcolors, html
+import webcolors, html
 import sys
-from datetime import datetime
-from . import files
+import threading
+from functools import lru_cache
+from . import files, dotenv
+from .log_writer import LogWriter
+
+# set to false (headless/production) to skip rendering and writing the html log
+HTML_LOG_ENV = "PRINT_HTML_LOG"
+
+
+@lru_cache(maxsize=256)
+def _color_to_rgb(color: str) -> tuple[int, int, int] | None:
+    try:
+        if color.startswith("#") and len(color) == 7:
+            return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+        rgb_color = webcolors.name_to_rgb(color)
+        return rgb_color.red, rgb_color.green, rgb_color.blue
+    except ValueError:
+        return None
+
 
 class PrintStyle:
     last_endline = True
     log_file_path = None
+    # None until the first PrintStyle reads HTML_LOG_ENV, set before that to override it
+    html_log: bool | None = None
+    _writer: LogWriter | None = None
+    _writer_lock = threading.Lock()
 
     def __init__(self, bold=False, italic=False, underline=False, font_color="default", background_color="default", padding=False, log_only=False):
         self.bold = bold
@@ -17,30 +38,31 @@ class PrintStyle:
         self.padding_added = False  # Flag to track if padding was added
         self.log_only = log_only
 
-        if PrintStyle.log_file_path is None:
-            logs_dir = files.get_abs_path("logs")
-            os.makedirs(logs_dir, exist_ok=True)
-            log_filename = datetime.now().strftime("log_%Y%m%d_%H%M%S.html")
-            PrintStyle.log_file_path = os.path.join(logs_dir, log_filename)
-            with open(PrintStyle.log_file_path, "w") as f:
-                f.write("<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n")
+        if PrintStyle.html_log is not False and PrintStyle._writer is None:
+            PrintStyle._init_html_log()
+
+    @staticmethod
+    def _init_html_log():
+        with PrintStyle._writer_lock:
+            if PrintStyle.html_log is None:
+                PrintStyle.html_log = str(dotenv.get_dotenv_value(HTML_LOG_ENV, "true")).strip().lower() not in ("false", "0", "no", "off")
+            if PrintStyle.html_log and PrintStyle._writer is None:
+                PrintStyle._writer = LogWriter(
+                    files.get_abs_path("logs"),
+                    header="<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n",
+                    footer="</pre></body></html>",
+                )
+                PrintStyle.log_file_path = PrintStyle._writer.path
 
     def _get_rgb_color_code(self, color, is_background=False):
-        try:
-            if color.startswith("#") and len(color) == 7:
-                r = int(color[1:3], 16)
-                g = int(color[3:5], 16)
-                b = int(color[5:7], 16)
-            else:
-                rgb_color = webcolors.name_to_rgb(color)
-                r, g, b = rgb_color.red, rgb_color.green, rgb_color.blue
-
-            if is_background:
-                return f"\033[48;2;{r};{g};{b}m", f"background-color: rgb({r}, {g}, {b});"
-            else:
-                return f"\033[38;2;{r};{g};{b}m", f"color: rgb({r}, {g}, {b});"
-        except ValueError:
+        rgb = _color_to_rgb(color)
+        if rgb is None:
             return "", ""
+        r, g, b = rgb
+        if is_background:
+            return f"\033[48;2;{r};{g};{b}m", f"background-color: rgb({r}, {g}, {b});"
+        else:
+            return f"\033[38;2;{r};{g};{b}m", f"color: rgb({r}, {g}, {b});"
 
     def _get_styled_text(self, text):
         start = ""
@@ -81,14 +103,14 @@ class PrintStyle:
             self.padding_added = True
 
     def _log_html(self, html):
-        with open(PrintStyle.log_file_path, "a", encoding='utf-8') as f: # type: ignore # add encoding='utf-8'
-            f.write(html)
+        # only queued, the writer thread does the disk io
+        if PrintStyle._writer:
+            PrintStyle._writer.write(html)
 
     @staticmethod
     def _close_html_log():
-        if PrintStyle.log_file_path:
-            with open(PrintStyle.log_file_path, "a") as f:
-                f.write("</pre></body></html>")
+        if PrintStyle._writer:
+            PrintStyle._writer.close()
 
     def get(self, *args, sep=' ', **kwargs):
         text = sep.join(map(str, args))
@@ -102,7 +124,8 @@ class PrintStyle:
             # If masking fails, proceed without masking to avoid breaking functionality
             pass
         
-        return text, self._get_styled_text(text), self._get_html_styled_text(text)
+        html_text = self._get_html_styled_text(text) if PrintStyle._writer else ""
+        return text, self._get_styled_text(text), html_text
 
     def print(self, *args, sep=' ', **kwargs):
         self._add_padding_if_needed()
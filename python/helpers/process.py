@@ -2,6 +2,7 @@ import os
 import sys
 from python.helpers import runtime
 from python.helpers.print_style import PrintStyle
+from python.helpers.persistence import PersistenceService
 
 _server = None
 
@@ -28,6 +29,9 @@ def reload():
 
 def restart_process():
     PrintStyle.standard("Restarting process...")
+    # exec replaces the process without running atexit handlers, write pending changes first
+    PersistenceService.get().flush()
+    PrintStyle._close_html_log()
     python = sys.executable
     os.execv(python, [python] + sys.argv)
 
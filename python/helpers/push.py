@@ -0,0 +1,76 @@
+import itertools
+import threading
+import time
+from typing import Any
+
+# source published when the chat/task list may have changed (context added, removed, renamed, log progress...)
+CONTEXTS = "contexts"
+# source published when the scheduler task list was saved
+TASKS = "tasks"
+
+
+class Subscription:
+    """Sources a push client watches, changes are coalesced until the client asks for them."""
+
+    def __init__(self, sources: set[Any]):
+        self.sources = sources
+        self._changed: set[Any] = set()
+        self._event = threading.Event()
+
+    def wait(self, timeout: float | None = None) -> set[Any]:
+        """Block until a watched source changes or the timeout passes, return the changed sources."""
+        self._event.wait(timeout)
+        with _lock:
+            changed, self._changed = self._changed, set()
+            self._event.clear()
+        return changed
+
+    def _notify(self, source: Any):
+        self._changed.add(source)
+        self._event.set()
+
+
+def subscribe(*sources: Any) -> Subscription:
+    subscription = Subscription(set(sources))
+    with _lock:
+        for source in sources:
+            _subscriptions.setdefault(source, set()).add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription):
+    with _lock:
+        for source in subscription.sources:
+            subs = _subscriptions.get(source)
+            if subs:
+                subs.discard(subscription)
+                if not subs:
+                    del _subscriptions[source]
+
+
+def publish(source: Any):
+    # called on every log update, nothing but a dict lookup while nobody listens
+    if source in _versions:
+        _versions[source] = next(_counter)
+    if source not in _subscriptions:
+        return
+    with _lock:
+        for subscription in _subscriptions.get(source, ()):
+            subscription._notify(source)
+
+
+def get_version(*sources: Any) -> int:
+    """Version of versioned sources (CONTEXTS, TASKS), changes whenever one of them is published."""
+    return max(_versions[source] for source in sources)
+
+
+def get_subscription_count() -> int:
+    with _lock:
+        return len({sub for subs in _subscriptions.values() for sub in subs})
+
+
+_subscriptions: dict[Any, set[Subscription]] = {}
+# one counter for all versions, a version never repeats even across sources and restarts
+_counter = itertools.count(time.time_ns() // 1000)
+_versions: dict[Any, int] = {CONTEXTS: next(_counter), TASKS: next(_counter)}
+_lock = threading.Lock()
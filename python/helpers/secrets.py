@@ -4,7 +4,8 @@ import time
 import os
 from io import StringIO
 from dataclasses import dataclass
-from typing import Dict, Optional, List, Literal, Set, Callable
+from collections import deque
+from typing import Dict, Optional, List, Literal, Set, Callable, Tuple
 from dotenv.parser import parse_stream
 from python.helpers.errors import RepairableException
 from python.helpers import files
@@ -30,74 +31,198 @@ class EnvLine:
     )
 
 
+class SecretsMatcher:
+    """Aho-Corasick automaton over secret values.
+
+    Finds all secrets in a single pass over the text, so the cost does not depend
+    on the number of secrets. Overlapping matches are resolved leftmost-longest.
+    The automaton state can be carried over between chunks for streaming, whole
+    texts are masked with a regex compiled from the same trie to run the pass in C.
+    """
+
+    def __init__(self, key_to_value: Dict[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        # (length, key) of secrets ending in each state, longest first
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        self._value_keys: Dict[str, str] = {}
+        for key, value in key_to_value.items():
+            if isinstance(value, str) and value:
+                self._add(value, key)
+        self._build()
+        self._pattern = self._compile()
+        # in the root state, jump straight to the next char that can start a secret
+        self._first = (
+            re.compile("[" + "".join(re.escape(c) for c in self._goto[0]) + "]")
+            if self._goto[0]
+            else None
+        )
+
+    def _add(self, value: str, key: str):
+        state = 0
+        for char in value:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[state] + 1)
+                self._out.append([])
+                self._goto[state][char] = nxt
+            state = nxt
+        self._out[state] = [(len(value), key)]  # same value under another key overrides
+        self._value_keys[value] = key
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def _compile(self) -> Optional[re.Pattern]:
+        if not self._goto[0]:
+            return None
+        # trie as nested alternation, longer alternative first for the same prefix
+        order = [0]
+        for state in order:
+            order.extend(self._goto[state].values())
+        patterns: Dict[int, str] = {}
+        for state in reversed(order):  # bottom-up, long secrets must not hit the recursion limit
+            alts = [re.escape(c) + patterns.pop(nxt) for c, nxt in self._goto[state].items()]
+            terminal = bool(self._out[state]) and self._out[state][0][0] == self._depth[state]
+            if not alts:
+                patterns[state] = ""
+            elif len(alts) == 1 and not terminal:
+                patterns[state] = alts[0]
+            else:
+                patterns[state] = "(?:" + "|".join(alts) + ")" + ("?" if terminal else "")
+        return re.compile(patterns[0])
+
+    @property
+    def empty(self) -> bool:
+        return self._first is None
+
+    def depth(self, state: int) -> int:
+        """Length of the longest text suffix that is still a prefix of some secret."""
+        return self._depth[state]
+
+    def scan(self, text: str, state: int = 0, offset: int = 0) -> Tuple[List[Tuple[int, int, str]], int]:
+        """Return (start, end, key) of all secret occurrences in text (positions shifted by offset)
+        and the automaton state after the text."""
+        matches: List[Tuple[int, int, str]] = []
+        if self._first is None:
+            return matches, 0
+        goto, fail, out, first = self._goto, self._fail, self._out, self._first
+        pos, length = 0, len(text)
+        while pos < length:
+            if not state:
+                found = first.search(text, pos)
+                if not found:
+                    break
+                pos = found.start()
+            char = text[pos]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            pos += 1
+            if out[state]:
+                end = offset + pos
+                for size, key in out[state]:
+                    matches.append((end - size, end, key))
+        return matches, state
+
+    @staticmethod
+    def select(matches: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+        """Pick non-overlapping matches, leftmost first and longest for the same start."""
+        selected: List[Tuple[int, int, str]] = []
+        cursor = None
+        for match in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+            if cursor is None or match[0] >= cursor:
+                selected.append(match)
+                cursor = match[1]
+        return selected
+
+    def mask(self, text: str, replacement: Callable[[str], str]) -> str:
+        if not text or self._pattern is None:
+            return text
+        keys = self._value_keys
+        return self._pattern.sub(lambda m: replacement(keys[m.group(0)]), text)
+
+    @staticmethod
+    def _replace(text: str, selected: List[Tuple[int, int, str]], replacement: Callable[[str], str]) -> str:
+        if not selected:
+            return text
+        parts: List[str] = []
+        cursor = 0
+        for start, end, key in selected:
+            parts.append(text[cursor:start])
+            parts.append(replacement(key))
+            cursor = end
+        parts.append(text[cursor:])
+        return "".join(parts)
+
+
 class StreamingSecretsFilter:
     """Stateful streaming filter that masks secrets on the fly.
 
     - Replaces full secret values with placeholders §§secret(KEY) when detected.
-    - Holds the longest suffix of the current buffer that matches any secret prefix
-      (with minimum trigger length of 3) to avoid leaking partial secrets across chunks.
-    - On finalize(), any unresolved partial is masked with '***'.
+    - Holds back the end of the stream while it may still be the start of a secret,
+      the matcher state is kept between chunks so each chunk is only scanned once.
+    - On finalize(), any unresolved partial (minimum length min_trigger) is masked with '***'.
     """
 
-    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3):
+    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3, matcher: Optional[SecretsMatcher] = None):
         self.min_trigger = max(1, int(min_trigger))
-        # Map value -> key for placeholder construction
-        self.value_to_key: Dict[str, str] = {
-            v: k for k, v in key_to_value.items() if isinstance(v, str) and v
-        }
-        # Only keep non-empty values
-        self.secret_values: List[str] = [v for v in self.value_to_key.keys() if v]
-        # Precompute all prefixes for quick suffix matching
-        self.prefixes: Set[str] = set()
-        for v in self.secret_values:
-            for i in range(self.min_trigger, len(v) + 1):
-                self.prefixes.add(v[:i])
-        self.max_len: int = max((len(v) for v in self.secret_values), default=0)
+        self.matcher = matcher or SecretsMatcher(key_to_value)
 
         # Internal buffer of pending text that is not safe to flush yet
         self.pending: str = ""
-
-    def _replace_full_values(self, text: str) -> str:
-        """Replace all full secret values with placeholders in the given text."""
-        # Sort by length desc to avoid partial overlaps
-        for val in sorted(self.secret_values, key=len, reverse=True):
-            if not val:
-                continue
-            key = self.value_to_key.get(val, "")
-            if key:
-                text = text.replace(val, alias_for_key(key))
-        return text
-
-    def _longest_suffix_prefix(self, text: str) -> int:
-        """Return length of longest suffix of text that is a known secret prefix.
-        Returns 0 if none found (or only shorter than min_trigger)."""
-        max_check = min(len(text), self.max_len)
-        for length in range(max_check, self.min_trigger - 1, -1):
-            suffix = text[-length:]
-            if suffix in self.prefixes:
-                return length
-        return 0
+        # Masked text flushed so far and length of raw text received so far
+        self.output: str = ""
+        self.raw_length: int = 0
+        self._state = 0
+        self._matches: List[Tuple[int, int, str]] = []  # positions relative to pending
 
     def process_chunk(self, chunk: str) -> str:
         if not chunk:
             return ""
-
+        found, self._state = self.matcher.scan(chunk, self._state, len(self.pending))
         self.pending += chunk
-
-        # Replace any full secret occurrences first
-        self.pending = self._replace_full_values(self.pending)
-
-        # Determine the longest suffix that could still form a secret
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            # Flush everything except the hold suffix
-            emit = self.pending[:-hold_len]
-            self.pending = self.pending[-hold_len:]
-        else:
-            # Safe to flush everything
-            emit = self.pending
-            self.pending = ""
-
+        self.raw_length += len(chunk)
+        self._matches.extend(found)
+        return self._flush(len(self.pending) - self.matcher.depth(self._state))
+
+    def masked_text(self) -> str:
+        """Masked version of everything received so far, including the held back part."""
+        return self.output + self.matcher.mask(self.pending, alias_for_key)
+
+    def _flush(self, limit: int) -> str:
+        # matches starting before limit are final, nothing longer can start there anymore
+        selected: List[Tuple[int, int, str]] = []
+        remaining: List[Tuple[int, int, str]] = []
+        cursor = 0
+        for match in sorted(self._matches, key=lambda m: (m[0], m[0] - m[1])):
+            if match[0] < cursor:
+                continue  # overlaps a selected match or was already flushed
+            if match[0] >= limit:
+                remaining.append(match)
+                continue
+            selected.append(match)
+            cursor = match[1]
+
+        flush_to = max(cursor, limit)
+        emit = SecretsMatcher._replace(self.pending[:flush_to], selected, alias_for_key)
+        self.pending = self.pending[flush_to:]
+        self._matches = [(s - flush_to, e - flush_to, k) for s, e, k in remaining if s >= flush_to]
+        self.output += emit
         return emit
 
     def finalize(self) -> str:
@@ -106,14 +231,23 @@ class StreamingSecretsFilter:
         if not self.pending:
             return ""
 
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            safe = self.pending[:-hold_len]
-            # Mask unresolved partial
-            result = safe + "***"
-        else:
-            result = self.pending
+        result = self._flush(len(self.pending) - self.matcher.depth(self._state))
+
+        # what is left may still contain shorter complete secrets followed by a partial one
+        tail = self.pending
+        selected = self.matcher.select(self._matches)
+        covered = selected[-1][1] if selected else 0
+        _, state = self.matcher.scan(tail[covered:])
+        partial = self.matcher.depth(state)
+        masked = SecretsMatcher._replace(tail[: len(tail) - partial] if partial >= self.min_trigger else tail, selected, alias_for_key)
+        if partial >= self.min_trigger:
+            masked += "***"
+        result += masked
+
+        self.output += masked
         self.pending = ""
+        self._matches = []
+        self._state = 0
         return result
 
 
@@ -125,6 +259,7 @@ class SecretsManager:
     _instance: Optional["SecretsManager"] = None
     _secrets_cache: Optional[Dict[str, str]] = None
     _last_raw_text: Optional[str] = None
+    _version: int = 0
 
     @classmethod
     def get_instance(cls) -> "SecretsManager":
@@ -136,6 +271,9 @@ class SecretsManager:
         self._lock = threading.RLock()
         # instance-level override for secrets file
         self._secrets_file_rel = self.SECRETS_FILE
+        # compiled matchers by minimum secret length, rebuilt when secrets change
+        self._matchers: Dict[int, SecretsMatcher] = {}
+        self._versioned_secrets: Optional[Dict[str, str]] = None
 
     def set_secrets_file(self, relative_path: str):
         """Override the relative secrets file location (useful for tests)."""
@@ -174,7 +312,7 @@ class SecretsManager:
                 # On unexpected failure, keep empty cache rather than crash
                 secrets = {}
 
-            self._secrets_cache = secrets
+            self._set_cache(secrets)
             return secrets
 
     def save_secrets(self, secrets_content: str):
@@ -183,7 +321,7 @@ class SecretsManager:
             # Ensure write to local filesystem (UTF-8)
             self._write_secrets_raw(secrets_content)
             # Update cache
-            self._secrets_cache = self.parse_env_content(secrets_content)
+            self._set_cache(self.parse_env_content(secrets_content))
             # Update raw snapshot
             self._last_raw_text = secrets_content
 
@@ -235,7 +373,29 @@ class SecretsManager:
 
     def create_streaming_filter(self) -> "StreamingSecretsFilter":
         """Create a streaming-aware secrets filter snapshotting current secret values."""
-        return StreamingSecretsFilter(self.load_secrets())
+        secrets = self.load_secrets()
+        return StreamingSecretsFilter(secrets, matcher=self.get_matcher())
+
+    def get_matcher(self, min_length: int = 0) -> SecretsMatcher:
+        """Get compiled matcher for secrets whose stripped value has at least min_length chars."""
+        with self._lock:
+            secrets = self.load_secrets()
+            matcher = self._matchers.get(min_length)
+            if matcher is None:
+                matcher = SecretsMatcher(
+                    {
+                        key: value
+                        for key, value in secrets.items()
+                        if value and len(value.strip()) >= min_length
+                    }
+                )
+                self._matchers[min_length] = matcher
+            return matcher
+
+    def get_version(self) -> int:
+        """Number incremented every time the loaded secrets change."""
+        self.load_secrets()
+        return self._version
 
     def replace_placeholders(self, text: str) -> str:
         """Replace secret placeholders with actual values"""
@@ -281,17 +441,10 @@ class SecretsManager:
         if not text:
             return text
 
-        secrets = self.load_secrets()
-        result = text
-
-        # Sort by length (longest first) to avoid partial replacements
-        for key, value in sorted(
-            secrets.items(), key=lambda x: len(x[1]), reverse=True
-        ):
-            if value and len(value.strip()) >= min_length:
-                result = result.replace(value, alias_for_key(key, placeholder))
-
-        return result
+        # single pass over the text regardless of the number of secrets
+        return self.get_matcher(min_length).mask(
+            text, lambda key: alias_for_key(key, placeholder)
+        )
 
     def get_masked_secrets(self) -> str:
         """Get content with values masked for frontend display (preserves comments and unrecognized lines)"""
@@ -325,6 +478,14 @@ class SecretsManager:
         """Clear the secrets cache"""
         with self._lock:
             self._secrets_cache = None
+            self._matchers = {}
+
+    def _set_cache(self, secrets: Dict[str, str]):
+        if secrets != self._versioned_secrets:
+            self._version += 1
+            self._versioned_secrets = secrets
+        self._secrets_cache = secrets
+        self._matchers = {}
 
     # ---------------- Internal helpers for parsing/merging ----------------
 
@@ -1,9 +1,11 @@
 import base64
+import copy
 import hashlib
 import json
 import os
 import re
 import subprocess
+import threading
 from typing import Any, Literal, TypedDict, cast
 
 import models
@@ -89,6 +91,10 @@ class Settings(TypedDict):
 
     shell_interface: Literal['local','ssh']
 
+    agent_loop_mode: Literal['shared', 'pool', 'per_context']
+    agent_loop_pool_size: int
+    agent_loop_pool_strategy: Literal['least_load', 'hash']
+
     stt_model_size: str
     stt_language: str
     stt_silence_threshold: float
@@ -160,7 +166,16 @@ PASSWORD_PLACEHOLDER = "****PSWD****"
 API_KEY_PLACEHOLDER = "************"
 
 SETTINGS_FILE = files.get_abs_path("tmp/settings.json")
+
+# current settings snapshot, normalized once and swapped as a whole by set_settings()
 _settings: Settings | None = None
+_settings_version: int = 0
+_settings_rebuilds: int = 0
+_settings_lock = threading.RLock()
+
+# values that are expensive to resolve (git subprocess, dotenv lookups), cached once
+_version: str | None = None
+_auth_token: str | None = None
 
 
 def convert_out(settings: Settings) -> SettingsOutput:
@@ -902,6 +917,45 @@ def convert_out(settings: Settings) -> SettingsOutput:
             }
         )
 
+    dev_fields.append(
+        {
+            "id": "agent_loop_mode",
+            "title": "Agent event loops",
+            "description": "How chats and tasks are assigned to event loop threads. Shared runs all of them on one loop, so a blocking call in one chat stalls all others. Pool spreads them over a fixed number of loops, per chat gives every chat its own loop. A chat stays on its loop until it is removed, new settings apply to new chats.",
+            "type": "select",
+            "value": settings["agent_loop_mode"],
+            "options": [
+                {"value": "shared", "label": "Shared"},
+                {"value": "pool", "label": "Pool"},
+                {"value": "per_context", "label": "Per chat"},
+            ],
+        }
+    )
+
+    dev_fields.append(
+        {
+            "id": "agent_loop_pool_size",
+            "title": "Agent event loop pool size",
+            "description": "Number of event loop threads in pool mode.",
+            "type": "number",
+            "value": settings["agent_loop_pool_size"],
+        }
+    )
+
+    dev_fields.append(
+        {
+            "id": "agent_loop_pool_strategy",
+            "title": "Agent event loop pool assignment",
+            "description": "How chats are assigned to loops in pool mode. Least load picks the loop with the fewest chats, hash picks a loop based on the chat ID.",
+            "type": "select",
+            "value": settings["agent_loop_pool_strategy"],
+            "options": [
+                {"value": "least_load", "label": "Least load"},
+                {"value": "hash", "label": "Hash"},
+            ],
+        }
+    )
+
     dev_section: SettingsSection = {
         "id": "dev",
         "title": "Development",
@@ -1279,7 +1333,7 @@ def _get_api_key_field(settings: Settings, provider: str, title: str) -> Setting
 
 
 def convert_in(settings: dict) -> Settings:
-    current = get_settings()
+    current = copy.deepcopy(get_settings())  # snapshot is shared, never mutate it
     for section in settings["sections"]:
         if "fields" in section:
             for field in section["fields"]:
@@ -1300,20 +1354,37 @@ def convert_in(settings: dict) -> Settings:
     return current
 
 def get_settings() -> Settings:
-    global _settings
-    if not _settings:
-        _settings = _read_settings_file()
-    if not _settings:
-        _settings = get_default_settings()
-    norm = normalize_settings(_settings)
-    return norm
+    """Return the current settings snapshot.
+
+    The snapshot is shared between all callers and must be treated as read-only.
+    Use set_settings() or set_settings_delta() to change settings.
+    """
+    snapshot = _settings
+    if snapshot is None:
+        with _settings_lock:
+            if _settings is None:
+                _publish_settings(_read_settings_file() or get_default_settings())
+            snapshot = _settings
+    return snapshot  # type: ignore
+
+
+def get_settings_version() -> int:
+    return _settings_version
+
+
+def get_settings_stats() -> dict[str, int]:
+    return {"version": _settings_version, "rebuilds": _settings_rebuilds}
 
 
 def set_settings(settings: Settings, apply: bool = True):
-    global _settings
-    previous = _settings
-    _settings = normalize_settings(settings)
-    _write_settings_file(_settings)
+    with _settings_lock:
+        previous = _settings
+        normalized = normalize_settings(settings)
+        _write_settings_file(normalized)
+        # sensitive values were just written to dotenv, re-resolve the token
+        _reset_auth_token()
+        normalized["mcp_server_token"] = _get_auth_token()
+        _publish_settings(normalized)
     if apply:
         _apply_settings(previous)
 
@@ -1324,7 +1395,16 @@ def set_settings_delta(delta: dict, apply: bool = True):
     set_settings(new, apply)  # type: ignore
 
 
+def _publish_settings(settings: Settings):
+    # settings must already be normalized
+    global _settings, _settings_version
+    _settings_version += 1
+    _settings = settings  # atomic reference swap, readers never see partial state
+
+
 def normalize_settings(settings: Settings) -> Settings:
+    global _settings_rebuilds
+    _settings_rebuilds += 1
     copy = settings.copy()
     default = get_default_settings()
 
@@ -1351,7 +1431,7 @@ def normalize_settings(settings: Settings) -> Settings:
                 copy[key] = value  # make default instead
 
     # mcp server token is set automatically
-    copy["mcp_server_token"] = create_auth_token()
+    copy["mcp_server_token"] = _get_auth_token()
 
     return copy
 
@@ -1478,6 +1558,9 @@ def get_default_settings() -> Settings:
         rfc_port_http=55080,
         rfc_port_ssh=55022,
         shell_interface="local" if runtime.is_dockerized() else "ssh",
+        agent_loop_mode="shared",
+        agent_loop_pool_size=4,
+        agent_loop_pool_strategy="least_load",
         stt_model_size="base",
         stt_language="en",
         stt_silence_threshold=0.3,
@@ -1488,7 +1571,7 @@ def get_default_settings() -> Settings:
         mcp_client_init_timeout=10,
         mcp_client_tool_timeout=120,
         mcp_server_enabled=False,
-        mcp_server_token=create_auth_token(),
+        mcp_server_token=_get_auth_token(),
         a2a_server_enabled=False,
         variables="",
         secrets="",
@@ -1526,6 +1609,13 @@ def _apply_settings(previous: Settings | None):
             from python.helpers.memory import reload as memory_reload
 
             memory_reload()
+            if previous:
+                # the old model is freed once the dbs and document stores using it are gone
+                import models
+                from python.helpers.vector_db import VectorDB
+
+                VectorDB.clear_embeddings_cache()
+                models.unload_embedding_models()
 
         # update mcp settings if necessary
         if not previous or _settings["mcp_servers"] != previous["mcp_servers"]:
@@ -1696,7 +1786,26 @@ def create_auth_token() -> str:
     return b64_token[:16]
 
 
+def _get_auth_token() -> str:
+    global _auth_token
+    if _auth_token is None:
+        _auth_token = create_auth_token()
+    return _auth_token
+
+
+def _reset_auth_token():
+    global _auth_token
+    _auth_token = None
+
+
 def _get_version():
+    global _version
+    if _version is None:
+        _version = _resolve_version()
+    return _version
+
+
+def _resolve_version():
     try:
         git_info = git.get_git_info()
         return str(git_info.get("short_tag", "")).strip() or "unknown"
@@ -20,12 +20,15 @@ from initialize import initialize_agent
 from python.helpers.persist_chat import save_tmp_chat
 from python.helpers.print_style import PrintStyle
 from python.helpers.defer import DeferredTask
-from python.helpers.files import get_abs_path, make_dirs, read_file, write_file
+from python.helpers.files import get_abs_path, make_dirs, read_file, write_file_atomic
+from python.helpers.persistence import PersistenceService
+from python.helpers import push
 from python.helpers.localization import Localization
 import pytz
 from typing import Annotated
 
 SCHEDULER_FOLDER = "tmp/scheduler"
+TASKS_PERSISTENCE_KEY = "scheduler:tasks"
 
 # ----------------------
 # Task Models
@@ -467,11 +470,19 @@ class SchedulerTaskList(BaseModel):
 
     async def reload(self) -> "SchedulerTaskList":
         path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
+        # the file is older than the tasks in memory until the pending save is written
+        if PersistenceService.get().is_dirty(TASKS_PERSISTENCE_KEY):
+            return self
         if exists(path):
             with self._lock:
                 data = self.__class__.model_validate_json(read_file(path))
+                # changed by another process, clients are notified as after a save
+                changed = data.model_dump() != self.model_dump()
                 self.tasks.clear()
                 self.tasks.extend(data.tasks)
+            if changed:
+                push.publish(push.TASKS)
+                push.publish(push.CONTEXTS)
         return self
 
     async def add_task(self, task: Union[ScheduledTask, AdHocTask, PlannedTask]) -> "SchedulerTaskList":
@@ -508,15 +519,10 @@ class SchedulerTaskList(BaseModel):
                     "ERROR: Found null token in JSON output for an adhoc task"
                 )
 
-            write_file(path, json_data)
-
-            # Debug: Verify after saving
-            if exists(path):
-                loaded_json = read_file(path)
-                if '"type": "adhoc"' in loaded_json and '"token": null' in loaded_json:
-                    PrintStyle(italic=True, font_color="red", padding=False).print(
-                        "ERROR: Null token persisted in JSON file for an adhoc task"
-                    )
+            # written by the persistence thread, a burst of task updates ends in a single write
+            PersistenceService.get().mark_dirty(TASKS_PERSISTENCE_KEY, lambda: write_file_atomic(path, json_data))
+            push.publish(push.TASKS)
+            push.publish(push.CONTEXTS)
 
         return self
 
@@ -866,7 +872,12 @@ class TaskScheduler:
                 # Make one final save to ensure all states are persisted
                 await self._tasks.save()
 
-        deferred_task = DeferredTask(thread_name=self.__class__.__name__)
+        # run on the loop the task context is pinned to, scheduler's own loop in shared mode
+        # and for tasks without a context yet (a loop keyed by the task would never be released)
+        thread_name = self.__class__.__name__
+        if task.context_id:
+            thread_name = AgentContext.get_loop_name(task.context_id, shared_name=thread_name)
+        deferred_task = DeferredTask(thread_name=thread_name)
         deferred_task.start_task(_run_task_wrapper, task.uuid, task_context)
 
         # Ensure background execution doesn't exit immediately on async await, especially in script contexts
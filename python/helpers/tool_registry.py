@@ -0,0 +1,92 @@
+import os
+import threading
+from typing import TYPE_CHECKING
+from python.helpers import extract_tools, files
+
+if TYPE_CHECKING:
+    from python.helpers.tool import Tool
+
+DEFAULT_FOLDER = "python/tools"
+PROFILE_FOLDER = "agents/{profile}/tools"
+
+# folder -> (folder mtime, tool names available in it)
+_folders: dict[str, tuple[int, frozenset[str]]] = {}
+# tool file -> (file mtime, tool class or None when the file failed to load)
+_classes: dict[str, tuple[int, "type[Tool] | None"]] = {}
+_lock = threading.RLock()
+
+
+def get_tool_class(name: str, profile: str = "") -> "type[Tool] | None":
+    """Resolve a tool name to its class, agent profile tools first, then default tools.
+    Folder listings and imported classes are cached and refreshed when their mtime changes,
+    so unknown names and repeated calls do not touch the import machinery."""
+    for folder in get_folders(profile):
+        if name in _list_folder(folder):
+            cls = _load_class(os.path.join(folder, name + ".py"))
+            if cls:
+                return cls
+    return None
+
+
+def get_folders(profile: str = "") -> list[str]:
+    folders = [files.get_abs_path(DEFAULT_FOLDER)]
+    if profile:
+        folders.insert(0, files.get_abs_path(PROFILE_FOLDER.format(profile=profile)))
+    return folders
+
+
+def get_tool_names(profile: str = "") -> list[str]:
+    names: set[str] = set()
+    for folder in get_folders(profile):
+        names.update(_list_folder(folder))
+    return sorted(names)
+
+
+def preload(profile: str = ""):
+    # index the tool folders ahead of the first tool call, classes are imported on first use
+    for folder in get_folders(profile):
+        _list_folder(folder)
+
+
+def clear_cache():
+    with _lock:
+        _folders.clear()
+        _classes.clear()
+
+
+def _list_folder(folder: str) -> frozenset[str]:
+    try:
+        mtime = os.stat(folder).st_mtime_ns
+    except OSError:
+        return frozenset()
+    cached = _folders.get(folder)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        names = frozenset(
+            file[:-3]
+            for file in os.listdir(folder)
+            if file.endswith(".py") and not file.startswith("__")
+        )
+        _folders[folder] = (mtime, names)
+    return names
+
+
+def _load_class(file: str) -> "type[Tool] | None":
+    from python.helpers.tool import Tool
+
+    try:
+        mtime = os.stat(file).st_mtime_ns
+    except OSError:
+        return None
+    cached = _classes.get(file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with _lock:
+        try:
+            classes = extract_tools.load_classes_from_file(file, Tool)  # type: ignore[type-abstract]
+        except Exception:
+            classes = []
+        cls = classes[0] if classes else None
+        _classes[file] = (mtime, cls)
+    return cls
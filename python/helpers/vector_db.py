@@ -8,12 +8,11 @@ import faiss
 
 
 from langchain_core.documents import Document
-from langchain.storage import InMemoryByteStore
 from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores.utils import (
     DistanceStrategy,
 )
-from langchain.embeddings import CacheBackedEmbeddings
+from python.helpers import embedding_cache
 
 from agent import Agent
 
@@ -33,7 +32,7 @@ class MyFaiss(FAISS):
 
 class VectorDB:
 
-    _cached_embeddings: dict[str, CacheBackedEmbeddings] = {}
+    _cached_embeddings: dict[str, embedding_cache.CachedEmbeddings] = {}
 
     @staticmethod
     def _get_embeddings(agent: Agent, cache: bool = True):
@@ -46,16 +45,16 @@ class VectorDB:
             "default",
         )
         if namespace not in VectorDB._cached_embeddings:
-            store = InMemoryByteStore()
-            VectorDB._cached_embeddings[namespace] = (
-                CacheBackedEmbeddings.from_bytes_store(
-                    model,
-                    store,
-                    namespace=namespace,
-                )
+            # bounded, document chunks of past queries are evicted least recently used first
+            VectorDB._cached_embeddings[namespace] = embedding_cache.CachedEmbeddings(
+                model, embedding_cache.get_memory_cache()
             )
         return VectorDB._cached_embeddings[namespace]
 
+    @staticmethod
+    def clear_embeddings_cache():
+        VectorDB._cached_embeddings.clear()
+
     def __init__(self, agent: Agent, cache: bool = True):
         self.agent = agent
         self.cache = cache  # store cache preference
@@ -104,7 +103,7 @@ class VectorDB:
             for doc, id in zip(docs, ids):
                 doc.metadata["id"] = id  # add ids to documents metadata
 
-            self.db.add_documents(documents=docs, ids=ids)
+            await self.db.aadd_documents(documents=docs, ids=ids)
         return ids
 
     async def delete_documents_by_ids(self, ids: list[str]):
@@ -1,7 +1,7 @@
 import base64
 from python.helpers.print_style import PrintStyle
 from python.helpers.tool import Tool, Response
-from python.helpers import runtime, files, images
+from python.helpers import runtime, files, images, blobs
 from mimetypes import guess_type
 from python.helpers import history
 
@@ -34,16 +34,14 @@ class VisionLoad(Tool):
                         compressed = images.compress_image(
                             file_content, max_pixels=MAX_PIXELS, quality=QUALITY
                         )
-                        # Encode as base64
-                        file_content_b64 = base64.b64encode(compressed).decode("utf-8")
-
                         # DEBUG: Save compressed image
                         # await runtime.call_development_function(
-                        #     files.write_file_base64, str(path), file_content_b64
+                        #     files.write_file_bin, str(path), compressed
                         # )
 
-                        # Construct the data URL (always JPEG after compression)
-                        self.images_dict[path] = file_content_b64
+                        # Store in the blob store, history only keeps the reference (always JPEG after compression)
+                        key = blobs.put(compressed, owner=self.agent.context.id)
+                        self.images_dict[path] = blobs.to_ref(key, "image/jpeg")
                     except Exception as e:
                         self.images_dict[path] = None
                         PrintStyle().error(f"Error processing image {path}: {e}")
@@ -61,7 +59,7 @@ class VisionLoad(Tool):
                     content.append(
                         {
                             "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{image}"},
+                            "image_url": {"url": image},  # inlined when sent to the llm
                         }
                     )
                 else:
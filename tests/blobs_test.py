@@ -0,0 +1,83 @@
+import sys, os, base64, tempfile
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import blobs
+
+
+@contextmanager
+def blob_store(folder):
+    # an empty store in a temporary folder, never the real tmp/blobs (garbage collection deletes there)
+    saved = blobs.BLOBS_FOLDER
+    blobs.BLOBS_FOLDER = str(folder)
+    blobs._refs.clear()
+    blobs._inline_cache.clear()
+    blobs._inline_cache_size = 0
+    try:
+        yield
+    finally:
+        blobs.BLOBS_FOLDER = saved
+        blobs._refs.clear()
+        blobs._inline_cache.clear()
+        blobs._inline_cache_size = 0
+
+
+def image_content(data: bytes):
+    url = "data:image/jpeg;base64," + base64.b64encode(data).decode()
+    return [{"type": "image_url", "image_url": {"url": url}}], url
+
+
+def test_references_round_trip(tmp_path):
+    with blob_store(tmp_path):
+        check_references_round_trip()
+
+
+def check_references_round_trip():
+    content, url = image_content(os.urandom(10000))
+    stored = blobs.store_data_urls(content, owner="chat1")
+    ref = stored[0]["image_url"]["url"]
+    assert ref.startswith(blobs.REF_PREFIX) and len(ref) < 100
+    assert blobs.inline_refs(stored) == content
+    # same image in another chat is stored once
+    assert blobs.store_data_urls(content, owner="chat2") == stored
+
+
+def test_release_and_garbage(tmp_path):
+    with blob_store(tmp_path):
+        check_release_and_garbage()
+
+
+def check_release_and_garbage():
+    content, _ = image_content(os.urandom(1000))
+    stored = blobs.store_data_urls(content, owner="chat3")
+    key = blobs.find_refs(str(stored)).pop()
+    blobs.add_refs("chat4", [key])
+    assert blobs.release("chat3") == 0 and blobs.exists(key)
+    assert blobs.release("chat4") == 1 and not blobs.exists(key)
+    assert blobs.inline_refs(stored) == [{"type": "text", "text": "Image no longer available"}]
+
+    unreferenced = blobs.put(b"left over from a removed chat")
+    assert blobs.collect_garbage() == 1 and not blobs.exists(unreferenced)
+
+
+def test_export_and_import(tmp_path):
+    with blob_store(tmp_path):
+        check_export_and_import()
+
+
+def check_export_and_import():
+    # what chat export and import do with the history of a chat
+    content, _ = image_content(os.urandom(1000))
+    history = {"messages": [{"content": {"raw_content": blobs.store_data_urls(content, owner="chat5")}}]}
+    exported = blobs.inline_refs(history)
+    assert exported["messages"][0]["content"]["raw_content"] == content
+    blobs.release("chat5")  # the original chat is removed, its blob deleted
+    imported = blobs.store_data_urls(exported)
+    assert imported == history
+    assert blobs.inline_refs(imported["messages"][0]["content"]["raw_content"]) == content
+
+
+if __name__ == "__main__":
+    for test in (test_references_round_trip, test_release_and_garbage, test_export_and_import):
+        with tempfile.TemporaryDirectory() as folder:
+            test(folder)
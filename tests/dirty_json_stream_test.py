@@ -0,0 +1,81 @@
+import sys, os, time, json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers.dirty_json import DirtyJson, DirtyJsonStream
+
+
+def build_response(text_len: int) -> str:
+    sentence = 'Streaming \\"response\\" text with escapes\\n and unicode \\u00e9. '
+    text = sentence * (text_len // len(sentence) + 1)
+    return (
+        '{\n    "thoughts": ["first", "second"],\n    "headline": "Responding",\n'
+        f'    "tool_name": "response",\n    "tool_args": {{"text": "{text}"}}\n}}'
+    )
+
+
+def chunks(text: str, size: int):
+    for i in range(0, len(text), size):
+        yield text[: i + size]
+
+
+def test_final_snapshot_matches_full_parse():
+    response = build_response(2000)
+    parser = DirtyJsonStream()
+    for full in chunks(response, 7):
+        snapshot = parser.update(full)
+    assert snapshot == DirtyJson.parse_string(response) == json.loads(response)
+
+
+def test_partial_snapshots():
+    response = build_response(500)
+    parser = DirtyJsonStream()
+    for full in chunks(response, 5):
+        snapshot = parser.update(full)
+        assert isinstance(snapshot, dict)
+        if "tool_args" in snapshot and "text" in snapshot["tool_args"]:
+            expected = DirtyJson.parse_string(full)["tool_args"]["text"]
+            assert expected.startswith(snapshot["tool_args"]["text"])
+
+
+def test_rewritten_prefix_restarts():
+    parser = DirtyJsonStream()
+    parser.update('{"headline": "secret value", "tool_name": "re')
+    snapshot = parser.update('{"headline": "******", "tool_name": "response"}')
+    assert snapshot == {"headline": "******", "tool_name": "response"}
+
+
+def benchmark(text_len: int = 60000, chunk_size: int = 8, buckets: int = 6):
+    response = build_response(text_len)
+    parser = DirtyJsonStream()
+    bucket_size = len(response) // buckets + 1
+    stream_times = [0.0] * buckets
+    counts = [0] * buckets
+    full_times = [0.0] * buckets
+    full_counts = [0] * buckets
+
+    for i, full in enumerate(chunks(response, chunk_size)):
+        bucket = min(len(full) // bucket_size, buckets - 1)
+        start = time.perf_counter()
+        parser.update(full)
+        stream_times[bucket] += time.perf_counter() - start
+        counts[bucket] += 1
+
+        # the full re-parse is slow, sample it
+        if i % 50 == 0:
+            start = time.perf_counter()
+            DirtyJson.parse_string(full)
+            full_times[bucket] += time.perf_counter() - start
+            full_counts[bucket] += 1
+
+    print(f"{'chars':>10} {'incremental/chunk':>20} {'full re-parse/chunk':>22}")
+    for b in range(buckets):
+        inc = stream_times[b] / max(counts[b], 1) * 1e6
+        full = full_times[b] / max(full_counts[b], 1) * 1e6
+        print(f"{(b + 1) * bucket_size:>10} {inc:>17.1f} us {full:>19.1f} us")
+
+
+if __name__ == "__main__":
+    test_final_snapshot_matches_full_parse()
+    test_partial_snapshots()
+    test_rewritten_prefix_restarts()
+    benchmark()
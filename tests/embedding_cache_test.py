@@ -0,0 +1,90 @@
+import sys, os, time, asyncio, tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from python.helpers.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.embedded: list[str] = []
+
+    def embed_documents(self, texts):
+        self.embedded += texts
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.embedded.append(text)
+        return self._vector(text)
+
+    def _vector(self, text: str) -> list[float]:
+        rng = np.random.default_rng(abs(hash(text)) % 2**32)
+        vector = rng.standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+def test_hits_and_float16():
+    model = CountingEmbeddings()
+    embedder = CachedEmbeddings(model, EmbeddingCache())
+    first = embedder.embed_documents(["a", "b", "a"])
+    assert model.embedded == ["a", "b"]
+    assert first[0] == first[2]
+    # rounded to float16 on the first call too, a hit returns exactly the same vector
+    assert embedder.embed_documents(["a"]) == [first[0]]
+    assert np.allclose(first[0], model._vector("a"), atol=1e-3)
+    # queries are cached apart from documents
+    query = asyncio.run(embedder.aembed_query("a"))
+    assert asyncio.run(embedder.aembed_query("a")) == query
+    assert model.embedded == ["a", "b", "a"]
+    stats = embedder.cache.get_stats()
+    assert stats["document_hits"] == 1 and stats["document_misses"] == 2
+    assert stats["query_hits"] == 1 and stats["query_misses"] == 1
+    assert stats["query_hit_ratio"] == 0.5
+    # values out of float16 range are kept as float32
+    assert embedder.cache.put_many(["big"], [[1e6, 0.5]]) == [[1e6, 0.5]]
+
+
+def test_lru_eviction_and_persistence():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "model.sqlite")
+        cache = EmbeddingCache(path, max_entries=10)
+        cache.put_many([str(i) for i in range(10)], [[float(i)] for i in range(10)])
+        cache.get_many(["0", "1"])  # recently used, survive the eviction
+        cache.put_many(["new"], [[1.0]])
+        assert cache.get_stats()["entries"] == 9
+        cache.close()
+        cache = EmbeddingCache(path, max_entries=10)
+        assert set(cache.get_many(["0", "1", "2", "3", "new"])) == {"0", "1", "new"}
+        cache.close()
+
+
+def benchmark(count: int = 10000, dim: int = 384):
+    texts = [f"memory chunk number {i} " * 10 for i in range(count)]
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32).tolist()
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "model.sqlite")
+        cache = EmbeddingCache(path)
+        start = time.perf_counter()
+        for i in range(0, count, 100):
+            cache.put_many(texts[i : i + 100], vectors[i : i + 100])
+        put_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(0, count, 100):
+            cache.get_many(texts[i : i + 100])
+        get_s = time.perf_counter() - start
+        size = cache.get_stats()["size"]
+        cache.close()
+    # the file store wrote one json file of float64 text per embedding
+    json_size = sum(len(str(vector)) for vector in vectors[:100]) * count // 100
+    print(f"{count} embeddings of {dim} dimensions")
+    print(f"sqlite float16: {size / 1e6:.1f} MB in 1 file, put {put_s * 1000 / count * 100:.2f} ms / get {get_s * 1000 / count * 100:.2f} ms per 100")
+    print(f"file store (json): ~{json_size / 1e6:.1f} MB in {count} files")
+
+
+if __name__ == "__main__":
+    test_hits_and_float16()
+    test_lru_eviction_and_persistence()
+    benchmark()
@@ -0,0 +1,136 @@
+import sys, os, time, asyncio, threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import embedding_service
+from python.helpers.embedding_service import EmbeddingService
+
+
+class FakeModel:
+    # a fixed cost per call (a request, a forward pass) and a small one per text
+    def __init__(self, call_time: float = 0.02, text_time: float = 0.0002):
+        self.call_time = call_time
+        self.text_time = text_time
+        self.calls: list[list[str]] = []
+        self.threads: set[str] = set()
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.call_time + self.text_time * len(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_coalesces_concurrent_requests():
+    model = FakeModel()
+    service = EmbeddingService("fake", model, max_batch=64, max_wait=0.01)
+
+    async def main():
+        return await asyncio.gather(*(service.aembed([f"text {i}", "shared"]) for i in range(20)))
+
+    results = asyncio.run(main())
+    assert results[3] == [[6.0, 1.0], [6.0, 1.0]]
+    # 40 requested texts, "shared" embedded once per batch
+    assert sum(len(call) for call in model.calls) < 40
+    assert len(model.calls) <= 2
+    stats = service.get_stats()
+    assert stats["requests"] == 20 and stats["texts"] == 40 and stats["duplicates"] > 0
+    assert stats["queue_length"] == 0
+    assert sum(stats["batch_sizes"].values()) == stats["batches"]
+
+
+def test_event_loop_keeps_running():
+    service = EmbeddingService("fake", FakeModel(call_time=0.2))
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await service.aembed(["slow"])
+        task.cancel()
+        return ticks
+
+    # the loop kept ticking while the model ran on the worker thread
+    assert asyncio.run(main()) >= 10
+
+
+def test_errors_reach_every_caller():
+    def failing(texts):
+        raise ValueError("model down")
+
+    service = EmbeddingService("failing", failing)
+    futures = [service.submit([str(i)]) for i in range(3)]
+    for future in futures:
+        try:
+            future.result()
+            assert False
+        except ValueError:
+            pass
+    assert service.embed([]) == []
+    # a model returning too few vectors fails the batch, the next request still gets a worker
+    service = EmbeddingService("short", lambda texts: [[1.0]] * (len(texts) - 1))
+    try:
+        service.embed(["a", "b"])
+        assert False
+    except ValueError:
+        pass
+    try:
+        service.embed(["c"])
+        assert False
+    except ValueError:
+        pass
+    assert service.get_stats()["errors"] == 2
+
+
+def test_backends_are_shared():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return object(), FakeModel(call_time=0)
+
+    first = embedding_service.acquire("test-model", "test", load)
+    second = embedding_service.acquire("test-model", "test", load)
+    assert first is second and first.refs == 2 and len(loads) == 1
+    embedding_service.release(first)
+    embedding_service.release(second)
+    # unused backends stay loaded for the next wrapper
+    assert embedding_service.acquire("test-model", "test", load) is first and len(loads) == 1
+    # after an unload new wrappers load again, the one in use keeps its backend
+    embedding_service.unload()
+    assert embedding_service.acquire("test-model", "test", load) is not first and len(loads) == 2
+    assert first.service.embed(["still works"]) == [[11.0, 1.0]]
+
+
+def benchmark(contexts: int = 8, queries: int = 16):
+    # several chats recalling memories at the same time, one query per call
+    async def run(service: EmbeddingService):
+        async def chat(c: int):
+            for q in range(queries):
+                await service.aembed([f"chat {c} query {q}"])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(chat(c) for c in range(contexts)))
+        return time.perf_counter() - start
+
+    print(f"{contexts} contexts x {queries} queries, 20 ms per model call")
+    print(f"{'batching':>12} {'seconds':>8} {'calls':>6}")
+    for label, max_batch in (("off", 1), ("on", 64)):
+        model = FakeModel()
+        service = EmbeddingService("fake", model, max_batch=max_batch)
+        seconds = asyncio.run(run(service))
+        print(f"{label:>12} {seconds:>8.2f} {len(model.calls):>6}")
+        print(f"{'':>12} batch sizes {service.get_stats()['batch_sizes']}")
+
+
+if __name__ == "__main__":
+    test_coalesces_concurrent_requests()
+    test_event_loop_keeps_running()
+    test_errors_reach_every_caller()
+    test_backends_are_shared()
+    benchmark()
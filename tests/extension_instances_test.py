@@ -0,0 +1,57 @@
+import sys, os, gc, asyncio, weakref
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import files
+from python.helpers import extension
+from python.helpers.extension import Extension
+
+
+class FakeAgent:
+    # just enough of Agent for caching extension instances
+    def __init__(self):
+        self.data = {}
+
+    def get_data(self, field: str):
+        return self.data.get(field, None)
+
+    def set_data(self, field: str, value):
+        self.data[field] = value
+
+
+class Counter(Extension):
+    singleton = True
+
+    async def execute(self, **kwargs):
+        self.agent.set_data("calls", (self.agent.get_data("calls") or 0) + 1)
+
+
+def run(agent: FakeAgent, times: int = 3):
+    for _ in range(times):
+        asyncio.run(extension._get_instance(Counter, agent).execute())  # type: ignore
+
+
+def test_instances_reused_per_agent():
+    first, second = FakeAgent(), FakeAgent()
+    run(first)
+    run(second)
+    assert extension._get_instance(Counter, first) is extension._get_instance(Counter, first)  # type: ignore
+    assert extension._get_instance(Counter, first) is not extension._get_instance(Counter, second)  # type: ignore
+    assert first.get_data("calls") == 3
+    # a cleared cache builds new instances
+    instance = extension._get_instance(Counter, first)  # type: ignore
+    extension.clear_cache()
+    assert extension._get_instance(Counter, first) is not instance  # type: ignore
+
+
+def test_agent_is_collected():
+    agent = FakeAgent()
+    run(agent)
+    ref = weakref.ref(agent)
+    del agent
+    gc.collect()
+    assert ref() is None
+
+
+if __name__ == "__main__":
+    test_instances_reused_per_agent()
+    test_agent_is_collected()
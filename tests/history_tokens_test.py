@@ -0,0 +1,118 @@
+import sys, os, asyncio, random, tempfile, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import history
+
+
+class FakeAgent:
+    # just enough of Agent for summarizing and compressing history
+    def read_prompt(self, file: str, **kwargs) -> str:
+        return f"{file} {kwargs}"[:200]
+
+    def parse_prompt(self, file: str, **kwargs) -> str:
+        return f"{file} {kwargs}"[:200]
+
+    async def call_utility_model(self, system: str, message: str, **kwargs) -> str:
+        return "summary " * random.randint(5, 50)
+
+
+def build_history(topics: int = 30, messages: int = 8) -> history.History:
+    hist = history.History(agent=FakeAgent())
+    for t in range(topics):
+        for m in range(messages):
+            hist.add_message(ai=m % 2 == 1, content=f"topic {t} message {m} " * random.randint(1, 200))
+        hist.new_topic()
+    return hist
+
+
+def test_totals_after_adding():
+    hist = build_history()
+    hist.check_tokens()
+    assert hist.get_tokens() == hist.count_tokens()
+
+
+def test_totals_after_compressing():
+    hist = build_history()
+    for _ in range(45):
+        asyncio.run(hist.compress_topics())
+        hist.check_tokens()
+    asyncio.run(hist.compress_bulks())
+    hist.check_tokens()
+    for m in range(6):
+        hist.add_message(ai=m % 2 == 1, content=f"current message {m} " * 50)
+    asyncio.run(hist.current.compress_attention())
+    hist.check_tokens()
+
+
+def test_totals_after_deserializing():
+    hist = build_history()
+    asyncio.run(hist.compress_topics())
+    restored = history.deserialize_history(hist.serialize(), agent=FakeAgent())
+    restored.check_tokens()
+    assert restored.get_tokens() == hist.get_tokens()
+
+
+def test_load_keeps_stored_tokens():
+    hist = build_history(topics=3)
+    asyncio.run(hist.compress_topics())
+    data = hist.serialize()
+    restored = history.deserialize_history(data, agent=FakeAgent())
+    # stored counts are used as they are, nothing is tokenized on load
+    assert all(msg.tokens for topic in restored.topics for msg in topic.messages)
+    assert restored.topics[0]._summary_tokens == hist.topics[0].get_tokens()
+
+
+def test_totals_when_topic_moves_during_compression():
+    class SlowAgent(FakeAgent):
+        async def call_utility_model(self, system: str, message: str, **kwargs) -> str:
+            await asyncio.sleep(0.05)
+            return "summary"
+
+    async def main():
+        hist = history.History(agent=SlowAgent())
+        for m in range(8):
+            hist.add_message(ai=m % 2 == 1, content=f"current message {m} " * 50)
+        # background compression as in organize history, the topic is closed while it waits for the model
+        task = asyncio.create_task(hist.current.compress_attention())
+        await asyncio.sleep(0.01)
+        hist.new_topic()
+        hist.add_message(ai=False, content="next topic")
+        await task
+        return hist
+
+    hist = asyncio.run(main())
+    hist.check_tokens()
+    assert hist.get_tokens() == hist.count_tokens()
+
+
+def benchmark(chats: int = 20, topics: int = 40, messages: int = 10):
+    # loading a folder of large saved chats, compared with tokenizing every message on load as before
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(chats):
+            with open(os.path.join(folder, f"{i}.json"), "w") as f:
+                f.write(build_history(topics, messages).serialize())
+        paths = [os.path.join(folder, name) for name in os.listdir(folder)]
+        size = sum(os.path.getsize(path) for path in paths)
+
+        def load(eager: bool):
+            start = time.perf_counter()
+            for path in paths:
+                with open(path) as f:
+                    hist = history.deserialize_history(f.read(), agent=FakeAgent())
+                if eager:
+                    for topic in [*hist.topics, hist.current]:
+                        for msg in topic.messages:
+                            msg.calculate_tokens()
+            return time.perf_counter() - start
+
+        lazy, eager = load(False), load(True)
+        print(f"{chats} chats, {size / 1e6:.1f} MB: stored tokens {lazy * 1e3:.0f} ms, tokenizing on load {eager * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_totals_after_adding()
+    test_totals_after_compressing()
+    test_totals_after_deserializing()
+    test_load_keeps_stored_tokens()
+    test_totals_when_topic_moves_during_compression()
+    benchmark()
@@ -0,0 +1,110 @@
+import sys, os, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import files  # strings and files import each other, files has to come first
+from python.helpers import log as log_module
+from python.helpers.log import Log
+from python.helpers.secrets import SecretsManager
+
+SECRET = "sk-streamed-secret-value"
+
+
+def build_response(tokens: int) -> str:
+    sentence = f"Streaming response text, the key is {SECRET} and more words follow. "
+    # roughly four chars per token
+    return (sentence * (tokens * 4 // len(sentence) + 1))[: tokens * 4]
+
+
+def chunks(text: str, size: int):
+    for i in range(0, len(text), size):
+        yield text[: i + size]
+
+
+def use_secret():
+    SecretsManager.get_instance()._set_cache({"STREAM_KEY": SECRET})
+
+
+def test_stream_matches_full_update():
+    use_secret()
+    response = build_response(5000)
+    streamed = Log().log("agent")
+    full = Log().log("agent")
+    for i, text in enumerate(chunks(response, 7)):
+        kvps = {"thoughts": ["one"], "tool_args": {"text": text}}
+        streamed.update_stream(content=text, kvps=kvps, reasoning=text[:500])
+        if i % 97 == 0:
+            full.update(content=text, kvps=kvps, reasoning=text[:500])
+            assert streamed.content == full.content and streamed.kvps == full.kvps
+    full.update(content=response, kvps=kvps, reasoning=response[:500])
+    assert streamed.content == full.content and streamed.kvps == full.kvps
+    assert SECRET not in streamed.content and SECRET not in streamed.kvps["tool_args"]["text"]
+    assert len(streamed.content) == log_module.CONTENT_MAX_LEN
+
+
+def test_append_masks_secret_split_between_chunks():
+    use_secret()
+    item = Log().log("agent")
+    item.append(content="key: " + SECRET[:10])
+    item.append(content=SECRET[10:] + " end")
+    assert item.content == "key: §§secret(STREAM_KEY) end"
+
+
+def test_rewritten_text_restarts():
+    item = Log().log("agent")
+    item.update_stream(content="first version")
+    item.update_stream(content="second version")
+    assert item.content == "second version"
+
+
+def test_unchanged_kvps_are_reused():
+    item = Log().log("agent")
+    thoughts = ["one", "two"]
+    item.update_stream(kvps={"thoughts": thoughts, "text": "a"})
+    first = item.kvps["thoughts"]
+    item.update_stream(kvps={"thoughts": list(thoughts), "text": "ab"})
+    assert item.kvps["thoughts"] is first and item.kvps["text"] == "ab"
+    # a value changed in place by the caller is not mistaken for the stored one
+    thoughts.append("three")
+    item.update_stream(kvps={"thoughts": thoughts, "text": "ab"})
+    assert item.kvps["thoughts"] == ["one", "two", "three"]
+
+
+def benchmark(tokens: int = 20000, chunk_size: int = 12, buckets: int = 5):
+    use_secret()
+    response = build_response(tokens)
+    streamed = Log().log("agent")
+    full = Log().log("agent")
+    bucket_size = len(response) // buckets + 1
+    stream_times = [0.0] * buckets
+    counts = [0] * buckets
+    full_times = [0.0] * buckets
+    full_counts = [0] * buckets
+
+    for i, text in enumerate(chunks(response, chunk_size)):
+        bucket = min(len(text) // bucket_size, buckets - 1)
+        kvps = {"thoughts": ["plan the answer", "write it"], "tool_args": {"text": text}}
+        start = time.perf_counter()
+        streamed.update_stream(heading="Responding", content=text, kvps=kvps)
+        stream_times[bucket] += time.perf_counter() - start
+        counts[bucket] += 1
+
+        # the full update is slow, sample it
+        if i % 50 == 0:
+            start = time.perf_counter()
+            full.update(heading="Responding", content=text, kvps=kvps)
+            full_times[bucket] += time.perf_counter() - start
+            full_counts[bucket] += 1
+
+    print(f"{'chars':>10} {'update_stream/chunk':>20} {'update/chunk':>16}")
+    for b in range(buckets):
+        inc = stream_times[b] / max(counts[b], 1) * 1e6
+        whole = full_times[b] / max(full_counts[b], 1) * 1e6
+        print(f"{(b + 1) * bucket_size:>10} {inc:>17.1f} us {whole:>13.1f} us")
+
+
+if __name__ == "__main__":
+    test_stream_matches_full_update()
+    test_append_masks_secret_split_between_chunks()
+    test_rewritten_text_restarts()
+    test_unchanged_kvps_are_reused()
+    benchmark()
@@ -0,0 +1,40 @@
+import sys, os, random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import files  # strings and files import each other, files has to come first
+from python.helpers.log import Log
+
+
+def test_updated_since_matches_full_history():
+    log = Log()
+    history = []  # every update, as the unbounded journal kept it
+    for _ in range(3000):
+        if not log.logs or random.random() < 0.1:
+            item = log.log("info", heading="item")
+        else:
+            item = random.choice(log.logs)
+            item.update(content=f"update {len(history)}")
+        history.append(item.no)
+    assert log.version == len(history)
+    for version in [0, 1, 500, 2999, 3000]:
+        expected = sorted(set(history[version:]))
+        assert log.get_updated_since(version) == expected
+        assert [i["no"] for i in log.output(start=version)] == expected
+    assert log.get_updated_since(100, 200) == sorted(
+        no for no in set(history[100:200]) if no not in history[200:]
+    )
+
+
+def test_journal_is_bounded():
+    log = Log()
+    item = log.log("response", heading="streaming")
+    for i in range(100000):
+        item.update(content=str(i))
+    # one entry per item no matter how often it was updated
+    assert len(log._updated) == 1 and log.version == 100001
+    assert log.get_updated_since(100000) == [0] and log.get_updated_since(100001) == []
+
+
+if __name__ == "__main__":
+    test_updated_since_matches_full_history()
+    test_journal_is_bounded()
@@ -0,0 +1,54 @@
+import sys, os, tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers.log_writer import LogWriter
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_buffered_until_flush():
+    with tempfile.TemporaryDirectory() as folder:
+        writer = LogWriter(folder, header="<h>", footer="</h>", flush_interval=60)
+        for i in range(1000):
+            writer.write(f"token {i} ")
+        assert read(writer.path) == "<h>"  # type: ignore
+        writer.flush()
+        assert read(writer.path).endswith("token 999 ")  # type: ignore
+        writer.close()
+        assert read(writer.path).endswith("</h>")  # type: ignore
+
+
+def test_rotates_by_size():
+    with tempfile.TemporaryDirectory() as folder:
+        writer = LogWriter(folder, header="<h>", footer="</h>", flush_interval=60, max_size=100)
+        first = writer.path
+        for i in range(5):
+            writer.write("x" * 60)
+            writer.flush()
+        writer.close()
+        names = sorted(os.listdir(folder))
+        assert len(names) == 3 and writer.path != first
+        for name in names:
+            text = read(os.path.join(folder, name))
+            assert text.startswith("<h>") and text.endswith("</h>")
+
+
+def test_drops_on_overload():
+    with tempfile.TemporaryDirectory() as folder:
+        writer = LogWriter(folder, flush_interval=60, max_queue=10)
+        for i in range(25):
+            writer.write(f"{i},")
+        assert writer.dropped == 15
+        writer.close()
+        text = read(writer.path)  # type: ignore
+        assert text.startswith("0,1,") and "9," in text and "10," not in text
+        assert "15 log messages dropped" in text
+
+
+if __name__ == "__main__":
+    test_buffered_until_flush()
+    test_rotates_by_size()
+    test_drops_on_overload()
@@ -0,0 +1,129 @@
+import sys, os, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import faiss
+from simpleeval import simple_eval
+from python.helpers import memory_index
+from python.helpers.memory_filter import MemoryFilter, MetadataIndex, compile
+from python.helpers.print_style import PrintStyle
+
+# conditions that fail to evaluate print errors, keep them out of the html log
+PrintStyle.html_log = False
+
+
+def test_plans():
+    assert MemoryFilter("area == 'main'").plan == ("eq", "area", ("main",))
+    f = MemoryFilter("area == 'main' or 'fragments' == area")
+    assert f.plan == ("or", (("eq", "area", ("main",)), ("eq", "area", ("fragments",))))
+    assert f.exact
+    # the planned part narrows the candidates, the rest is still evaluated
+    f = MemoryFilter("area == 'main' and timestamp > '2024'")
+    assert f.plan == ("and", (("eq", "area", ("main",)),)) and not f.exact
+    # an unplanned alternative can match anything
+    assert MemoryFilter("area == 'main' or timestamp > '2024'").plan is None
+    assert MemoryFilter("tags == 'main'").plan is None
+    assert MemoryFilter("area ==").error
+    assert compile("area == 'main'") is compile("area == 'main'")
+
+
+def test_same_result_as_simple_eval():
+    docs = [
+        {"area": "main", "timestamp": "2024-01-01"},
+        {"area": "fragments", "timestamp": "2023-01-01"},
+        {"area": "solutions"},
+        {},
+    ]
+    index = MetadataIndex()
+    for i, doc in enumerate(docs):
+        index.add(str(i), doc)
+    for condition in [
+        "area == 'main'",
+        "area == 'main' or area == 'fragments'",
+        "area == 'fragments' and timestamp < '2024'",
+        "not area == 'main'",
+    ]:
+        f = MemoryFilter(condition)
+        expected = set()
+        for i, doc in enumerate(docs):
+            try:
+                if simple_eval(condition, names=doc):
+                    expected.add(str(i))
+            except Exception:
+                pass
+        assert {str(i) for i, doc in enumerate(docs) if f(doc)} == expected, condition
+        if f.plan:
+            selected = index.select(f.plan)
+            assert expected <= selected, condition
+            if f.exact:
+                assert selected == expected, condition
+    index.remove("0", docs[0])
+    assert index.select(("eq", "area", ("main",))) == set()
+
+
+def test_selector():
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(8)
+    index.add(rng.standard_normal((21, 8)).astype(np.float32))
+    positions = np.array([3, 17, 20], dtype=np.int64)
+    sel, bits = memory_index.selector(positions, index.ntotal)
+    assert len(bits) == 3
+    _, ids = index.search(index.reconstruct(0)[None], 21, params=memory_index.search_params(index, sel, 3))
+    assert sorted(i for i in ids[0] if i != -1) == [3, 17, 20]
+
+
+def benchmark(count: int = 100000, queries: int = 100, k: int = 10):
+    # 1% of the memories in the filtered area, like solutions next to fragments
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, 256)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    metadatas = [{"area": "solutions" if i % 100 == 0 else "main"} for i in range(count)]
+    query_vectors = vectors[rng.integers(0, count, queries)]
+    index = faiss.IndexFlatIP(256)
+    index.add(vectors)
+    condition = "area == 'solutions'"
+
+    def post_filter(fetch_k: int):
+        # what the store did before: fetch_k nearest, simple_eval on each
+        found = 0
+        for vector in query_vectors:
+            _, ids = index.search(vector[None], fetch_k)
+            found += len([i for i in ids[0] if simple_eval(condition, names=metadatas[i])][:k])
+        return found / queries
+
+    def preselected():
+        f = compile(condition)
+        metadata_index = MetadataIndex()
+        for i, metadata in enumerate(metadatas):
+            metadata_index.add(str(i), metadata)
+        positions = np.array([int(id) for id in metadata_index.select(f.plan)], dtype=np.int64)  # type: ignore
+        sel, bits = memory_index.selector(positions, index.ntotal)
+        params = memory_index.search_params(index, sel, len(positions))
+        found = 0
+        for vector in query_vectors:
+            _, ids = index.search(vector[None], k, params=params)
+            found += len([i for i in ids[0] if i != -1])
+        return found / queries
+
+    start = time.perf_counter()
+    unfiltered = index.search(query_vectors, k)
+    base_ms = (time.perf_counter() - start) / queries * 1000
+    print(f"{count} vectors, 1% match the filter, k={k}")
+    print(f"{'search':>22} {'ms/query':>10} {'found':>6}")
+    print(f"{'unfiltered':>22} {base_ms:>10.3f} {k:>6}")
+    for fetch_k in (20, 1000, 5000):
+        start = time.perf_counter()
+        found = post_filter(fetch_k)
+        ms = (time.perf_counter() - start) / queries * 1000
+        print(f"{f'simple_eval/{fetch_k}':>22} {ms:>10.3f} {found:>6.1f}")
+    start = time.perf_counter()
+    found = preselected()
+    ms = (time.perf_counter() - start) / queries * 1000
+    print(f"{'selector':>22} {ms:>10.3f} {found:>6.1f}")
+
+
+if __name__ == "__main__":
+    test_plans()
+    test_same_result_as_simple_eval()
+    test_selector()
+    benchmark()
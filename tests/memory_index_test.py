@@ -0,0 +1,82 @@
+import sys, os, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import faiss
+from python.helpers import memory_index
+from python.helpers.memory_index import IndexConfig
+
+
+def make_vectors(count: int, dim: int = 256, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    # embeddings are clustered by topic, uniform random vectors would be the worst case for ivf
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def flat_index(vectors: np.ndarray) -> faiss.Index:
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+def test_ivf_keeps_flat_positions_after_removal():
+    vectors = make_vectors(5000, dim=32, clusters=20)
+    flat = flat_index(vectors)
+    ivf = memory_index.build_ivf(vectors, IndexConfig(nprobe=10000))
+    removed = [0, 17, 18, 2500, 4999]
+    for index in (flat, ivf):
+        index.remove_ids(np.array(removed, dtype=np.int64))
+    memory_index.compact_ids(ivf, removed)
+    # searched exhaustively both return the same positions
+    _, expected = flat.search(vectors[:50], 5)
+    _, found = ivf.search(vectors[:50], 5)
+    assert (expected == found).all()
+    # new vectors go after the remaining ones in both
+    extra = make_vectors(10, dim=32, clusters=20, seed=1)
+    flat.add(extra)
+    ivf.add(extra)
+    _, expected = flat.search(extra, 1)
+    _, found = ivf.search(extra, 1)
+    assert (expected == found).all()
+
+
+def test_needs_ann():
+    index = flat_index(make_vectors(100, dim=8))
+    assert not memory_index.needs_ann(index, IndexConfig())
+    assert memory_index.needs_ann(index, IndexConfig(threshold=100))
+    assert memory_index.needs_ann(index, IndexConfig(type="ivf"))
+    assert not memory_index.needs_ann(index, IndexConfig(type="flat", threshold=10))
+
+
+def benchmark(count: int = 100000, queries: int = 200, k: int = 10):
+    vectors = make_vectors(count)
+    query_vectors = make_vectors(queries, seed=1)
+    flat = flat_index(vectors)
+
+    start = time.perf_counter()
+    _, truth = flat.search(query_vectors, k)
+    flat_ms = (time.perf_counter() - start) / queries * 1000
+
+    start = time.perf_counter()
+    ivf = memory_index.build_ivf(vectors, IndexConfig())
+    build_s = time.perf_counter() - start
+
+    print(f"{count} vectors, ivf nlist {ivf.nlist} built in {build_s:.1f} s")
+    print(f"{'index':>12} {'ms/query':>10} {f'recall@{k}':>10}")
+    print(f"{'flat':>12} {flat_ms:>10.3f} {1.0:>10.3f}")
+    for nprobe in (1, 8, 32, 128):
+        ivf.nprobe = nprobe
+        start = time.perf_counter()
+        _, found = ivf.search(query_vectors, k)
+        ms = (time.perf_counter() - start) / queries * 1000
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        print(f"{f'ivf/{nprobe}':>12} {ms:>10.3f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    test_ivf_keeps_flat_positions_after_removal()
+    test_needs_ann()
+    benchmark()
@@ -0,0 +1,66 @@
+import sys, os, tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers.memory_wal import MemoryWal
+
+
+def replay(wal: MemoryWal) -> dict[str, list[float]]:
+    # what the memory db ends up with, applied the same way Memory._replay_wal does
+    db: dict[str, list[float]] = {}
+    for record in wal.read():
+        if record["op"] == "add":
+            db.setdefault(record["id"], record["vector"])
+        else:
+            for id in record["ids"]:
+                db.pop(id, None)
+    return db
+
+
+def test_replay_in_order():
+    with tempfile.TemporaryDirectory() as folder:
+        wal = MemoryWal(folder)
+        wal.log_add(["a", "b"], ["text a", "text b"], [[0.5, 1.0], [0.25, -2.0]], [{"area": "main"}, {}])
+        wal.log_delete(["a"])
+        wal.log_add(["c"], ["text c"], [[1.5, 3.0]])
+        assert wal.ops == 4
+        wal.close()
+        assert replay(MemoryWal(folder)) == {"b": [0.25, -2.0], "c": [1.5, 3.0]}
+
+
+def test_snapshot_rotation():
+    with tempfile.TemporaryDirectory() as folder:
+        wal = MemoryWal(folder)
+        wal.log_add(["a"], ["a"], [[1.0]])
+        wal.start_snapshot()
+        wal.log_add(["b"], ["b"], [[2.0]])
+        # snapshot not written yet (crash), both parts are replayed
+        assert set(replay(MemoryWal(folder))) == {"a", "b"}
+        wal.start_snapshot()  # the next snapshot takes over what the failed one had
+        wal.log_add(["c"], ["c"], [[3.0]])
+        assert set(replay(MemoryWal(folder))) == {"a", "b", "c"}
+        wal.finish_snapshot()
+        assert set(replay(MemoryWal(folder))) == {"c"}
+        wal.clear()
+        assert replay(MemoryWal(folder)) == {}
+
+
+def test_cut_off_tail_is_ignored():
+    with tempfile.TemporaryDirectory() as folder:
+        wal = MemoryWal(folder)
+        wal.log_add(["a", "b"], ["a", "b"], [[1.0], [2.0]])
+        wal.close()
+        with open(wal.path, "rb+") as f:
+            f.truncate(os.path.getsize(wal.path) - 10)
+        assert set(replay(MemoryWal(folder))) == {"a"}
+        # records written after the cut are replayed
+        wal = MemoryWal(folder)
+        wal.log_add(["c"], ["c"], [[3.0]])
+        wal.log_delete(["a"])
+        wal.close()
+        assert set(replay(MemoryWal(folder))) == {"c"}
+
+
+if __name__ == "__main__":
+    test_replay_in_order()
+    test_snapshot_rotation()
+    test_cut_off_tail_is_ignored()
@@ -0,0 +1,47 @@
+import sys, os, tempfile, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import files
+from python.helpers.persistence import PersistenceService
+
+
+def test_marks_are_coalesced():
+    service = PersistenceService(delay=0.05)
+    written = []
+    for i in range(100):
+        service.mark_dirty("obj", lambda i=i: written.append(i) or 1)
+    time.sleep(0.3)
+    # only the latest state is written
+    assert written == [99]
+    stats = service.get_stats()
+    assert stats["writes"] == 1 and stats["coalesced"] == 99 and stats["queue_depth"] == 0
+    service.shutdown()
+
+
+def test_flush_and_shutdown():
+    service = PersistenceService(delay=60)
+    written = []
+    service.mark_dirty("a", lambda: written.append("a"))
+    service.mark_dirty("b", lambda: written.append("b"))
+    assert service.is_dirty("a")
+    service.flush("a")
+    assert written == ["a"] and not service.is_dirty("a")
+    service.cancel("b")
+    service.mark_dirty("c", lambda: written.append("c"))
+    service.shutdown()
+    assert written == ["a", "c"]
+
+
+def test_atomic_write():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "sub", "file.json")
+        assert files.write_file_atomic(path, "content") == 7
+        assert files.write_file_atomic(path, b"new") == 3
+        assert files.read_file(path) == "new"
+        assert os.listdir(os.path.dirname(path)) == ["file.json"]
+
+
+if __name__ == "__main__":
+    test_marks_are_coalesced()
+    test_flush_and_shutdown()
+    test_atomic_write()
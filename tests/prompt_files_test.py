@@ -0,0 +1,48 @@
+import sys, os, tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from python.helpers import files
+
+
+def write(path: str, content: str, mtime: int):
+    with open(path, "w") as f:
+        f.write(content)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_edits_of_read_files_are_seen(tmp_path):
+    folder = str(tmp_path)
+    main = os.path.join(folder, "main.md")
+    part = os.path.join(folder, "part.md")
+    write(main, 'main {{ include "part.md" }}', 1_000_000_000)
+    write(part, "part {{value}}", 1_000_000_000)
+    with files.track_prompt_files() as tracked:
+        assert files.read_prompt_file("main.md", [folder], value=1) == "main part 1"
+    # the included file and the searched folder are tracked too
+    assert {main, part, folder} <= set(tracked)
+    assert not files.prompt_files_changed(tracked)
+    # an in-place edit changes neither the folder mtime nor the including file
+    write(part, "edited {{value}}", 2_000_000_000)
+    assert files.prompt_files_changed(tracked)
+    with files.track_prompt_files() as tracked:
+        assert files.read_prompt_file("main.md", [folder], value=1) == "main edited 1"
+    assert not files.prompt_files_changed(tracked)
+
+
+def test_nested_tracking(tmp_path):
+    folder = str(tmp_path)
+    write(os.path.join(folder, "a.md"), "a", 1_000_000_000)
+    write(os.path.join(folder, "b.md"), "b", 1_000_000_000)
+    with files.track_prompt_files() as outer:
+        files.read_prompt_file("a.md", [folder])
+        with files.track_prompt_files() as inner:
+            files.read_prompt_file("b.md", [folder])
+    assert os.path.join(folder, "a.md") not in inner
+    assert set(inner) <= set(outer)
+
+
+if __name__ == "__main__":
+    for test in (test_edits_of_read_files_are_seen, test_nested_tracking):
+        with tempfile.TemporaryDirectory() as folder:
+            test(folder)
+    print("ok")
@@ -332,8 +332,11 @@ let lastLogVersion = 0;
 let lastLogGuid = "";
 let lastSpokenNo = 0;
 
+let lastContexts = [];
+let lastTasks = [];
+let lastListsVersion = 0;
+
 async function poll() {
-  let updated = false;
   try {
     // Get timezone from navigator
     const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
@@ -344,6 +347,7 @@ async function poll() {
       notifications_from: notificationStore.lastNotificationVersion || 0,
       context: context || null,
       timezone: timezone,
+      lists_version: lastListsVersion,
     });
 
     // Check if the response is valid
@@ -352,6 +356,18 @@ async function poll() {
       return false;
     }
 
+    return await applyPollResponse(response);
+  } catch (error) {
+    console.error("Error:", error);
+    setConnectionStatus(false);
+  }
+  return false;
+}
+
+// apply a /poll response or a pushed update from /poll_stream
+async function applyPollResponse(response) {
+  let updated = false;
+  try {
     if (!context) setContext(response.context);
     if (response.context != context) return; //skip late polls after context change
 
@@ -360,10 +376,20 @@ async function poll() {
       chatHistory.innerHTML = "";
       lastLogVersion = 0;
       lastLogGuid = response.log_guid;
-      await poll();
-      return;
+      // pushed updates of a reset log already start from the beginning
+      if (!response.log_reset) {
+        await poll();
+        return;
+      }
     }
 
+    // the chat and task lists are left out when they did not change
+    if (response.contexts === undefined) response.contexts = lastContexts;
+    else lastContexts = response.contexts;
+    if (response.tasks === undefined) response.tasks = lastTasks;
+    else lastTasks = response.tasks;
+    if (response.lists_version) lastListsVersion = response.lists_version;
+
     if (lastLogVersion != response.log_version) {
       updated = true;
       for (const log of response.logs) {
@@ -765,6 +791,9 @@ export const setContext = function (id) {
   // Clear the chat history immediately to avoid showing stale content
   chatHistory.innerHTML = "";
 
+  // the push stream is bound to a context
+  if (pushSource) startPushStream();
+
   // Update both selected states
   if (globalThis.Alpine) {
     if (chatsSection) {
@@ -1065,6 +1094,48 @@ chatInput.addEventListener("input", adjustTextareaHeight);
 
 // setInterval(poll, 250);
 
+// server push of the poll payload, polling is the fallback while the stream is not open
+let pushSource = null;
+let pushRetryAt = 0;
+const pushRetryInterval = 10000;
+
+function startPushStream() {
+  stopPushStream();
+  if (!globalThis.EventSource || !context) return;
+  const params = new URLSearchParams({
+    context: context,
+    log_from: lastLogVersion,
+    log_guid: lastLogGuid,
+    notifications_from: notificationStore.lastNotificationVersion || 0,
+    timezone: Intl.DateTimeFormat().resolvedOptions().timeZone,
+  });
+  const source = new EventSource("/poll_stream?" + params.toString());
+  source.onmessage = async (event) => {
+    if (source !== pushSource) return;
+    try {
+      await applyPollResponse(JSON.parse(event.data));
+    } catch (error) {
+      console.error("Error:", error);
+    }
+  };
+  source.onerror = () => {
+    // closed or refused, go back to polling and try again later
+    source.close();
+    if (source === pushSource) pushSource = null;
+    pushRetryAt = Date.now() + pushRetryInterval;
+  };
+  pushSource = source;
+}
+
+function stopPushStream() {
+  if (pushSource) pushSource.close();
+  pushSource = null;
+}
+
+function isPushStreamOpen() {
+  return pushSource && pushSource.readyState === EventSource.OPEN;
+}
+
 async function startPolling() {
   const shortInterval = 25;
   const longInterval = 250;
@@ -1074,6 +1145,13 @@ async function startPolling() {
   async function _doPoll() {
     let nextInterval = longInterval;
 
+    // updates are pushed while the stream is open
+    if (isPushStreamOpen()) {
+      setTimeout(_doPoll.bind(this), nextInterval);
+      return;
+    }
+    if (!pushSource && context && Date.now() >= pushRetryAt) startPushStream();
+
     try {
       const result = await poll();
       if (result) shortIntervalCount = shortIntervalPeriod; // Reset the counter when the result is true